@@ -5,6 +5,8 @@ Uses custom PyTorch models from HuggingFace with timm
 
 import os
 import json
+import asyncio
+import threading
 
 # Set environment variables BEFORE any imports to avoid TensorFlow/Keras conflicts
 os.environ['USE_TF'] = '0'
@@ -16,16 +18,119 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import Depends, FastAPI, File, Header, Request, UploadFile, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
-from typing import Optional
+from typing import BinaryIO, Callable, Optional, Union
 import uuid as uuid_module
 import traceback
-from urllib.parse import urlparse
+import time
+from urllib.parse import parse_qs, urlparse
 
 app = FastAPI(title="AI-Powered Deepfake Detection API")
 
+# Reject oversized uploads while they stream in (limits in MB, same names as shared.config)
+MAX_IMAGE_SIZE_MB = int(os.getenv("MAX_IMAGE_SIZE_MB", "10"))
+MAX_VIDEO_SIZE_MB = int(os.getenv("MAX_VIDEO_SIZE_MB", "100"))
+MAX_AUDIO_SIZE_MB = int(os.getenv("MAX_AUDIO_SIZE_MB", "20"))
+
+from shared.media import (
+    ChecksumMismatch, ResumableUploadStore, UploadError, UploadExpired, UploadNotFound, UploadOffsetMismatch,
+    UploadSizeLimitMiddleware, UploadTooLarge, as_file
+)
+
+app.add_middleware(UploadSizeLimitMiddleware, limits={
+    "/api/v1/check-image": MAX_IMAGE_SIZE_MB * 1024 * 1024,
+    "/api/v1/check-video": MAX_VIDEO_SIZE_MB * 1024 * 1024,
+    "/api/v1/check-voice": MAX_AUDIO_SIZE_MB * 1024 * 1024,
+})
+
+# Per-IP and per-API-key rate limits (same names as shared.config), inside CORS so
+# 429s reach the browser. Counters are shared through Redis when it is reachable.
+from shared.ratelimit import (
+    AdmissionController, AdmissionMiddleware, APIKeyCache, ModalityLimits, Overloaded, RateLimiter,
+    RateLimitMiddleware, default_limits, load_api_key_quota, request_deadline, request_priority
+)
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+rate_limiter = RateLimiter(default_limits(
+    int(os.getenv("RATE_LIMIT_PER_MINUTE", "60")),
+    int(os.getenv("RATE_LIMIT_PER_HOUR", "1000")),
+    int(os.getenv("RATE_LIMIT_PER_DAY", "10000")),
+))
+try:
+    import shared.database.session  # API key quotas live in the database
+    rate_limit_key_lookup = APIKeyCache(load_api_key_quota, ttl_seconds=int(os.getenv("API_KEY_CACHE_TTL_SECONDS", "60")))
+except Exception as e:
+    # Missing database packages, or shared.config rejecting the environment: limit by IP only
+    rate_limit_key_lookup = None
+    print(f"⚠️ API key quotas unavailable: {str(e)}")
+
+
+def admission_limits(modality: str, concurrency: int, max_queue: int, expected_seconds: float,
+                     deadline_seconds: float) -> ModalityLimits:
+    """Execution slots for one modality, overridable as ADMISSION_<MODALITY>_<SETTING>"""
+    prefix = f"ADMISSION_{modality.upper()}_"
+    return ModalityLimits(
+        concurrency=int(os.getenv(prefix + "CONCURRENCY", str(concurrency))),
+        max_queue=int(os.getenv(prefix + "MAX_QUEUE", str(max_queue))),
+        expected_seconds=float(os.getenv(prefix + "EXPECTED_SECONDS", str(expected_seconds))),
+        deadline_seconds=float(os.getenv(prefix + "DEADLINE_SECONDS", str(deadline_seconds))),
+    )
+
+
+# Admission control: model work runs in a few slots per modality; requests that could not
+# finish before the client's deadline (X-Request-Timeout) get 503 + Retry-After up front,
+# and X-Request-Priority: low traffic is shed first. Runs inside the rate limiter.
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+admission = AdmissionController({
+    "text": admission_limits("text", 4, 32, 3.0, 60),
+    "image": admission_limits("image", 2, 16, 2.0, 30),
+    "video": admission_limits("video", 1, 4, 30.0, 300),
+    "voice": admission_limits("voice", 2, 8, 5.0, 60),
+})
+
+def is_video_job_submission(scope) -> bool:
+    """POST /api/v1/check-video?mode=job, which only queues the work"""
+    if scope["path"].rstrip("/") != "/api/v1/check-video":
+        return False
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    return query.get("mode", [""])[-1] == "job"
+
+
+if ADMISSION_ENABLED:
+    app.add_middleware(
+        AdmissionMiddleware,
+        controller=admission,
+        routes={
+            "/api/v1/check-text": "text",
+            "/api/v1/check-url": "text",
+            "/api/v1/check-image": "image",
+            "/api/v1/check-video": "video",
+            "/api/v1/check-video/stream": "video",
+            "/api/v1/check-voice": "voice",
+        },
+        # Background video jobs are bounded by the job queue's own worker pool
+        exempt=is_video_job_submission,
+    )
+
+if RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        RateLimitMiddleware,
+        limiter=rate_limiter,
+        key_lookup=rate_limit_key_lookup,
+        exempt_paths=["/", "/metrics", "/api/v1/health"],
+        # Job status polling is a cheap read; the work was counted at submission
+        exempt_prefixes=["/api/v1/check-video/result/"],
+        # A resumable upload counts once when it is created and once when finalized,
+        # not per chunk (PUT) or status check (GET)
+        exempt=lambda scope: (scope["method"] in ("GET", "PUT")
+                              and scope["path"].startswith("/api/v1/check-video/uploads/")),
+        trust_forwarded_for=os.getenv("RATE_LIMIT_TRUST_FORWARDED_FOR", "false").lower() == "true",
+    )
+
 # CORS middleware - FIXED for Brave browser
 app.add_middleware(
     CORSMiddleware,
@@ -33,7 +138,31 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After", "X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset"],
+)
+
+# Prometheus: request metrics labelled by route template, plus per-stage histograms
+from shared.monitoring.metrics import RequestMetricsMiddleware, metrics_response, stage_timer
+from shared.monitoring.tracing import TracingMiddleware, setup_tracing
+
+app.add_middleware(RequestMetricsMiddleware)
+
+# OpenTelemetry: a server span per request, with each stage_timer stage as a child span
+# (same variable names as shared.config; TRACING_EXPORTER=none turns it off)
+setup_tracing(
+    "verifyai-model-server",
+    exporter=os.getenv("TRACING_EXPORTER", "otlp") if os.getenv("ENABLE_TRACING", "true").lower() == "true" else "none",
+    sample_ratio=float(os.getenv("TRACING_SAMPLE_RATIO", "0.05")),
+    endpoint=os.getenv("OTLP_TRACES_ENDPOINT", "http://localhost:4318/v1/traces"),
+    environment=os.getenv("ENVIRONMENT"),
 )
+app.add_middleware(TracingMiddleware)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Expose Prometheus metrics"""
+    return metrics_response()
 
 # ============================================
 # SOTA Model Loading with Custom Architecture
@@ -87,10 +216,16 @@ from huggingface_hub import hf_hub_download
 from PIL import Image
 import cv2
 import numpy as np
-import librosa
 import soundfile as sf
-from io import BytesIO
+import shutil
 import tempfile
+from shared.media import (
+    VideoContext, NearDuplicateFilter, SequentialFrameTest, available_workers, coarse_to_fine_order,
+    decode_segments_parallel, gap_midpoint
+)
+from shared.media.audio import (
+    AudioDecodeError, aggregate_window_scores, decode_audio, detect_speech, frame_windows, select_speech_windows
+)
 
 try:
     import timm
@@ -127,13 +262,14 @@ except Exception as e:
     print(f"❌ Tavily API: FAILED - {str(e)}")
 
 # Gemini 2.0 Flash for backup verification
+GEMINI_MODEL_NAME = 'gemini-2.0-flash-exp'
 print("\n🧠 Initializing Gemini 2.0 Flash (Backup Verification)...")
 try:
     import google.generativeai as genai
     gemini_api_key = os.getenv("GEMINI_API_KEY")
     if gemini_api_key:
         genai.configure(api_key=gemini_api_key)
-        gemini_model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        gemini_model = genai.GenerativeModel(GEMINI_MODEL_NAME)
         print("✅ Gemini 2.0 Flash: READY (Backup Verification)")
     else:
         gemini_model = None
@@ -142,6 +278,33 @@ except Exception as e:
     gemini_model = None
     print(f"❌ Gemini 2.0 Flash: FAILED - {str(e)}")
 
+# Gemini file handles keyed by content hash: a forwarded clip is uploaded once
+# per validity window instead of on every request
+from shared.media import RemoteFileRegistry
+gemini_files = RemoteFileRegistry(genai) if gemini_model is not None else None
+
+# Web source scoring patterns and domain reputation (compiled once, hot-reloaded when the file changes)
+from shared.factcheck import ClaimRuleEngine, DomainReputationIndex, ReloadableResource, SourcePatterns
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+source_patterns = ReloadableResource(
+    os.getenv("SOURCE_PATTERNS_PATH", os.path.join(DATA_DIR, "source_patterns.json")),
+    SourcePatterns,
+)
+domain_reputation = ReloadableResource(
+    os.getenv("DOMAIN_REPUTATION_PATH", os.path.join(DATA_DIR, "domain_reputation.json")),
+    DomainReputationIndex,
+)
+claim_rules = ReloadableResource(
+    os.getenv("CLAIM_RULES_PATH", os.path.join(DATA_DIR, "claim_rules.json")),
+    ClaimRuleEngine,
+)
+print(f"\n🔎 Source scoring patterns: version {source_patterns.get().version}")
+print(f"🔎 Fast-path claim rules: version {claim_rules.get().version} "
+      f"({len(claim_rules.get().rules)} rules)")
+print(f"🔎 Domain reputation table: version {domain_reputation.get().version} "
+      f"({len(domain_reputation.get().domains)} domains)")
+
 
 # ============================================
 # Custom Model Architecture for Image Detection
@@ -270,18 +433,19 @@ class DeepfakeVoiceDetector(nn.Module):
 # ============================================
 
 print("\n🖼️ Loading Image Deepfake Detector (EfficientNetV2-S)...")
+IMAGE_MODEL_NAME = "Arko007/deepfake-image-detector"
 image_detector_model = None
 image_transform = None
 
 try:
     # Download model files from HuggingFace
     model_path = hf_hub_download(
-        repo_id="Arko007/deepfake-image-detector",
+        repo_id=IMAGE_MODEL_NAME,
         filename="pytorch_model.bin",
         token=os.getenv("HUGGINGFACE_TOKEN")
     )
     config_path = hf_hub_download(
-        repo_id="Arko007/deepfake-image-detector",
+        repo_id=IMAGE_MODEL_NAME,
         filename="config.json",
         token=os.getenv("HUGGINGFACE_TOKEN")
     )
@@ -324,18 +488,80 @@ except Exception as e:
 # ============================================
 
 print("\n🎥 Loading Video Deepfake Detector (DFD-SOTA)...")
+VIDEO_MODEL_NAME = "Arko007/deepfake-detector-dfd-sota"
 video_detector_model = None
 video_transform = None
+video_input_size = None
+VIDEO_NORMALIZE_MEAN = [0.485, 0.456, 0.406]
+VIDEO_NORMALIZE_STD = [0.229, 0.224, 0.225]
+
+# Snap sampled frames to the nearest keyframe so only keyframes get decoded
+# (much faster on long-GOP videos, at the cost of exact sample positions)
+VIDEO_SNAP_TO_KEYFRAMES = os.getenv("VIDEO_SNAP_TO_KEYFRAMES", "false").lower() == "true"
+
+# Maximum frames classified per video (all of them unless adaptive sampling stops early)
+VIDEO_MAX_FRAMES = int(os.getenv("VIDEO_MAX_FRAMES", "10"))
+
+# Adaptive sampling: classify frames coarse-to-fine and stop once a sequential
+# probability ratio test decides FAKE/REAL at the configured error rates
+VIDEO_ADAPTIVE_SAMPLING = os.getenv("VIDEO_ADAPTIVE_SAMPLING", "false").lower() == "true"
+VIDEO_SPRT_ALPHA = float(os.getenv("VIDEO_SPRT_ALPHA", "0.01"))  # tolerated false-FAKE rate
+VIDEO_SPRT_BETA = float(os.getenv("VIDEO_SPRT_BETA", "0.01"))  # tolerated false-REAL rate
+VIDEO_MIN_FRAMES = int(os.getenv("VIDEO_MIN_FRAMES", "3"))
+VIDEO_ADAPTIVE_BATCH = int(os.getenv("VIDEO_ADAPTIVE_BATCH", "2"))
+
+# Near-duplicate skipping: sampled frames whose perceptual hash is within
+# VIDEO_DEDUP_MAX_DISTANCE bits (of 64) of a scored frame reuse its score,
+# and a replacement frame is drawn from the middle of the following gap
+VIDEO_DEDUP_FRAMES = os.getenv("VIDEO_DEDUP_FRAMES", "true").lower() == "true"
+VIDEO_DEDUP_MAX_DISTANCE = int(os.getenv("VIDEO_DEDUP_MAX_DISTANCE", "3"))
+
+# Long videos: decode + preprocess sampled frames in time segments across a
+# process pool (one segment per VIDEO_SEGMENT_SECONDS, capped by the cores),
+# then classify them in one batched pass. Fixed sampling only. Off by default:
+# pool workers import this module again, so enable it only when the server is
+# started through uvicorn (python -m uvicorn ai_server_sota:app), never when
+# it is run as a script, which would load every model in each worker.
+VIDEO_PARALLEL_DECODE = os.getenv("VIDEO_PARALLEL_DECODE", "false").lower() == "true"
+VIDEO_PARALLEL_MIN_SECONDS = float(os.getenv("VIDEO_PARALLEL_MIN_SECONDS", "60"))
+VIDEO_SEGMENT_SECONDS = float(os.getenv("VIDEO_SEGMENT_SECONDS", "30"))
+VIDEO_DECODE_WORKERS = int(os.getenv("VIDEO_DECODE_WORKERS", "0")) or available_workers()
+VIDEO_INFERENCE_BATCH = int(os.getenv("VIDEO_INFERENCE_BATCH", "16"))
+
+# Background video jobs (POST /api/v1/check-video?mode=job): persisted in the
+# video_jobs table and processed by a local worker pool, see shared/jobs
+VIDEO_JOBS_ENABLED = os.getenv("VIDEO_JOBS_ENABLED", "true").lower() == "true"
+video_job_queue = None
+try:
+    from shared.database.models import JobStatus
+    from shared.database.session import init_db
+    from shared.jobs import VideoJobQueue
+except Exception as e:
+    # Missing database packages, or shared.config rejecting the environment
+    VIDEO_JOBS_ENABLED = False
+    print(f"⚠️ Video job queue unavailable: {str(e)}")
+
+# Resumable uploads for large videos (sessions on local disk, idle ones expire)
+RESUMABLE_UPLOAD_DIR = os.getenv("RESUMABLE_UPLOAD_DIR", "./uploads")
+RESUMABLE_UPLOAD_TTL_HOURS = float(os.getenv("RESUMABLE_UPLOAD_TTL_HOURS", "24"))
+RESUMABLE_CHUNK_MAX_MB = int(os.getenv("RESUMABLE_CHUNK_MAX_MB", "8"))
+RESUMABLE_SWEEP_INTERVAL_SECONDS = 600
+video_uploads = ResumableUploadStore(
+    RESUMABLE_UPLOAD_DIR,
+    max_size=MAX_VIDEO_SIZE_MB * 1024 * 1024,
+    max_chunk_size=RESUMABLE_CHUNK_MAX_MB * 1024 * 1024,
+    ttl_seconds=RESUMABLE_UPLOAD_TTL_HOURS * 3600,
+)
 
 try:
     # Download model files from HuggingFace
     model_path = hf_hub_download(
-        repo_id="Arko007/deepfake-detector-dfd-sota",
+        repo_id=VIDEO_MODEL_NAME,
         filename="pytorch_model.bin",
         token=os.getenv("HUGGINGFACE_TOKEN")
     )
     config_path = hf_hub_download(
-        repo_id="Arko007/deepfake-detector-dfd-sota",
+        repo_id=VIDEO_MODEL_NAME,
         filename="config.json",
         token=os.getenv("HUGGINGFACE_TOKEN")
     )
@@ -364,10 +590,11 @@ try:
     
     # Create transform
     video_size = config.get('image_size', 299)
+    video_input_size = (video_size, video_size)
     video_transform = transforms.Compose([
-        transforms.Resize((video_size, video_size)),
+        transforms.Resize(video_input_size),
         transforms.ToTensor(),
-        transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
+        transforms.Normalize(mean=VIDEO_NORMALIZE_MEAN, std=VIDEO_NORMALIZE_STD)
     ])
     
     print(f"✅ Video Detector: LOADED (Xception/EfficientNetV2-M, 1.28GB, SOTA)")
@@ -384,8 +611,36 @@ except Exception as e:
 # Load Voice Deepfake Detector (SOTA)
 # ============================================
 
+VOICE_MODEL_NAME = "koyelog/deepfake-voice-detector-sota"
+VOICE_FALLBACK_MODEL_NAME = "ehcalabres/wav2vec2-lg-xlsr-en-speech-emotion-recognition"
 voice_detector_model = None
 voice_feature_extractor = None
+
+# Loaded lazily on first use, or in the background at startup with VOICE_PRELOAD=true.
+# Requests wait VOICE_LOAD_WAIT_SECONDS for an in-flight load, then get 503 + Retry-After.
+VOICE_PRELOAD = os.getenv("VOICE_PRELOAD", "false").lower() == "true"
+VOICE_LOAD_WAIT_SECONDS = float(os.getenv("VOICE_LOAD_WAIT_SECONDS", "2"))
+VOICE_LOAD_RETRY_AFTER_SECONDS = int(os.getenv("VOICE_LOAD_RETRY_AFTER_SECONDS", "15"))
+voice_load_lock = threading.Lock()
+voice_load_future = None
+
+# The detector scores 4 s windows; the whole clip is covered by overlapping windows
+# scored in one batch. Longer clips get VOICE_MAX_WINDOWS windows spread over them.
+VOICE_SAMPLE_RATE = 16000
+VOICE_WINDOW_SECONDS = 4.0
+VOICE_HOP_SECONDS = float(os.getenv("VOICE_HOP_SECONDS", "2"))
+VOICE_MAX_WINDOWS = int(os.getenv("VOICE_MAX_WINDOWS", "16"))
+# Peak activation memory per window, dominated by Wav2Vec2's first conv layer
+# (512 channels x ~12.8k steps of float32 for 4 s); caps the windows per forward
+VOICE_WINDOW_MEMORY_MB = 32
+VOICE_BATCH_MAX_MB = int(os.getenv("VOICE_BATCH_MAX_MB", "512"))
+
+# Voice activity detection ahead of the detector: windows with less than
+# VOICE_VAD_MIN_WINDOW_SPEECH speech are skipped, and clips with under
+# VOICE_MIN_SPEECH_SECONDS of speech get an INSUFFICIENT_SPEECH result
+VOICE_VAD_ENABLED = os.getenv("VOICE_VAD_ENABLED", "true").lower() == "true"
+VOICE_VAD_MIN_WINDOW_SPEECH = float(os.getenv("VOICE_VAD_MIN_WINDOW_SPEECH", "0.2"))
+VOICE_MIN_SPEECH_SECONDS = float(os.getenv("VOICE_MIN_SPEECH_SECONDS", "1.0"))
 print("\n🎤 Voice Deepfake Detector will be loaded on first use...")
 
 
@@ -425,6 +680,12 @@ class CheckResponse(BaseModel):
     verdict: str
     details: Optional[dict] = None
 
+class UploadInitRequest(BaseModel):
+    """Resumable upload session request (sha256 of the whole file is optional)"""
+    filename: str
+    size: int
+    sha256: Optional[str] = None
+
 
 # ============================================
 # Helper Functions
@@ -465,101 +726,169 @@ def load_text_detectors():
     return fake_news_detector_liar, fake_news_detector_fact_check
 
 
-def load_voice_detector():
-    """Lazy load SOTA voice detector with fallback to alternative models"""
-    global voice_detector_model, voice_feature_extractor
-    if voice_detector_model is None:
+def build_voice_detector() -> tuple:
+    """Download and build the SOTA voice detector, falling back to alternative models"""
+    model = None
+    feature_extractor = None
+    try:
+        print("\n🎤 Loading SOTA Voice Deepfake Detector...")
+        from transformers import Wav2Vec2FeatureExtractor, Wav2Vec2ForSequenceClassification
+        
+        # Try to download custom model checkpoint first
         try:
-            print("\n🎤 Loading SOTA Voice Deepfake Detector...")
-            from transformers import Wav2Vec2FeatureExtractor, Wav2Vec2ForSequenceClassification
+            model_path = hf_hub_download(
+                repo_id=VOICE_MODEL_NAME,
+                filename="pytorch_model.pth",
+                token=os.getenv("HUGGINGFACE_TOKEN")
+            )
             
-            # Try to download custom model checkpoint first
-            try:
-                model_path = hf_hub_download(
-                    repo_id="koyelog/deepfake-voice-detector-sota",
-                    filename="pytorch_model.pth",
-                    token=os.getenv("HUGGINGFACE_TOKEN")
-                )
-                
-                # Initialize custom model
-                voice_detector_model = DeepfakeVoiceDetector()
-                
-                # Load checkpoint
-                checkpoint = torch.load(model_path, map_location='cpu', weights_only=False)
-                
-                # Handle different checkpoint formats
-                if isinstance(checkpoint, dict):
-                    if 'model_state_dict' in checkpoint:
-                        state_dict = checkpoint['model_state_dict']
-                    elif 'state_dict' in checkpoint:
-                        state_dict = checkpoint['state_dict']
-                    else:
-                        state_dict = checkpoint
+            # Initialize custom model
+            model = DeepfakeVoiceDetector()
+            
+            # Load checkpoint
+            checkpoint = torch.load(model_path, map_location='cpu', weights_only=False)
+            
+            # Handle different checkpoint formats
+            if isinstance(checkpoint, dict):
+                if 'model_state_dict' in checkpoint:
+                    state_dict = checkpoint['model_state_dict']
+                elif 'state_dict' in checkpoint:
+                    state_dict = checkpoint['state_dict']
                 else:
                     state_dict = checkpoint
+            else:
+                state_dict = checkpoint
+            
+            model.load_state_dict(state_dict, strict=False)
+            model.eval()
+            
+            # Initialize feature extractor
+            feature_extractor = Wav2Vec2FeatureExtractor.from_pretrained("facebook/wav2vec2-base")
+            
+            print("✅ Voice Detector: LOADED (SOTA - Wav2Vec2 + BiGRU + Attention, 98.5M params)")
+            print("   - Architecture: Wav2Vec2 + BiGRU(2 layers) + 8-head Attention")
+            print("   - Performance: 95-97% accuracy on validation")
+            print("   - Input: 4-second clips at 16 kHz")
+            
+        except Exception as custom_error:
+            print(f"⚠️ Custom voice model not available: {str(custom_error)}")
+            print("   Falling back to alternative audio classification model...")
+            
+            # Fallback: Use a general audio classification model
+            from transformers import pipeline
+            
+            try:
+                # Try emotion recognition model (can detect artifacts in deepfakes)
+                model = pipeline(
+                    "audio-classification",
+                    model=VOICE_FALLBACK_MODEL_NAME,
+                    device=-1  # CPU
+                )
+                feature_extractor = None  # Pipeline handles this
                 
-                voice_detector_model.load_state_dict(state_dict, strict=False)
-                voice_detector_model.eval()
-                
-                # Initialize feature extractor
-                voice_feature_extractor = Wav2Vec2FeatureExtractor.from_pretrained("facebook/wav2vec2-base")
-                
-                print("✅ Voice Detector: LOADED (SOTA - Wav2Vec2 + BiGRU + Attention, 98.5M params)")
-                print("   - Architecture: Wav2Vec2 + BiGRU(2 layers) + 8-head Attention")
-                print("   - Performance: 95-97% accuracy on validation")
-                print("   - Input: 4-second clips at 16 kHz")
-                
-            except Exception as custom_error:
-                print(f"⚠️ Custom voice model not available: {str(custom_error)}")
-                print("   Falling back to alternative audio classification model...")
+                print("✅ Voice Detector: LOADED (Fallback - Emotion Recognition Model)")
+                print("   - Note: Using emotion recognition as proxy for deepfake detection")
                 
-                # Fallback: Use a general audio classification model
-                from transformers import pipeline
+            except Exception as fallback_error:
+                print(f"⚠️ Fallback model also failed: {str(fallback_error)}")
+                print("   Voice deepfake detection will use heuristic analysis")
+                model = "heuristic"  # Use heuristic approach
+                feature_extractor = None
                 
-                try:
-                    # Try emotion recognition model (can detect artifacts in deepfakes)
-                    voice_detector_model = pipeline(
-                        "audio-classification",
-                        model="ehcalabres/wav2vec2-lg-xlsr-en-speech-emotion-recognition",
-                        device=-1  # CPU
-                    )
-                    voice_feature_extractor = None  # Pipeline handles this
-                    
-                    print("✅ Voice Detector: LOADED (Fallback - Emotion Recognition Model)")
-                    print("   - Note: Using emotion recognition as proxy for deepfake detection")
-                    
-                except Exception as fallback_error:
-                    print(f"⚠️ Fallback model also failed: {str(fallback_error)}")
-                    print("   Voice deepfake detection will use heuristic analysis")
-                    voice_detector_model = "heuristic"  # Use heuristic approach
-                    voice_feature_extractor = None
-                    
-                    print("✅ Voice Detector: LOADED (Heuristic Analysis)")
-            
-        except Exception as e:
-            print(f"❌ Voice Detector: FAILED - {str(e)}")
-            print(f"   Traceback: {traceback.format_exc()}")
-            # Don't raise - allow server to start without voice detection
-            voice_detector_model = None
-            voice_feature_extractor = None
-            print("⚠️ Voice detection will be unavailable")
-    
+                print("✅ Voice Detector: LOADED (Heuristic Analysis)")
+        
+    except Exception as e:
+        print(f"❌ Voice Detector: FAILED - {str(e)}")
+        print(f"   Traceback: {traceback.format_exc()}")
+        # Don't raise - allow server to start without voice detection
+        model = None
+        feature_extractor = None
+        print("⚠️ Voice detection will be unavailable")
+
+    return model, feature_extractor
+
+
+def load_voice_detector():
+    """
+    Load the voice detector once (single-flight): concurrent callers wait for
+    the same load, and the globals are only published once it is complete.
+    """
+    global voice_detector_model, voice_feature_extractor
+    if voice_detector_model is None:
+        with voice_load_lock:
+            if voice_detector_model is None:
+                model, feature_extractor = build_voice_detector()
+                voice_feature_extractor = feature_extractor
+                voice_detector_model = model
     return voice_detector_model, voice_feature_extractor
 
 
-def analyze_image_with_sota(image_bytes: bytes) -> dict:
+def classify_voice_windows(model, feature_extractor, windows: np.ndarray) -> list:
+    """Fake probability per (n, samples) window, batched within VOICE_BATCH_MAX_MB"""
+    batch_size = max(1, VOICE_BATCH_MAX_MB // VOICE_WINDOW_MEMORY_MB)
+    probs = []
+    model.eval()
+    with torch.no_grad():
+        for start in range(0, len(windows), batch_size):
+            chunk = windows[start:start + batch_size]
+            with stage_timer("preprocess", "voice.features", windows=len(chunk)):
+                input_values = feature_extractor(
+                    list(chunk),
+                    sampling_rate=VOICE_SAMPLE_RATE,
+                    return_tensors="pt"
+                ).input_values
+            with stage_timer("inference", "voice.inference", model=VOICE_MODEL_NAME, batch_size=len(chunk)):
+                probs.extend(torch.sigmoid(model(input_values)).view(-1).tolist())
+    return probs
+
+
+def start_voice_detector_load() -> asyncio.Future:
+    """Start loading the voice detector in a worker thread, or return the load already in flight"""
+    global voice_load_future
+    if voice_load_future is None or (voice_load_future.done() and voice_detector_model is None):
+        voice_load_future = asyncio.ensure_future(asyncio.to_thread(load_voice_detector))
+    return voice_load_future
+
+
+async def get_voice_detector() -> tuple:
+    """
+    Voice detector for a request: waits up to VOICE_LOAD_WAIT_SECONDS for the
+    shared load, then answers 503 with Retry-After instead of blocking.
+    """
+    if voice_detector_model is not None:
+        return voice_detector_model, voice_feature_extractor
+
+    future = start_voice_detector_load()
+    try:
+        model, feature_extractor = await asyncio.wait_for(asyncio.shield(future), timeout=VOICE_LOAD_WAIT_SECONDS)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=503,
+            detail="Voice detection model is loading, please retry shortly",
+            headers={"Retry-After": str(VOICE_LOAD_RETRY_AFTER_SECONDS)}
+        )
+    if model is None:
+        raise HTTPException(status_code=503, detail="Voice detection model not available")
+    return model, feature_extractor
+
+
+def analyze_image_with_sota(image_data: Union[bytes, BinaryIO]) -> dict:
     """Analyze image using SOTA EfficientNetV2-S model"""
     if not image_detector_model or not image_transform:
         raise Exception("Image detector model not loaded")
     
     # Load image
-    image = Image.open(BytesIO(image_bytes)).convert('RGB')
+    with stage_timer("decode", "image.decode") as span:
+        image = Image.open(as_file(image_data)).convert('RGB')
+        span.set_attribute("image.width", image.width)
+        span.set_attribute("image.height", image.height)
     
     # Apply transform
-    image_tensor = image_transform(image).unsqueeze(0)
+    with stage_timer("preprocess", "image.preprocess"):
+        image_tensor = image_transform(image).unsqueeze(0)
     
     # Run inference
-    with torch.no_grad():
+    with stage_timer("inference", "image.inference", model=IMAGE_MODEL_NAME, batch_size=1), torch.no_grad():
         logit = image_detector_model(image_tensor)
         prob_fake = torch.sigmoid(logit).item()
     
@@ -602,7 +931,7 @@ def analyze_image_with_sota(image_bytes: bytes) -> dict:
         "analysis": analysis,
         "verdict": "FAKE" if is_fake else "REAL",
         "model_details": {
-            "model_name": "Arko007/deepfake-image-detector",
+            "model_name": IMAGE_MODEL_NAME,
             "backbone": "EfficientNetV2-S",
             "auc": 0.9986,
             "probability_fake": prob_fake
@@ -610,51 +939,236 @@ def analyze_image_with_sota(image_bytes: bytes) -> dict:
     }
 
 
-def analyze_video_with_sota(video_bytes: bytes) -> dict:
-    """Analyze video using SOTA DFD model with frame extraction"""
+def open_video_context(video) -> VideoContext:
+    """Open a per-request video context from bytes or a file object (frames cached)"""
+    return VideoContext(video, snap_to_keyframes=VIDEO_SNAP_TO_KEYFRAMES)
+
+
+def classify_video_frames(frames: list) -> list:
+    """Run the video detector on RGB frames as one batch, returning P(fake) per frame"""
+    with stage_timer("preprocess", "video.preprocess", frames=len(frames)):
+        batch = torch.stack([video_transform(Image.fromarray(frame)) for frame in frames])
+    with stage_timer("inference", "video.inference", model=VIDEO_MODEL_NAME, batch_size=len(frames)), torch.no_grad():
+        logits = video_detector_model(batch)
+    return torch.sigmoid(logits).view(-1).tolist()
+
+
+def classify_video_tensors(batch: np.ndarray, slots: list) -> list:
+    """Run the video detector on preprocessed (N, 3, H, W) tensors, VIDEO_INFERENCE_BATCH at a time"""
+    probs = []
+    with torch.no_grad():
+        for start in range(0, len(slots), VIDEO_INFERENCE_BATCH):
+            chunk = slots[start:start + VIDEO_INFERENCE_BATCH]
+            # Contiguous runs are zero-copy views of the shared block
+            if chunk == list(range(chunk[0], chunk[-1] + 1)):
+                inputs = torch.from_numpy(batch[chunk[0]:chunk[-1] + 1])
+            else:
+                inputs = torch.from_numpy(batch[chunk])
+            probs.extend(torch.sigmoid(video_detector_model(inputs)).view(-1).tolist())
+            del inputs
+    return probs
+
+
+def replace_duplicate_frames(ctx: VideoContext, skipped: list, frame_scores: dict,
+                             dedup: NearDuplicateFilter, candidates: list) -> list:
+    """Score one replacement frame per skipped near-duplicate, halfway to the next sample"""
+    taken = set(candidates) | set(frame_scores)
+    replacements = {gap_midpoint(frame_idx, taken, ctx.frame_count) for frame_idx in skipped} - {None}
+    if not replacements:
+        return []
+    return score_video_frames(ctx, sorted(replacements), frame_scores, dedup)
+
+
+def score_video_frames_parallel(ctx: VideoContext, indices: list, frame_scores: dict,
+                                dedup: Optional[NearDuplicateFilter] = None) -> dict:
+    """
+    Parallel counterpart of score_video_frames for long videos: segments are
+    decoded and preprocessed in worker processes into shared memory, then
+    classified in batches. Returns decode statistics for model_details.
+    """
+    decode_start = time.perf_counter()
+    with stage_timer("decode", "video.frames.decode", frames=len(indices), workers=VIDEO_DECODE_WORKERS) as span:
+        decoded = decode_segments_parallel(ctx.source_path(), indices, ctx.fps, video_input_size,
+                                           VIDEO_NORMALIZE_MEAN, VIDEO_NORMALIZE_STD, max_workers=VIDEO_DECODE_WORKERS,
+                                           segment_seconds=VIDEO_SEGMENT_SECONDS, reader=ctx.reader)
+        span.set_attribute("segments", decoded.segments)
+        span.set_attribute("frames_decoded", decoded.frames_decoded)
+    decode_seconds = time.perf_counter() - decode_start
+    with decoded:
+        slots = []
+        skipped = []
+        for slot, frame_idx in enumerate(decoded.indices):
+            if not decoded.present[slot]:
+                continue
+            if dedup is not None and dedup.check_hash(frame_idx, decoded.hashes[frame_idx]) is not None:
+                skipped.append(frame_idx)
+            else:
+                slots.append(slot)
+
+        inference_start = time.perf_counter()
+        with stage_timer("inference", "video.inference", model=VIDEO_MODEL_NAME, frames=len(slots),
+                         batch_size=min(len(slots), VIDEO_INFERENCE_BATCH), duplicates_skipped=len(skipped)):
+            probs = classify_video_tensors(decoded.tensors, slots) if slots else []
+        inference_seconds = time.perf_counter() - inference_start
+        frame_scores.update(zip([decoded.indices[slot] for slot in slots], probs))
+        stats = {
+            "segments": decoded.segments,
+            "workers": VIDEO_DECODE_WORKERS,
+            "frames_decoded": decoded.frames_decoded,
+            "decode_seconds": round(decode_seconds, 3),
+            "inference_seconds": round(inference_seconds, 3)
+        }
+
+    for frame_idx in skipped:
+        frame_scores[frame_idx] = frame_scores[dedup.duplicates[frame_idx]]
+    if skipped:
+        replace_duplicate_frames(ctx, skipped, frame_scores, dedup, indices)
+    return stats
+
+
+def score_video_frames(ctx: VideoContext, indices: list, frame_scores: dict,
+                       dedup: Optional[NearDuplicateFilter] = None, candidates: Optional[list] = None,
+                       prefetch: list = ()) -> list:
+    """
+    Decode and classify frames into frame_scores, returning the (index, P(fake))
+    pairs the model actually scored. Frames in prefetch that the decoder
+    passes on the way are cached for a later call.
+
+    With a dedup filter, frames that look like an already-scored frame inherit
+    its score instead of running the model. When the sample grid (candidates)
+    is given, each skipped frame is replaced once by the frame halfway to the
+    next sample, so near-static stretches don't eat the frame budget.
+    """
+    with stage_timer("decode", "video.frames.decode", frames=len(indices)) as span:
+        decoded = ctx.frames(indices, prefetch)
+        span.set_attribute("frames_decoded", len(decoded))
+    unique = {}
+    skipped = []
+    for frame_idx, frame in sorted(decoded.items()):
+        if dedup is not None and dedup.check(frame_idx, frame) is not None:
+            skipped.append(frame_idx)
+        else:
+            unique[frame_idx] = frame
+
+    scored = list(zip(unique, classify_video_frames(list(unique.values())))) if unique else []
+    frame_scores.update(scored)
+    for frame_idx in skipped:
+        frame_scores[frame_idx] = frame_scores[dedup.duplicates[frame_idx]]
+
+    if skipped and candidates is not None:
+        scored += replace_duplicate_frames(ctx, skipped, frame_scores, dedup, candidates)
+
+    return scored
+
+
+def video_majority_verdict(fake_count: int, real_count: int) -> tuple:
+    """Overall (is_fake, confidence) from per-frame votes"""
+    total = fake_count + real_count
+    is_fake = fake_count > real_count
+    confidence = fake_count / total if is_fake else real_count / total
+    
+    # CRITICAL FIX: Apply confidence threshold logic (< CONFIDENCE_THRESHOLD should flip verdict)
+    # If confidence < CONFIDENCE_THRESHOLD, the model is uncertain, so flip the verdict
+    if confidence < CONFIDENCE_THRESHOLD:
+        is_fake = not is_fake
+        # Recalculate confidence after flip
+        confidence = real_count / total if is_fake else fake_count / total
+    return is_fake, confidence
+
+
+def analyze_video_with_sota(video: Union[bytes, VideoContext], progress: Optional[Callable[[float], None]] = None,
+                            on_frame: Optional[Callable[[dict], None]] = None) -> dict:
+    """
+    Analyze video using SOTA DFD model with frame extraction
+
+    progress, if given, is called with the fraction of sampled frames scored so
+    far, and on_frame with each frame result as soon as it is scored; with
+    either, frames are scored in VIDEO_ADAPTIVE_BATCH-sized steps. Both may
+    raise to abandon the analysis.
+    """
     if not video_detector_model or not video_transform:
         raise Exception("Video detector model not loaded")
     
-    # Save video temporarily
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp_file:
-        tmp_file.write(video_bytes)
-        video_path = tmp_file.name
-    
+    # Reuse the request's video context if given, so decoded frames are shared
+    owns_context = not isinstance(video, VideoContext)
+    ctx = open_video_context(video) if owns_context else video
+
     try:
         # Extract frames
-        cap = cv2.VideoCapture(video_path)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        
+        total_frames = ctx.frame_count
+
         if total_frames == 0:
             raise Exception("Could not read video frames")
-        
-        # Sample 10 frames evenly
-        frame_indices = np.linspace(0, total_frames - 1, min(10, total_frames), dtype=int)
-        
+
+        # Sample up to VIDEO_MAX_FRAMES frames evenly
+        candidate_indices = ctx.sample_indices(VIDEO_MAX_FRAMES)
+        frame_scores = {}
+        sprt = None
+        parallel_stats = None
+        analysis_start = time.perf_counter()
+        dedup = NearDuplicateFilter(VIDEO_DEDUP_MAX_DISTANCE) if VIDEO_DEDUP_FRAMES else None
+
+        def describe_frame(frame_idx: int) -> dict:
+            prob_fake = frame_scores[frame_idx]
+            frame_result = {
+                "frame": int(frame_idx),
+                "probability_fake": prob_fake,
+                "verdict": "FAKE" if prob_fake > 0.5 else "REAL"
+            }
+            if dedup and frame_idx in dedup.duplicates:
+                frame_result["reused_from"] = int(dedup.duplicates[frame_idx])
+            return frame_result
+
+        reported = set()
+
+        def step_done(fraction: float):
+            if on_frame:
+                for frame_idx in sorted(set(frame_scores) - reported):
+                    reported.add(frame_idx)
+                    on_frame(describe_frame(frame_idx))
+            if progress:
+                progress(fraction)
+
+        if VIDEO_ADAPTIVE_SAMPLING:
+            # Coarse-to-fine: each batch refines the spread, stop once the SPRT decides
+            sprt = SequentialFrameTest(VIDEO_SPRT_ALPHA, VIDEO_SPRT_BETA, VIDEO_MIN_FRAMES)
+            order = [candidate_indices[pos] for pos in coarse_to_fine_order(len(candidate_indices))]
+            for start in range(0, len(order), VIDEO_ADAPTIVE_BATCH):
+                batch = order[start:start + VIDEO_ADAPTIVE_BATCH]
+                # Later frames sharing a GOP with this batch are kept from the same decode
+                later = order[start + VIDEO_ADAPTIVE_BATCH:]
+                # Only frames the model actually scored count as evidence
+                for _, prob_fake in score_video_frames(ctx, batch, frame_scores, dedup, candidate_indices, later):
+                    sprt.update(prob_fake)
+                step_done(min(1.0, (start + len(batch)) / len(order)))
+                if sprt.decision is not None:
+                    break
+        elif (VIDEO_PARALLEL_DECODE and VIDEO_DECODE_WORKERS > 1 and video_input_size
+              and ctx.duration >= VIDEO_PARALLEL_MIN_SECONDS):
+            # Long video: decode segments across processes, classify in one batched stage
+            parallel_stats = score_video_frames_parallel(ctx, candidate_indices, frame_scores, dedup)
+            step_done(1.0)
+        elif progress or on_frame:
+            # Background jobs and streams score in steps so progress can be reported
+            for start in range(0, len(candidate_indices), VIDEO_ADAPTIVE_BATCH):
+                batch = candidate_indices[start:start + VIDEO_ADAPTIVE_BATCH]
+                score_video_frames(ctx, batch, frame_scores, dedup, candidate_indices)
+                step_done((start + len(batch)) / len(candidate_indices))
+        else:
+            # Decoded in a single forward pass over the stream, classified as one batch
+            score_video_frames(ctx, candidate_indices, frame_scores, dedup, candidate_indices)
+
+        analysis_seconds = time.perf_counter() - analysis_start
+
+        if not frame_scores:
+            raise Exception("Could not read video frames")
+
         frame_results = []
         fake_count = 0
         real_count = 0
         total_prob = 0
-        
-        for frame_idx in frame_indices:
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
-            ret, frame = cap.read()
-            
-            if not ret:
-                continue
-            
-            # Convert BGR to RGB and to PIL Image
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frame_pil = Image.fromarray(frame_rgb)
-            
-            # Apply transform
-            frame_tensor = video_transform(frame_pil).unsqueeze(0)
-            
-            # Run inference
-            with torch.no_grad():
-                logit = video_detector_model(frame_tensor)
-                prob_fake = torch.sigmoid(logit).item()
-            
+
+        for frame_idx, prob_fake in sorted(frame_scores.items()):
             is_fake = prob_fake > 0.5
             if is_fake:
                 fake_count += 1
@@ -662,26 +1176,11 @@ def analyze_video_with_sota(video_bytes: bytes) -> dict:
                 real_count += 1
             
             total_prob += prob_fake
-            
-            frame_results.append({
-                "frame": int(frame_idx),
-                "probability_fake": prob_fake,
-                "verdict": "FAKE" if is_fake else "REAL"
-            })
-        
-        cap.release()
+            frame_results.append(describe_frame(frame_idx))
         
         # Overall verdict by majority voting
         avg_prob = total_prob / len(frame_results)
-        is_fake_overall = fake_count > real_count
-        confidence = fake_count / len(frame_results) if is_fake_overall else real_count / len(frame_results)
-        
-        # CRITICAL FIX: Apply confidence threshold logic (< CONFIDENCE_THRESHOLD should flip verdict)
-        # If confidence < CONFIDENCE_THRESHOLD, the model is uncertain, so flip the verdict
-        if confidence < CONFIDENCE_THRESHOLD:
-            is_fake_overall = not is_fake_overall
-            # Recalculate confidence after flip
-            confidence = real_count / len(frame_results) if is_fake_overall else fake_count / len(frame_results)
+        is_fake_overall, confidence = video_majority_verdict(fake_count, real_count)
         
         # Generate analysis
         if is_fake_overall:
@@ -705,17 +1204,38 @@ def analyze_video_with_sota(video_bytes: bytes) -> dict:
             "analysis": analysis,
             "verdict": "FAKE" if is_fake_overall else "REAL",
             "model_details": {
-                "model_name": "Arko007/deepfake-detector-dfd-sota",
+                "model_name": VIDEO_MODEL_NAME,
                 "frames_analyzed": len(frame_results),
                 "fake_frames": fake_count,
                 "real_frames": real_count,
-                "frame_results": frame_results[:5]  # First 5 frames
+                "frame_results": frame_results[:5],  # First 5 frames
+                "decoder": ctx.backend,
+                "frames_decoded": ctx.frames_decoded + (parallel_stats["frames_decoded"] if parallel_stats else 0),
+                "timing": {
+                    "decode": "parallel" if parallel_stats else "serial",
+                    "video_seconds": round(ctx.duration, 2),
+                    "wall_seconds": round(analysis_seconds, 3),
+                    "seconds_per_video_minute": round(analysis_seconds / (ctx.duration / 60), 3) if ctx.duration else None,
+                    **(parallel_stats or {})
+                },
+                "sampling": {
+                    "mode": "adaptive" if sprt else "fixed",
+                    "max_frames": VIDEO_MAX_FRAMES,
+                    "stopped_early": bool(sprt) and not set(candidate_indices) <= set(frame_scores),
+                    "sprt_llr": round(sprt.llr, 3) if sprt else None
+                },
+                "near_duplicates": {
+                    "enabled": dedup is not None,
+                    "reused": {int(i): int(src) for i, src in sorted(dedup.duplicates.items())} if dedup else {},
+                    "replacement_frames": sorted(int(i) for i in set(frame_scores) - set(candidate_indices)),
+                    "model_frames": len(frame_scores) - (len(dedup.duplicates) if dedup else 0)
+                }
             }
         }
     
     finally:
-        # Cleanup
-        os.unlink(video_path)
+        if owns_context:
+            ctx.close()
 
 
 def verify_with_gemini_text(text: str, model_prediction: bool, model_confidence: float, tavily_sources: str = "") -> dict:
@@ -744,7 +1264,8 @@ Provide your analysis in JSON format:
 
 Be extremely precise about current facts vs historical facts."""
         
-        response = gemini_model.generate_content(prompt)
+        with stage_timer("gemini", "gemini.generate_content", model=GEMINI_MODEL_NAME, modality="text"):
+            response = gemini_model.generate_content(prompt)
         response_text = response.text.strip().replace('``````', '')
         gemini_result = json.loads(response_text)
         
@@ -769,14 +1290,14 @@ Be extremely precise about current facts vs historical facts."""
         return {"override": False, "ai_verdict": None, "should_check": False}
 
 
-def verify_with_gemini_image(image_bytes: bytes, model_prediction: bool, model_confidence: float) -> dict:
+def verify_with_gemini_image(image_data: Union[bytes, BinaryIO], model_prediction: bool, model_confidence: float) -> dict:
     """Use AI to cross-verify image analysis"""
     if not gemini_model or not model_prediction:  # Only check if model says it's FAKE
         return {"override": False, "ai_verdict": None}
     
     try:
         # Upload image to Gemini
-        image = Image.open(BytesIO(image_bytes))
+        image = Image.open(as_file(image_data))
         
         prompt = """Analyze if this image is a DEEPFAKE or REAL. Look for:
 - AI-generated artifacts
@@ -791,7 +1312,8 @@ Respond in JSON format:
     "reasoning": "brief explanation"
 }"""
         
-        response = gemini_model.generate_content([prompt, image])
+        with stage_timer("gemini", "gemini.generate_content", model=GEMINI_MODEL_NAME, modality="image"):
+            response = gemini_model.generate_content([prompt, image])
         gemini_result = json.loads(response.text.strip().replace('``````', ''))
         
         # If Gemini disagrees with model (model says FAKE, Gemini says REAL)
@@ -812,34 +1334,21 @@ Respond in JSON format:
         return {"override": False, "gemini_verdict": None}
 
 
-def verify_with_gemini_video(video_bytes: bytes, model_prediction: bool, model_confidence: float) -> dict:
+def verify_with_gemini_video(video: Union[bytes, VideoContext], model_prediction: bool, model_confidence: float) -> dict:
     """Use Gemini to verify video analysis - only if predicted as FAKE"""
     if not gemini_model or not model_prediction:  # Only check if model says it's FAKE
         return {"override": False, "gemini_verdict": None}
     
     try:
-        # Extract a few frames for Gemini to analyze
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp:
-            tmp.write(video_bytes)
-            video_path = tmp.name
-        
-        cap = cv2.VideoCapture(video_path)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        
-        # Extract 3 frames (beginning, middle, end)
-        frame_indices = [0, total_frames // 2, total_frames - 1]
-        frames = []
-        
-        for idx in frame_indices:
-            cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
-            ret, frame = cap.read()
-            if ret:
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                pil_image = Image.fromarray(frame_rgb)
-                frames.append(pil_image)
-        
-        cap.release()
-        os.unlink(video_path)
+        # Gemini only looks at one frame: reuse the earliest frame the classifier
+        # already decoded when the request's video context is passed in
+        if isinstance(video, VideoContext):
+            decoded_frames = video.frames([min(video.cached_indices(), default=0)])
+        else:
+            with open_video_context(video) as ctx:
+                decoded_frames = ctx.frames([0])
+
+        frames = [Image.fromarray(frame) for frame in decoded_frames.values()]
         
         if not frames:
             return {"override": False, "gemini_verdict": None}
@@ -858,7 +1367,8 @@ Respond in JSON format:
 }"""
         
         # Analyze first frame with Gemini
-        response = gemini_model.generate_content([prompt, frames[0]])
+        with stage_timer("gemini", "gemini.generate_content", model=GEMINI_MODEL_NAME, modality="video"):
+            response = gemini_model.generate_content([prompt, frames[0]])
         gemini_result = json.loads(response.text.strip().replace('``````', ''))
         
         # If Gemini disagrees with model (model says FAKE, Gemini says REAL)
@@ -879,7 +1389,8 @@ Respond in JSON format:
         return {"override": False, "gemini_verdict": None}
 
 
-def verify_with_gemini_audio(audio_bytes: bytes, model_prediction: bool, model_confidence: float) -> dict:
+def verify_with_gemini_audio(audio: BinaryIO, model_prediction: bool, model_confidence: float,
+                             suffix: str = ".wav") -> dict:
     """Use Gemini to verify audio analysis - only if predicted as FAKE"""
     if not gemini_model or not model_prediction:  # Only check if model says it's FAKE
         return {"override": False, "gemini_verdict": None}
@@ -899,16 +1410,21 @@ Respond in JSON format:
     "reasoning": "brief explanation"
 }"""
         
-        # Save audio temporarily for Gemini
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as tmp:
-            tmp.write(audio_bytes)
-            audio_path = tmp.name
-        
-        # Upload audio file to Gemini
-        audio_file = genai.upload_file(audio_path)
-        response = gemini_model.generate_content([prompt, audio_file])
-        
-        os.unlink(audio_path)
+        # Reuse the handle from an earlier upload of the same bytes while it is valid
+        with stage_timer("gemini", "gemini.upload_file") as span:
+            audio_file, reused = gemini_files.get_or_upload(audio, suffix=suffix)
+            span.set_attribute("cache_hit", reused)
+        if reused:
+            print(f"♻️ Gemini audio: reusing uploaded file {getattr(audio_file, 'name', '')}")
+        try:
+            with stage_timer("gemini", "gemini.generate_content", model=GEMINI_MODEL_NAME, modality="audio",
+                             file_reused=reused):
+                response = gemini_model.generate_content([prompt, audio_file])
+        except Exception:
+            if reused:
+                # The provider may have dropped the file early; upload afresh next time
+                gemini_files.invalidate(audio_file)
+            raise
         
         gemini_result = json.loads(response.text.strip().replace('``````', ''))
         
@@ -945,13 +1461,17 @@ async def health_check():
             "gemini_backup": gemini_model is not None,
             "image_deepfake_detector": image_detector_model is not None,
             "video_deepfake_detector": video_detector_model is not None,
-            "voice_deepfake_detector": voice_detector_model is not None
-        }
+            "voice_deepfake_detector": voice_detector_model is not None,
+            "voice_detector_loading": voice_load_future is not None and not voice_load_future.done()
+        },
+        "load": admission.snapshot()
     }
 
 
+# Model endpoints are plain functions: FastAPI runs them in its thread pool, so the
+# event loop keeps accepting (and admission control keeps shedding) while models run
 @app.post("/api/v1/check-text", response_model=CheckResponse)
-async def check_text(request: TextCheckRequest):
+def check_text(request: TextCheckRequest):
     """
     Intelligent Web-Based Fact-Checking System:
     1. Search web for latest verified information about the claim
@@ -962,7 +1482,23 @@ async def check_text(request: TextCheckRequest):
         print(f"\n{'='*70}")
         print(f"📝 FACT-CHECKING: '{request.text[:80]}...'")
         print(f"{'='*70}")
-        
+
+        # 0. FAST PATH: Known conspiracy theories and basic facts (data/claim_rules.json)
+        # Answered before any web search or model call
+        rule = claim_rules.get().match(request.text)
+        if rule:
+            verdict = "FAKE" if rule['is_fake'] else "REAL"
+            print(f"   🎯 FAST PATH: Matched known claim rule '{rule['id']}'")
+            print(f"{'='*70}")
+            print(f"FINAL VERDICT: {verdict} ({rule['confidence']:.1%})")
+            print(f"{'='*70}\n")
+            return CheckResponse(
+                is_fake=rule['is_fake'],
+                confidence=rule['confidence'],
+                analysis=verdict,
+                verdict=verdict
+            )
+
         # Search the web for recent verified information
         web_facts = ""
         tavily_sources = []
@@ -984,11 +1520,13 @@ async def check_text(request: TextCheckRequest):
                     search_query = f"verify: {request.text[:200]}"
                     print(f"🌐 Searching for verification: '{search_query[:60]}...'")
                 
-                search_results = tavily.search(
-                    query=search_query, 
-                    max_results=5,
-                    search_depth="advanced"
-                )
+                with stage_timer("tavily", "tavily.search", max_results=5, search_depth="advanced") as span:
+                    search_results = tavily.search(
+                        query=search_query, 
+                        max_results=5,
+                        search_depth="advanced"
+                    )
+                    span.set_attribute("results", len((search_results or {}).get('results') or []))
                 
                 if search_results and 'results' in search_results:
                     for item in search_results['results']:
@@ -1020,7 +1558,8 @@ async def check_text(request: TextCheckRequest):
             liar_detector, fact_detector = load_text_detectors()
             
             # Use political detector first
-            liar_result = liar_detector(request.text[:512])[0]
+            with stage_timer("inference", "text.liar", model="Arko007/fake-news-liar-political"):
+                liar_result = liar_detector(request.text[:512])[0]
             liar_score = liar_result['score']
             liar_is_fake = 'FAKE' in liar_result['label'].upper() or 'FALSE' in liar_result['label'].upper()
             predictions.append({
@@ -1031,7 +1570,8 @@ async def check_text(request: TextCheckRequest):
             print(f"   Political-LIAR: {'FAKE' if liar_is_fake else 'REAL'} ({liar_score:.1%})")
             
             # Use fact-check detector
-            fact_result = fact_detector(request.text[:512])[0]
+            with stage_timer("inference", "text.fact_check", model="Arko007/fact-check1-v3-final"):
+                fact_result = fact_detector(request.text[:512])[0]
             fact_score = fact_result['score']
             fact_is_fake = 'FAKE' in fact_result['label'].upper() or 'FALSE' in fact_result['label'].upper()
             predictions.append({
@@ -1048,36 +1588,11 @@ async def check_text(request: TextCheckRequest):
         if tavily_sources:
             try:
                 print(f"🔍 Smart analysis of {len(tavily_sources)} web sources...")
-                claim_lower = request.text.lower()
-                
-                # Enhanced debunking/fact-check indicators (MORE SENSITIVE)
-                debunk_patterns = [
-                    # Strong debunking
-                    'false', 'fake', 'myth', 'debunk', 'incorrect', 'wrong', 'misleading', 'untrue',
-                    'not true', 'no evidence', 'conspiracy theory', 'hoax', 'disproven', 'refuted',
-                    'fact check: false', 'claim is false', 'this is false', 'misinformation',
-                    'lacks evidence', 'unsubstantiated', 'baseless', 'fabricated', 'discredited',
-                    # Context clues
-                    'despite claims', 'contrary to', 'in reality', 'actually', 'truth is',
-                    'scientific consensus', 'studies show', 'experts say', 'research shows',
-                    'no scientific evidence', 'no proof', 'no support', 'widely debunked',
-                    # Additional strong indicators
-                    'has been debunked', 'thoroughly debunked', 'completely false', 'entirely false',
-                    'no link', 'no connection', 'does not cause', 'study finds no', 'experts reject',
-                    'pseudoscience', 'anti-science', 'against science', 'contradicts science'
-                ]
-                
-                support_patterns = [
-                    # Strong support
-                    'confirmed', 'verified', 'true', 'accurate', 'correct', 'factual', 'legitimate',
-                    'proven', 'established', 'documented', 'official', 'evidence shows',
-                    'studies confirm', 'research confirms', 'experts confirm', 'science shows',
-                    'peer-reviewed', 'published in', 'according to', 'data shows',
-                    # Authoritative sources
-                    'cdc', 'who', 'nih', 'fda', 'reuters', 'ap news', 'bbc', 'scientific american',
-                    'nature', 'science journal', 'government', 'university'
-                ]
-                
+                # Debunk/support phrases live in data/source_patterns.json, compiled into
+                # a single automaton; site credibility comes from data/domain_reputation.json
+                patterns = source_patterns.get()
+                reputation = domain_reputation.get()
+
                 # Analyze each source
                 source_verdicts = []
                 for source in tavily_sources:
@@ -1085,20 +1600,17 @@ async def check_text(request: TextCheckRequest):
                     title = source['title'].lower()
                     combined = f"{title} {content}"
                     url = source.get('url', '').lower()
-                    
-                    # Check for fact-checking sites (high trust)
-                    fact_check_sites = ['snopes', 'factcheck.org', 'politifact', 'reuters/fact-check', 
-                                       'apnews.com/hub/fact-checking', 'fullfact', 'africacheck']
-                    is_fact_checker = any(site in url for site in fact_check_sites)
-                    
-                    # Check for authoritative sources
-                    authority_sites = ['cdc.gov', 'who.int', 'nih.gov', 'nature.com', 'science.org',
-                                      'gov', 'edu', 'bbc.com/news', 'reuters.com', 'apnews.com']
-                    is_authoritative = any(site in url for site in authority_sites)
-                    
-                    # Count indicators
-                    debunk_score = sum(1 for pattern in debunk_patterns if pattern in combined)
-                    support_score = sum(1 for pattern in support_patterns if pattern in combined)
+
+                    # Fact-checking sites (high trust) and authoritative sources, keyed by
+                    # registrable domain so 'gov' no longer matches governance-blog.com
+                    site_flags = reputation.classify_url(url)
+                    is_fact_checker = site_flags['is_fact_checker']
+                    is_authoritative = site_flags['is_authoritative']
+
+                    # Count indicators (one pass over the text for both groups)
+                    scores = patterns.score_text(combined)
+                    debunk_score = scores['debunk']
+                    support_score = scores['support']
                     
                     # Determine source verdict
                     if is_fact_checker and debunk_score > 0:
@@ -1164,51 +1676,9 @@ async def check_text(request: TextCheckRequest):
                 import traceback
                 traceback.print_exc()
         
-        # 3. PRE-CHECK: Known conspiracy theories and basic facts (FAST PATH)
-        claim_lower = request.text.lower()
         final_result = None
-        
-        # KNOWN CONSPIRACY THEORIES & DANGEROUS MISINFORMATION (FAKE)
-        fake_indicators = [
-            'vaccine' in claim_lower and 'autism' in claim_lower,
-            'flat earth' in claim_lower or ('earth' in claim_lower and 'flat' in claim_lower and 'is' in claim_lower),
-            '5g' in claim_lower and ('covid' in claim_lower or 'coronavirus' in claim_lower),
-            'moon landing' in claim_lower and ('fake' in claim_lower or 'hoax' in claim_lower or 'faked' in claim_lower),
-            'climate' in claim_lower and 'hoax' in claim_lower,
-            'bleach' in claim_lower and ('cure' in claim_lower or 'cures' in claim_lower or 'treat' in claim_lower or 'treatment' in claim_lower),
-            'drink' in claim_lower and 'bleach' in claim_lower,
-        ]
-        
-        if any(fake_indicators):
-            print(f"   🎯 FAST PATH: Known conspiracy theory detected")
-            final_result = {
-                'is_fake': True,
-                'confidence': 0.95,
-                'reasoning': "Well-known debunked conspiracy theory"
-            }
-        
-        # KNOWN BASIC FACTS (REAL) - Only if not already marked as fake
-        if not final_result:
-            real_indicators = [
-                'water' in claim_lower and 'h2o' in claim_lower,
-                'sun' in claim_lower and 'rise' in claim_lower and 'east' in claim_lower,
-                'earth' in claim_lower and 'orbit' in claim_lower and 'sun' in claim_lower,
-                'dna' in claim_lower and 'genetic' in claim_lower,
-                'paris' in claim_lower and 'capital' in claim_lower and 'france' in claim_lower,
-                'obama' in claim_lower and ('president' in claim_lower or '44th' in claim_lower),
-                'human' in claim_lower and 'oxygen' in claim_lower and ('need' in claim_lower or 'breathe' in claim_lower),
-                'oxygen' in claim_lower and 'breathe' in claim_lower,
-            ]
-            
-            if any(real_indicators):
-                print(f"   🎯 FAST PATH: Known basic fact detected")
-                final_result = {
-                    'is_fake': False,
-                    'confidence': 0.95,
-                    'reasoning': "Verified basic scientific/historical fact"
-                }
-        
-        # 4. Gemini verifier (ONLY if fast-path didn't match)
+
+        # 3. Gemini verifier (fast-path claims were answered above)
         if not final_result and gemini_model:
             try:
                 print(f"🧠 Gemini: Analyzing claim against latest data...")
@@ -1261,7 +1731,8 @@ OUTPUT ONLY THIS JSON (no markdown, no explanation):
     "reasoning": "Brief reason"
 }}"""
                 
-                response = gemini_model.generate_content(prompt)
+                with stage_timer("gemini", "gemini.generate_content", model=GEMINI_MODEL_NAME, modality="text"):
+                    response = gemini_model.generate_content(prompt)
                 response_text = response.text.strip().replace('``````', '')
                 gemini_result = json.loads(response_text)
                 
@@ -1356,7 +1827,8 @@ async def check_url(request: URLCheckRequest):
         if tavily:
             try:
                 print(f"📥 Attempting Tavily extraction...")
-                tavily_result = tavily.extract(request.url)
+                with stage_timer("tavily", "tavily.extract"):
+                    tavily_result = tavily.extract(request.url)
                 
                 # Check if result is valid
                 if tavily_result and isinstance(tavily_result, dict):
@@ -1479,7 +1951,7 @@ async def check_url(request: URLCheckRequest):
         text_request = TextCheckRequest(text=extracted_text)
         
         # 7️⃣ Reuse the check_text logic
-        result = await check_text(text_request)
+        result = await asyncio.to_thread(check_text, text_request)
         
         # 8️⃣ Update analysis to mention it was from URL
         domain = urlparse(request.url).netloc
@@ -1510,17 +1982,17 @@ async def check_url(request: URLCheckRequest):
 
 
 @app.post("/api/v1/check-image")
-async def check_image(file: UploadFile = File(...)):
+def check_image(file: UploadFile = File(...)):
     """Check if image is a deepfake with Gemini backup verification"""
     if not image_detector_model:
         raise HTTPException(status_code=503, detail="Image detection model not available")
     
     try:
-        image_bytes = await file.read()
-        result = analyze_image_with_sota(image_bytes)
+        # Work on the spooled upload rather than copying it into memory
+        result = analyze_image_with_sota(file.file)
         
         # Gemini backup verification (only if predicted as FAKE)
-        gemini_check = verify_with_gemini_image(image_bytes, result["is_fake"], result["confidence"])
+        gemini_check = verify_with_gemini_image(file.file, result["is_fake"], result["confidence"])
         if gemini_check["override"]:
             result["is_fake"] = gemini_check["is_fake"]
             result["confidence"] = gemini_check["confidence"]
@@ -1543,25 +2015,122 @@ async def check_image(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def run_video_check(video_source, progress: Optional[Callable[[float], None]] = None,
+                    on_frame: Optional[Callable[[dict], None]] = None) -> dict:
+    """Full video check (SOTA model + Gemini backup) on bytes or a file object"""
+    # One decode per request: the classifier and Gemini share the cached frames
+    with open_video_context(video_source) as video:
+        frame_progress = (lambda fraction: progress(0.9 * fraction)) if progress else None
+        result = analyze_video_with_sota(video, progress=frame_progress, on_frame=on_frame)
+        if progress:
+            progress(0.9)  # last chance to stop before the Gemini call
+
+        # Gemini backup verification (only if predicted as FAKE)
+        gemini_check = verify_with_gemini_video(video, result["is_fake"], result["confidence"])
+    if gemini_check["override"]:
+        result["is_fake"] = gemini_check["is_fake"]
+        result["confidence"] = gemini_check["confidence"]
+        result["verdict"] = "REAL"
+        result["analysis"] = f"🧠 Gemini Override: {gemini_check['reasoning']}\n\n" + \
+                            f"Original Model: FAKE ({result.get('original_confidence', result['confidence']):.1%})\n" + \
+                            f"Gemini Verification: REAL ({gemini_check['confidence']:.1%})"
+    if progress:
+        progress(1.0)
+    return result
+
+
+def process_video_job(path: str, progress: Callable[[float], None]) -> dict:
+    """Background job processor: run the video check on a spooled upload"""
+    with open(path, "rb") as f:
+        result = run_video_check(f, progress)
+    return {
+        "is_fake": result["is_fake"],
+        "confidence": result["confidence"],
+        "analysis": result["analysis"],
+        "verdict": result["verdict"],
+        "details": result.get("model_details")
+    }
+
+
+@app.on_event("startup")
+async def start_video_job_queue():
+    global video_job_queue
+    if not VIDEO_JOBS_ENABLED or not video_detector_model:
+        return
+    try:
+        await init_db()
+        video_job_queue = VideoJobQueue(process_video_job)
+        await video_job_queue.start()
+        print("✅ Video job queue: READY")
+    except Exception as e:
+        video_job_queue = None
+        print(f"❌ Video job queue: FAILED - {str(e)}")
+
+
+@app.on_event("shutdown")
+async def stop_video_job_queue():
+    if video_job_queue:
+        await video_job_queue.stop()
+
+
+@app.on_event("startup")
+async def connect_rate_limiter():
+    if RATE_LIMIT_ENABLED and await rate_limiter.connect(os.getenv("REDIS_URL", "redis://localhost:6379/0")):
+        print("✅ Rate limiter: counters in Redis")
+
+
+@app.on_event("shutdown")
+async def close_rate_limiter():
+    await rate_limiter.close()
+
+
+@app.on_event("startup")
+async def preload_voice_detector():
+    if VOICE_PRELOAD:
+        print("🎤 Preloading voice detector in the background...")
+        start_voice_detector_load()
+
+
+@app.on_event("startup")
+async def start_upload_sweeper():
+    async def sweep():
+        while True:
+            try:
+                await asyncio.to_thread(video_uploads.sweep_expired)
+            except Exception as e:
+                print(f"⚠️ Upload session cleanup failed: {str(e)}")
+            await asyncio.sleep(RESUMABLE_SWEEP_INTERVAL_SECONDS)
+
+    asyncio.create_task(sweep())
+
+
 @app.post("/api/v1/check-video")
-async def check_video(file: UploadFile = File(...)):
-    """Check if video is a deepfake with Gemini backup verification"""
+async def check_video(file: UploadFile = File(...), mode: str = "sync"):
+    """
+    Check if video is a deepfake with Gemini backup verification
+
+    mode=job returns a job_id immediately (HTTP 202) and analyses the video in
+    the background; poll /api/v1/check-video/result/{job_id} for the result.
+    """
     if not video_detector_model:
         raise HTTPException(status_code=503, detail="Video detection model not available")
-    
+    if mode not in ("sync", "job"):
+        raise HTTPException(status_code=400, detail="mode must be 'sync' or 'job'")
+
+    if mode == "job":
+        if not video_job_queue:
+            raise HTTPException(status_code=503, detail="Background video jobs not available")
+        job = await video_job_queue.enqueue(file.file, file.filename)
+        return JSONResponse(status_code=202, content={
+            "job_id": job.job_id,
+            "status": job.status.value,
+            "progress": 0.0,
+            "message": "Video uploaded successfully. Processing in background.",
+            "result_url": f"/api/v1/check-video/result/{job.job_id}"
+        })
+
     try:
-        video_bytes = await file.read()
-        result = analyze_video_with_sota(video_bytes)
-        
-        # Gemini backup verification (only if predicted as FAKE)
-        gemini_check = verify_with_gemini_video(video_bytes, result["is_fake"], result["confidence"])
-        if gemini_check["override"]:
-            result["is_fake"] = gemini_check["is_fake"]
-            result["confidence"] = gemini_check["confidence"]
-            result["verdict"] = "REAL"
-            result["analysis"] = f"🧠 Gemini Override: {gemini_check['reasoning']}\n\n" + \
-                                f"Original Model: FAKE ({result.get('original_confidence', result['confidence']):.1%})\n" + \
-                                f"Gemini Verification: REAL ({gemini_check['confidence']:.1%})"
+        result = await asyncio.to_thread(run_video_check, file.file)
         
         return CheckResponse(
             is_fake=result["is_fake"],
@@ -1577,152 +2146,428 @@ async def check_video(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+class VideoCheckCancelled(Exception):
+    """Raised inside a streamed video check once the client has gone away"""
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def remove_temp_file(path: str):
+    """Delete a private temp copy, ignoring one that is already gone"""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+@app.post("/api/v1/check-video/stream")
+async def check_video_stream(request: Request, file: UploadFile = File(...)):
+    """
+    Streaming video check (text/event-stream).
+
+    Events: "frame" for each scored frame with a running aggregate and
+    provisional verdict, then "result" with the final CheckResponse (or
+    "error"). Closing the connection stops the server-side analysis.
+    """
+    if not video_detector_model:
+        raise HTTPException(status_code=503, detail="Video detection model not available")
+
+    # The form's UploadFile is closed once this handler returns, so keep a private copy
+    spooled = tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename or "")[1] or ".mp4")
+    try:
+        await asyncio.to_thread(shutil.copyfileobj, as_file(file.file), spooled)
+    except BaseException:
+        spooled.close()
+        remove_temp_file(spooled.name)
+        raise
+    spooled.close()
+
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+    cancelled = threading.Event()
+
+    def check_cancelled(_fraction: float = 0.0):
+        if cancelled.is_set():
+            raise VideoCheckCancelled("Client disconnected")
+
+    def on_frame(frame_result: dict):
+        check_cancelled()
+        loop.call_soon_threadsafe(events.put_nowait, ("frame", frame_result))
+
+    def run():
+        try:
+            with open(spooled.name, "rb") as f:
+                result = run_video_check(f, progress=check_cancelled, on_frame=on_frame)
+            loop.call_soon_threadsafe(events.put_nowait, ("result", result))
+        except VideoCheckCancelled:
+            print("⏹️ Streamed video check stopped: client disconnected")
+        except Exception as e:
+            print(f"Error analyzing video: {str(e)}")
+            loop.call_soon_threadsafe(events.put_nowait, ("error", {"detail": str(e)}))
+        finally:
+            remove_temp_file(spooled.name)
+
+    async def stream():
+        worker = asyncio.create_task(asyncio.to_thread(run))
+        fake_count = real_count = 0
+        total_prob = 0.0
+        try:
+            while True:
+                kind, payload = await events.get()
+                if kind == "frame":
+                    fake_count += payload["verdict"] == "FAKE"
+                    real_count += payload["verdict"] == "REAL"
+                    total_prob += payload["probability_fake"]
+                    is_fake, confidence = video_majority_verdict(fake_count, real_count)
+                    yield sse_event("frame", {
+                        **payload,
+                        "aggregate": {
+                            "frames_scored": fake_count + real_count,
+                            "fake_frames": fake_count,
+                            "real_frames": real_count,
+                            "average_probability_fake": total_prob / (fake_count + real_count),
+                            "provisional_verdict": "FAKE" if is_fake else "REAL",
+                            "provisional_confidence": confidence
+                        }
+                    })
+                elif kind == "result":
+                    yield sse_event("result", CheckResponse(
+                        is_fake=payload["is_fake"],
+                        confidence=payload["confidence"],
+                        analysis=payload["analysis"],
+                        verdict=payload["verdict"],
+                        details=payload.get("model_details")
+                    ).model_dump())
+                    break
+                else:
+                    yield sse_event("error", payload)
+                    break
+        finally:
+            # Runs when the client disconnects (generator cancelled) or the stream ends
+            # (the worker thread stops at its next frame/progress callback)
+            cancelled.set()
+
+    # The response owns the temp copy: the worker only starts once stream() is
+    # iterated, so a client that disconnects before that never reaches run()
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    }, background=BackgroundTask(remove_temp_file, spooled.name))
+
+
+# ============================================
+# Resumable video uploads: init -> PUT chunks -> finalize
+# ============================================
+
+def upload_http_error(e: Exception) -> HTTPException:
+    """Map resumable upload errors to HTTP responses"""
+    if isinstance(e, UploadNotFound):
+        return HTTPException(status_code=404, detail="Upload session not found")
+    if isinstance(e, UploadExpired):
+        return HTTPException(status_code=410, detail="Upload session expired")
+    if isinstance(e, UploadOffsetMismatch):
+        return HTTPException(status_code=409, detail=f"{str(e)}; resume from offset {e.expected}")
+    if isinstance(e, UploadTooLarge):
+        return HTTPException(status_code=413, detail=f"Too large. Maximum size: {e.limit // (1024 * 1024)}MB")
+    if isinstance(e, ChecksumMismatch):
+        return HTTPException(status_code=422, detail=str(e))
+    return HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/api/v1/check-video/uploads", status_code=201)
+async def create_video_upload(request: UploadInitRequest):
+    """Open a resumable upload session for a large video"""
+    try:
+        session = await asyncio.to_thread(video_uploads.create, request.filename, request.size, request.sha256)
+    except (UploadError, UploadTooLarge) as e:
+        raise upload_http_error(e)
+    return video_uploads.describe(session)
+
+
+@app.get("/api/v1/check-video/uploads/{upload_id}")
+async def get_video_upload(upload_id: str):
+    """Upload session state; clients resume from 'received' after a dropped connection"""
+    try:
+        session = await asyncio.to_thread(video_uploads.get, upload_id)
+    except UploadError as e:
+        raise upload_http_error(e)
+    return video_uploads.describe(session)
+
+
+@app.put("/api/v1/check-video/uploads/{upload_id}")
+async def put_video_upload_chunk(upload_id: str, offset: int, request: Request,
+                                 x_chunk_sha256: str = Header(...)):
+    """Store one chunk (raw request body) at the given byte offset, verified by X-Chunk-SHA256"""
+    chunk = bytearray()
+    async for part in request.stream():
+        chunk += part
+        if len(chunk) > video_uploads.max_chunk_size:
+            raise upload_http_error(UploadTooLarge(video_uploads.max_chunk_size))
+
+    try:
+        session = await asyncio.to_thread(video_uploads.write_chunk, upload_id, offset, bytes(chunk), x_chunk_sha256)
+    except (UploadError, UploadTooLarge) as e:
+        raise upload_http_error(e)
+    return video_uploads.describe(session)
+
+
+@app.post("/api/v1/check-video/uploads/{upload_id}/finalize")
+async def finalize_video_upload(upload_id: str, request: Request):
+    """
+    Verify the assembled upload and start analysis.
+
+    With background jobs enabled this returns a job_id (HTTP 202) to poll at
+    /api/v1/check-video/result/{job_id}; otherwise it analyses synchronously,
+    in a video admission slot (the middleware maps paths, and cannot tell
+    which finalize requests will run the model).
+    """
+    if not video_detector_model:
+        raise HTTPException(status_code=503, detail="Video detection model not available")
+    try:
+        path = await asyncio.to_thread(video_uploads.finalize, upload_id)
+    except UploadError as e:
+        raise upload_http_error(e)
+
+    if video_job_queue:
+        try:
+            job = await video_job_queue.enqueue_path(path)
+        except BaseException:
+            # The upload session is gone: nothing else would ever delete the assembled file
+            if os.path.exists(path):
+                os.unlink(path)
+            raise
+        return JSONResponse(status_code=202, content={
+            "job_id": job.job_id,
+            "status": job.status.value,
+            "progress": 0.0,
+            "message": "Upload complete. Processing in background.",
+            "result_url": f"/api/v1/check-video/result/{job.job_id}"
+        })
+
+    try:
+        with open(path, "rb") as f:
+            if ADMISSION_ENABLED:
+                async with admission.slot("video", request_priority(request.scope), request_deadline(request.scope)):
+                    result = await asyncio.to_thread(run_video_check, f)
+            else:
+                result = await asyncio.to_thread(run_video_check, f)
+        return CheckResponse(
+            is_fake=result["is_fake"],
+            confidence=result["confidence"],
+            analysis=result["analysis"],
+            verdict=result["verdict"],
+            details=result.get("model_details")
+        )
+    except Overloaded as e:
+        # Same answer as AdmissionMiddleware; the client re-uploads after Retry-After
+        return JSONResponse(status_code=503, content={"detail": e.detail, "reason": e.reason},
+                            headers={"Retry-After": e.retry_after_header})
+    except Exception as e:
+        print(f"Error analyzing video: {str(e)}")
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        os.unlink(path)
+
+
+@app.get("/api/v1/check-video/result/{job_id}")
+async def get_video_result(job_id: str):
+    """Status, progress and (once completed) the result of a background video job"""
+    if not video_job_queue:
+        raise HTTPException(status_code=503, detail="Background video jobs not available")
+
+    job = await video_job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return {
+        "job_id": job.job_id,
+        "status": job.status.value,
+        "progress": job.progress,
+        "attempts": job.retry_count,
+        "error_message": job.error_message,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+        "result": CheckResponse(**job.detailed_results) if job.status == JobStatus.COMPLETED else None
+    }
+
+
 @app.post("/api/v1/check-voice")
-async def check_voice(file: UploadFile = File(...)):
+def check_voice(file: UploadFile = File(...), detector: tuple = Depends(get_voice_detector)):
     """Check if audio is a deepfake using SOTA model with AI cross-verification"""
+    # Shared lazy load (with fallback support); 503 + Retry-After while it is in flight
+    model, feature_extractor = detector
+
+    # Decode straight from the spooled upload: no temp file, one pass over the bytes
     try:
-        audio_bytes = await file.read()
-        
-        # Save temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as tmp_file:
-            tmp_file.write(audio_bytes)
-            audio_path = tmp_file.name
+        with stage_timer("decode", "voice.decode") as span:
+            waveform, sr = decode_audio(as_file(file.file), target_sr=VOICE_SAMPLE_RATE)
+            span.set_attribute("audio.seconds", round(len(waveform) / sr, 3))
+    except AudioDecodeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        window_details = None
+        input_note = "4-second clip at 16 kHz"
+        window = int(VOICE_WINDOW_SECONDS * VOICE_SAMPLE_RATE)
+        hop = max(1, int(VOICE_HOP_SECONDS * VOICE_SAMPLE_RATE))
+        
+        # Voice activity: silence and background noise never reach the detector
+        speech_starts = None
+        vad_details = None
+        if VOICE_VAD_ENABLED:
+            speech = detect_speech(waveform, sr)
+            speech_starts, speech_ratios, skipped = select_speech_windows(
+                speech, len(waveform), window, hop, VOICE_MAX_WINDOWS, VOICE_VAD_MIN_WINDOW_SPEECH
+            )
+            vad_details = {
+                "speech_ratio": round(speech.ratio, 3),
+                "speech_seconds": round(speech.seconds, 2),
+                "windows_skipped": skipped
+            }
+            if speech.seconds < VOICE_MIN_SPEECH_SECONDS or not speech_starts:
+                print(f"🔇 Insufficient speech: {speech.seconds:.2f}s of {len(waveform) / sr:.2f}s")
+                return CheckResponse(
+                    is_fake=False,  # Neutral - nothing to judge
+                    confidence=0.0,
+                    analysis=f"Insufficient speech to analyze: {speech.seconds:.1f}s of speech detected "
+                             f"(at least {VOICE_MIN_SPEECH_SECONDS:.1f}s needed). "
+                             "Please upload a recording with clearly audible voice.",
+                    verdict="INSUFFICIENT_SPEECH",
+                    details={
+                        "audio_duration": f"{len(waveform) / sr:.2f}s",
+                        "vad": vad_details
+                    }
+                )
         
-        try:
-            # Lazy load voice detector (with fallback support)
-            model, feature_extractor = load_voice_detector()
-            
-            if model is None:
-                raise HTTPException(status_code=503, detail="Voice detection model not available")
+        # Handle different model types
+        if isinstance(model, str) and model == "heuristic":
+            # Heuristic analysis fallback
+            # Check audio properties for basic deepfake indicators
+            duration = len(waveform) / 16000
             
-            # Load audio
-            waveform, sr = librosa.load(audio_path, sr=16000, mono=True)
+            # Simple heuristics
+            is_fake = False
+            confidence = 0.60
+            reasoning = "Basic audio property analysis"
             
-            # Handle different model types
-            if isinstance(model, str) and model == "heuristic":
-                # Heuristic analysis fallback
-                # Check audio properties for basic deepfake indicators
-                duration = len(waveform) / 16000
-                
-                # Simple heuristics
-                is_fake = False
-                confidence = 0.60
-                reasoning = "Basic audio property analysis"
-                
-                # Check for unnatural patterns
-                if duration < 0.5:
-                    is_fake = True
-                    confidence = 0.70
-                    reasoning = "Audio too short for reliable analysis"
-                elif np.std(waveform) < 0.01:
-                    is_fake = True
-                    confidence = 0.75
-                    reasoning = "Unnaturally low variance detected"
-                else:
-                    reasoning = "No obvious artifacts detected (heuristic analysis)"
-                
-                model_prediction = is_fake
-                model_confidence = confidence
-                prob_fake = confidence if is_fake else (1 - confidence)
-                
-            elif hasattr(model, 'forward') and isinstance(model, nn.Module):
-                # Custom SOTA model
-                # Ensure 4 seconds length (64,000 samples at 16kHz)
-                target_len = 4 * 16000
-                if len(waveform) < target_len:
-                    waveform = np.pad(waveform, (0, target_len - len(waveform)), mode='constant')
-                else:
-                    waveform = waveform[:target_len]
-                
-                # Extract features
-                input_values = feature_extractor(
-                    waveform,
-                    sampling_rate=16000,
-                    return_tensors="pt"
-                ).input_values
-                
-                # Run inference
-                model.eval()
-                with torch.no_grad():
-                    logits = model(input_values)
-                    prob_fake = torch.sigmoid(logits).item()
-                
-                model_prediction = prob_fake > 0.5
-                model_confidence = prob_fake if model_prediction else (1 - prob_fake)
-                
+            # Check for unnatural patterns
+            if duration < 0.5:
+                is_fake = True
+                confidence = 0.70
+                reasoning = "Audio too short for reliable analysis"
             else:
-                # Pipeline model (transformers)
-                # Use the pipeline for classification
-                result = model(audio_path)
-                
-                # Extract prediction (emotion models output different labels)
-                # We'll use the confidence scores as proxy for authenticity
-                if isinstance(result, list) and len(result) > 0:
-                    top_result = max(result, key=lambda x: x['score'])
-                    # Lower confidence in emotion = higher likelihood of deepfake
-                    prob_fake = 1 - top_result['score']
-                    model_prediction = prob_fake > 0.5
-                    model_confidence = prob_fake if model_prediction else (1 - prob_fake)
-                else:
-                    # Fallback
-                    prob_fake = 0.5
-                    model_prediction = False
-                    model_confidence = 0.5
-            
-            # FIX: Correct label orientation - prob_fake > 0.5 means FAKE
-            is_fake = prob_fake > 0.5
-            confidence = prob_fake if is_fake else (1 - prob_fake)
+                reasoning = "No obvious artifacts detected (heuristic analysis)"
             
             model_prediction = is_fake
             model_confidence = confidence
+            prob_fake = confidence if is_fake else (1 - confidence)
             
-            # Gemini backup verification
-            gemini_check = verify_with_gemini_audio(audio_bytes, model_prediction, model_confidence)
+        elif hasattr(model, 'forward') and isinstance(model, nn.Module):
+            # Custom SOTA model: overlapping 4 s windows over the speech in the clip, one batch
+            starts, windows = frame_windows(waveform, window, hop, VOICE_MAX_WINDOWS, starts=speech_starts)
+            window_scores = classify_voice_windows(model, feature_extractor, windows)
             
-            if gemini_check.get("should_check", False):
-                final_is_fake = gemini_check["is_fake"]
-                final_confidence = gemini_check["confidence"]
-                
-                if model_prediction != final_is_fake:
-                    # Gemini override
-                    verdict = "FAKE" if final_is_fake else "REAL"
-                    analysis = f"🧠 GEMINI OVERRIDE: {gemini_check['reasoning']}\n\n"
-                    analysis += f"SOTA Model: {'FAKE' if model_prediction else 'REAL'} ({model_confidence:.1%})\n"
-                    analysis += f"Gemini Analysis: {verdict} ({final_confidence:.1%})\n\n"
-                    analysis += "🎯 Architecture: Wav2Vec2 + BiGRU + 8-head Attention (98.5M params)"
-                else:
-                    # Agreement
-                    verdict = "FAKE" if final_is_fake else "REAL"
-                    analysis = f"✅ Gemini confirms SOTA model prediction\n\n"
-                    analysis += f"Voice Analysis: {verdict} ({final_confidence:.1%})\n"
-                    analysis += f"Reasoning: {gemini_check['reasoning']}\n\n"
-                    analysis += "🎯 Model: SOTA Voice Detector (95-97% accuracy)"
+            summary = aggregate_window_scores(window_scores)
+            prob_fake = summary["score"]
+            window_details = {
+                **summary,
+                "window_seconds": VOICE_WINDOW_SECONDS,
+                "hop_seconds": VOICE_HOP_SECONDS,
+                "scores": [
+                    {
+                        "start": round(start / VOICE_SAMPLE_RATE, 2),
+                        "end": round(min(start + window, len(waveform)) / VOICE_SAMPLE_RATE, 2),
+                        "score": round(score, 4),
+                        "speech_ratio": round(speech_ratios[k], 3) if speech_starts else None
+                    }
+                    for k, (start, score) in enumerate(zip(starts, window_scores))
+                ]
+            }
+            input_note = f"{len(starts)} x 4-second window(s) at 16 kHz"
+            
+            model_prediction = prob_fake > 0.5
+            model_confidence = prob_fake if model_prediction else (1 - prob_fake)
+            
+        else:
+            # Pipeline model (transformers)
+            # Use the pipeline for classification
+            with stage_timer("inference", "voice.inference", model=VOICE_FALLBACK_MODEL_NAME, batch_size=1):
+                result = model({"raw": waveform, "sampling_rate": sr})
+            
+            # Extract prediction (emotion models output different labels)
+            # We'll use the confidence scores as proxy for authenticity
+            if isinstance(result, list) and len(result) > 0:
+                top_result = max(result, key=lambda x: x['score'])
+                # Lower confidence in emotion = higher likelihood of deepfake
+                prob_fake = 1 - top_result['score']
+                model_prediction = prob_fake > 0.5
+                model_confidence = prob_fake if model_prediction else (1 - prob_fake)
             else:
-                # No Gemini check needed
-                final_is_fake = model_prediction
-                final_confidence = model_confidence
-                verdict = "FAKE" if final_is_fake else "REAL"
-                analysis = f"Voice Analysis: {verdict} (Confidence: {final_confidence:.1%})\n\n"
-                analysis += "🎯 Architecture: Wav2Vec2 + BiGRU + Multi-Head Attention\n"
-                analysis += f"📊 Model trained on 822K samples (19 datasets)\n"
-                analysis += f"🎤 Input: 4-second clip at 16 kHz"
+                # Fallback
+                prob_fake = 0.5
+                model_prediction = False
+                model_confidence = 0.5
+        
+        # FIX: Correct label orientation - prob_fake > 0.5 means FAKE
+        is_fake = prob_fake > 0.5
+        confidence = prob_fake if is_fake else (1 - prob_fake)
+        
+        model_prediction = is_fake
+        model_confidence = confidence
+        
+        # Gemini backup verification
+        gemini_check = verify_with_gemini_audio(
+            file.file, model_prediction, model_confidence,
+            suffix=os.path.splitext(file.filename or "")[1] or ".wav"
+        )
+        
+        if gemini_check.get("should_check", False):
+            final_is_fake = gemini_check["is_fake"]
+            final_confidence = gemini_check["confidence"]
             
-            return CheckResponse(
-                is_fake=final_is_fake,
-                confidence=final_confidence,
-                analysis=analysis,
-                verdict=verdict,
-                details={
-                    "model": "koyelog/deepfake-voice-detector-sota",
-                    "architecture": "Wav2Vec2 + BiGRU + 8-head Attention",
-                    "parameters": "98.5M",
-                    "model_score": f"{prob_fake:.4f}",
-                    "audio_duration": f"{len(waveform) / 16000:.2f}s"
-                }
-            )
+            if model_prediction != final_is_fake:
+                # Gemini override
+                verdict = "FAKE" if final_is_fake else "REAL"
+                analysis = f"🧠 GEMINI OVERRIDE: {gemini_check['reasoning']}\n\n"
+                analysis += f"SOTA Model: {'FAKE' if model_prediction else 'REAL'} ({model_confidence:.1%})\n"
+                analysis += f"Gemini Analysis: {verdict} ({final_confidence:.1%})\n\n"
+                analysis += "🎯 Architecture: Wav2Vec2 + BiGRU + 8-head Attention (98.5M params)"
+            else:
+                # Agreement
+                verdict = "FAKE" if final_is_fake else "REAL"
+                analysis = f"✅ Gemini confirms SOTA model prediction\n\n"
+                analysis += f"Voice Analysis: {verdict} ({final_confidence:.1%})\n"
+                analysis += f"Reasoning: {gemini_check['reasoning']}\n\n"
+                analysis += "🎯 Model: SOTA Voice Detector (95-97% accuracy)"
+        else:
+            # No Gemini check needed
+            final_is_fake = model_prediction
+            final_confidence = model_confidence
+            verdict = "FAKE" if final_is_fake else "REAL"
+            analysis = f"Voice Analysis: {verdict} (Confidence: {final_confidence:.1%})\n\n"
+            analysis += "🎯 Architecture: Wav2Vec2 + BiGRU + Multi-Head Attention\n"
+            analysis += f"📊 Model trained on 822K samples (19 datasets)\n"
+            analysis += f"🎤 Input: {input_note}"
         
-        finally:
-            os.unlink(audio_path)
+        return CheckResponse(
+            is_fake=final_is_fake,
+            confidence=final_confidence,
+            analysis=analysis,
+            verdict=verdict,
+            details={
+                "model": "koyelog/deepfake-voice-detector-sota",
+                "architecture": "Wav2Vec2 + BiGRU + 8-head Attention",
+                "parameters": "98.5M",
+                "model_score": f"{prob_fake:.4f}",
+                "audio_duration": f"{len(waveform) / 16000:.2f}s",
+                "windows": window_details,
+                "vad": vad_details
+            }
+        )
+
     
     except Exception as e:
         print(f"Error analyzing audio: {str(e)}")
@@ -0,0 +1,108 @@
+"""
+Benchmark audio ingestion for check_voice: decode + downmix + resample to
+16 kHz mono, the old temp-file + librosa.load path vs the in-memory decoder.
+
+Usage:
+    python benchmark_audio_decode.py [clip.wav ...]
+
+Without arguments, uses the audio clips in test-data; if there are none,
+generates 30 s test clips (WAV/FLAC/OGG/MP3 at common sample rates) in a
+temp dir.
+"""
+import glob
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+from shared.media.audio import decode_audio
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".ogg", ".mp3", ".m4a")
+
+
+def make_test_clips(tmp_dir: str, seconds: int = 30):
+    """Write a stereo speech-like signal (harmonics + noise bursts) in several formats."""
+    clips = []
+    for fmt, subtype, sr in (("WAV", "PCM_16", 44100), ("FLAC", "PCM_16", 48000),
+                             ("OGG", "VORBIS", 22050), ("MP3", "MPEG_LAYER_III", 44100)):
+        t = np.arange(sr * seconds) / sr
+        pitch = 120 + 40 * np.sin(2 * np.pi * 0.5 * t)
+        voiced = sum(np.sin(2 * np.pi * k * np.cumsum(pitch) / sr) / k for k in range(1, 6))
+        envelope = (np.sin(2 * np.pi * 2 * t) > -0.3).astype(np.float64)
+        signal = 0.3 * voiced * envelope + 0.01 * np.random.default_rng(0).standard_normal(len(t))
+        stereo = np.stack([signal, 0.8 * signal], axis=1).astype(np.float32)
+        path = os.path.join(tmp_dir, f"speech_{sr}.{fmt.lower()}")
+        try:
+            sf.write(path, stereo, sr, format=fmt, subtype=subtype)
+        except Exception as e:
+            print(f"   (skipping {fmt}: {e})")
+            continue
+        clips.append(path)
+    return clips
+
+
+def load_with_librosa(path: str, data: bytes):
+    """The previous approach: spool to a temp .wav, then librosa.load(sr=16000, mono=True)."""
+    import librosa
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
+        tmp_file.write(data)
+        tmp_path = tmp_file.name
+    try:
+        return librosa.load(tmp_path, sr=16000, mono=True)
+    finally:
+        os.unlink(tmp_path)
+
+
+def bench(path: str, repeats: int = 5):
+    with open(path, "rb") as f:
+        data = f.read()
+    info = sf.info(path) if path.lower().endswith(AUDIO_EXTENSIONS[:4]) else None
+    desc = f"{info.samplerate} Hz, {info.channels} ch, {info.duration:.1f} s" if info else ""
+    print(f"\n🎤 {os.path.basename(path)} ({len(data) / 1e6:.2f} MB{', ' + desc if desc else ''})")
+
+    def timed(fn):
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = fn()
+            best = min(best, time.perf_counter() - start)
+        return best, result
+
+    try:
+        t_old, (old, _) = timed(lambda: load_with_librosa(path, data))
+        print(f"   Temp file + librosa (old): {t_old * 1000:8.1f} ms  ({len(old)} samples)")
+    except ImportError:
+        t_old, old = None, None
+        print("   Temp file + librosa (old):  librosa not installed")
+
+    # First call designs the resampling filter for this rate; later calls reuse it
+    start = time.perf_counter()
+    decode_audio(data)
+    t_cold = time.perf_counter() - start
+    t_new, (new, _) = timed(lambda: decode_audio(data))
+    print(f"   In-memory decoder (cold):  {t_cold * 1000:8.1f} ms")
+    print(f"   In-memory decoder (warm):  {t_new * 1000:8.1f} ms  ({len(new)} samples)")
+    if t_old is not None:
+        print(f"   Speedup: {t_old / t_new:.1f}x")
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 70)
+    print("⏱️  AUDIO DECODE + RESAMPLE BENCHMARK")
+    print("=" * 70)
+
+    paths = sys.argv[1:]
+    if not paths:
+        test_data = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test-data")
+        paths = sorted(p for p in glob.glob(os.path.join(test_data, "*")) if p.lower().endswith(AUDIO_EXTENSIONS))
+    if not paths:
+        print("\nNo audio clips in test-data; generating 30 s test clips...")
+        paths = make_test_clips(tempfile.mkdtemp())
+
+    for path in paths:
+        bench(path)
+    print()
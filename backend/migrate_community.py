@@ -6,7 +6,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from shared.config import settings
 from shared.database.models import Base
 from shared.database.community_models import (
@@ -14,8 +14,37 @@ from shared.database.community_models import (
     DiscussionLike, ReplyLike, UserBadge
 )
 
+def add_missing_columns(connection):
+    """Add columns introduced after the community tables were first created."""
+    columns = {column["name"] for column in inspect(connection).get_columns("user_contributions")}
+    if "previous_rank" not in columns:
+        print("\nAdding user_contributions.previous_rank...")
+        connection.execute(text("ALTER TABLE user_contributions ADD COLUMN previous_rank INTEGER"))
+
+
+def make_contributions_unique(connection):
+    """
+    Rebuild idx_user_contrib_user as a unique index, which the contribution
+    counter upserts conflict on. Older databases created it non-unique and
+    may hold several rows per user: the oldest is kept, and the next
+    reconciliation pass recounts its totals.
+    """
+    index = next(i for i in UserContribution.__table__.indexes if i.name == "idx_user_contrib_user")
+    existing = {i["name"]: i for i in inspect(connection).get_indexes("user_contributions")}
+    if existing.get(index.name, {}).get("unique"):
+        return
+    print("\nMaking user_contributions unique per user...")
+    connection.execute(text(
+        "DELETE FROM user_contributions WHERE id NOT IN "
+        "(SELECT MIN(id) FROM user_contributions GROUP BY user_id)"
+    ))
+    if index.name in existing:
+        index.drop(connection)
+    index.create(connection)
+
+
 def run_migration():
-    """Create community tables in the database."""
+    """Create community tables in the database, and bring existing ones up to date."""
     print("Creating database engine...")
     engine = create_engine(settings.database_url, echo=True)
     
@@ -28,6 +57,10 @@ def run_migration():
         ReplyLike.__table__,
         UserBadge.__table__,
     ])
+
+    with engine.begin() as connection:
+        add_missing_columns(connection)
+        make_contributions_unique(connection)
     
     print("\n✅ Community tables created successfully!")
     print("\nNew tables:")
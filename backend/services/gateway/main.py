@@ -9,28 +9,28 @@ from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
-from starlette.responses import Response
 
 from shared.config import settings
 from shared.database.session import init_db, close_db
+from shared.jobs import ContributionReconciler, LeaderboardPublisher
+from shared.media import UploadSizeLimitMiddleware
 from shared.monitoring.logging import setup_logging, logger
+from shared.monitoring.metrics import RequestMetricsMiddleware, metrics_response
+from shared.monitoring.tracing import TracingMiddleware, setup_tracing
+from shared.ratelimit import APIKeyCache, RateLimiter, RateLimitMiddleware, default_limits, load_api_key_quota
 
 # Import routers
 from .routers import auth, detection, report, trending, health, community
 
+# Per-IP and per-API-key limits; counters move to Redis at startup if it is reachable
+rate_limiter = RateLimiter(default_limits(
+    settings.rate_limit_per_minute, settings.rate_limit_per_hour, settings.rate_limit_per_day
+))
 
-# Prometheus metrics
-REQUEST_COUNT = Counter(
-    "http_requests_total",
-    "Total HTTP requests",
-    ["method", "endpoint", "status"]
-)
-REQUEST_DURATION = Histogram(
-    "http_request_duration_seconds",
-    "HTTP request duration in seconds",
-    ["method", "endpoint"]
-)
+# Repairs drift in the incrementally maintained community counters
+contribution_reconciler = ContributionReconciler()
+# Re-ranks contributors in the background; GET /community/leaderboard serves its snapshot
+leaderboard_publisher = LeaderboardPublisher()
 
 
 @asynccontextmanager
@@ -41,11 +41,18 @@ async def lifespan(app: FastAPI):
     setup_logging()
     await init_db()
     logger.info("Database initialized")
+    await contribution_reconciler.start()
+    await leaderboard_publisher.start()
+    if settings.rate_limit_enabled:
+        await rate_limiter.connect(settings.redis_url, max_connections=settings.redis_max_connections)
     
     yield
     
     # Shutdown
     logger.info("Shutting down VeriFy AI API Gateway...")
+    await leaderboard_publisher.stop()
+    await contribution_reconciler.stop()
+    await rate_limiter.close()
     await close_db()
     logger.info("Shutdown complete")
 
@@ -59,6 +66,18 @@ app = FastAPI(
     redoc_url="/redoc" if not settings.is_production else None,
     lifespan=lifespan,
 )
+app.state.leaderboard = leaderboard_publisher
+
+
+# Rate limiting, inside CORS so 429 responses stay readable by the browser
+if settings.rate_limit_enabled:
+    app.add_middleware(
+        RateLimitMiddleware,
+        limiter=rate_limiter,
+        key_lookup=APIKeyCache(load_api_key_quota, ttl_seconds=settings.api_key_cache_ttl_seconds),
+        exempt_paths=["/", "/metrics", f"/api/{settings.api_version}/health"],
+        trust_forwarded_for=settings.rate_limit_trust_forwarded_for,
+    )
 
 
 # CORS middleware
@@ -68,35 +87,44 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH"],
     allow_headers=["*"],
+    expose_headers=["Retry-After", "X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset"],
 )
 
 
-# Request timing and metrics middleware
+# Reject oversized uploads while they stream in, before they are spooled
+app.add_middleware(UploadSizeLimitMiddleware, limits={
+    f"/api/{settings.api_version}/check-image": settings.max_image_size_bytes,
+    f"/api/{settings.api_version}/check-video": settings.max_video_size_bytes,
+    f"/api/{settings.api_version}/check-voice": settings.max_audio_size_bytes,
+})
+
+
+# Prometheus request metrics, labelled by route template (not the raw path) to bound cardinality
+app.add_middleware(RequestMetricsMiddleware)
+
+
+# One server span per request; pipeline stages and DB statements nest under it
+setup_tracing(
+    "verifyai-gateway",
+    exporter=settings.tracing_exporter if settings.enable_tracing else "none",
+    sample_ratio=settings.tracing_sample_ratio,
+    endpoint=settings.otlp_traces_endpoint,
+    environment=settings.environment,
+)
+app.add_middleware(TracingMiddleware)
+
+
+# Request timing middleware
 @app.middleware("http")
-async def add_process_time_and_metrics(request: Request, call_next):
-    """Add request timing and Prometheus metrics."""
+async def add_process_time(request: Request, call_next):
+    """Add request timing header."""
     start_time = time.time()
     
     # Process request
     response = await call_next(request)
     
-    # Calculate duration
-    duration = time.time() - start_time
-    
     # Add timing header
-    response.headers["X-Process-Time"] = f"{duration:.4f}"
-    
-    # Record metrics
-    REQUEST_COUNT.labels(
-        method=request.method,
-        endpoint=request.url.path,
-        status=response.status_code
-    ).inc()
-    
-    REQUEST_DURATION.labels(
-        method=request.method,
-        endpoint=request.url.path
-    ).observe(duration)
+    response.headers["X-Process-Time"] = f"{time.time() - start_time:.4f}"
     
     return response
 
@@ -142,7 +170,7 @@ app.include_router(community.router, prefix=f"/api/{settings.api_version}", tags
 @app.get("/metrics")
 async def metrics():
     """Expose Prometheus metrics."""
-    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    return metrics_response()
 
 
 # Root endpoint
@@ -1,20 +1,24 @@
 """
 Community router - handles leaderboard, badges, and discussions.
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import case, delete, desc, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from pydantic import BaseModel
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
+from email.utils import format_datetime
 
-from ...shared.database.session import get_db
-from ...shared.database.models import User, Detection, Report, DetectionVerdict
-from ...shared.database.community_models import (
+from shared.database.session import get_db
+from shared.database.models import User
+from shared.database.contributions import XP_PER_LEVEL
+from shared.database.community_models import (
     UserContribution, Discussion, DiscussionReply, 
     DiscussionLike, ReplyLike, UserBadge
 )
-from ...shared.auth.jwt import get_current_user
+from shared.auth.jwt import get_current_user_id
+from shared.jobs.leaderboard import LeaderboardPublisher
 
 router = APIRouter(prefix="/community", tags=["community"])
 
@@ -29,6 +33,7 @@ class LeaderboardEntry(BaseModel):
     verified: int
     accuracy: int
     avatar: str
+    rank_change: int = 0
     
     class Config:
         from_attributes = True
@@ -103,6 +108,53 @@ class ReplyResponse(BaseModel):
         from_attributes = True
 
 
+# All available badges, in display order
+ALL_BADGES = [
+    {
+        "name": "Guardian Elite",
+        "description": "Verified 500+ reports with 95%+ accuracy",
+        "rarity": "Legendary",
+        "color": "text-purple-600",
+        "bgColor": "bg-purple-50 dark:bg-purple-950"
+    },
+    {
+        "name": "Truth Seeker",
+        "description": "Active for 6+ months with consistent contributions",
+        "rarity": "Epic",
+        "color": "text-yellow-600",
+        "bgColor": "bg-yellow-50 dark:bg-yellow-950"
+    },
+    {
+        "name": "Fact Champion",
+        "description": "Top 100 contributors this month",
+        "rarity": "Rare",
+        "color": "text-blue-600",
+        "bgColor": "bg-blue-50 dark:bg-blue-950"
+    },
+    {
+        "name": "Top Reporter",
+        "description": "Submitted 250+ accurate reports",
+        "rarity": "Rare",
+        "color": "text-green-600",
+        "bgColor": "bg-green-50 dark:bg-green-950"
+    },
+    {
+        "name": "Vigilant Eye",
+        "description": "First to report 50+ viral misinformation",
+        "rarity": "Uncommon",
+        "color": "text-orange-600",
+        "bgColor": "bg-orange-50 dark:bg-orange-950"
+    },
+    {
+        "name": "Community Hero",
+        "description": "Helped educate 1000+ users",
+        "rarity": "Epic",
+        "color": "text-pink-600",
+        "bgColor": "bg-pink-50 dark:bg-pink-950"
+    }
+]
+
+
 # Helper functions
 def calculate_time_ago(created_at: datetime) -> str:
     """Calculate human-readable time ago string."""
@@ -134,123 +186,123 @@ def get_user_avatar_initials(username: str, full_name: Optional[str] = None) ->
     return username[:2].upper()
 
 
-def update_user_contribution(db: Session, user_id: int):
-    """Update user contribution stats based on their activity."""
-    # Get or create contribution record
-    contrib = db.query(UserContribution).filter(
-        UserContribution.user_id == user_id
-    ).first()
-    
-    if not contrib:
-        contrib = UserContribution(user_id=user_id)
-        db.add(contrib)
-    
-    # Count user's detections and reports
-    total_detections = db.query(func.count(Detection.id)).filter(
-        Detection.user_id == user_id
-    ).scalar() or 0
-    
-    verified_reports = db.query(func.count(Report.id)).filter(
-        Report.user_id == user_id,
-        Report.verified == True
-    ).scalar() or 0
-    
-    total_reports = db.query(func.count(Report.id)).filter(
-        Report.user_id == user_id
-    ).scalar() or 0
-    
-    # Calculate accuracy
-    if total_reports > 0:
-        accuracy = int((verified_reports / total_reports) * 100)
-    else:
-        accuracy = 0
-    
-    # Calculate points (10 points per detection, 50 per verified report)
-    points = (total_detections * 10) + (verified_reports * 50)
-    
-    # Update stats
-    contrib.total_reports = total_reports
-    contrib.verified_reports = verified_reports
-    contrib.accuracy_percentage = accuracy
-    contrib.total_points = points
-    contrib.last_activity = datetime.utcnow()
-    
-    # Calculate level and XP
-    level = 1 + (points // 1000)
-    xp_current = points % 1000
-    xp_required = 1000
-    
-    contrib.level = level
-    contrib.xp_current = xp_current
-    contrib.xp_required = xp_required
-    
-    # Assign badge based on performance
-    if verified_reports >= 500 and accuracy >= 95:
-        contrib.badge_name = "Guardian Elite"
-    elif verified_reports >= 250:
-        contrib.badge_name = "Top Reporter"
-    elif total_reports >= 100:
-        contrib.badge_name = "Rising Star"
+def display_name(username: Optional[str], full_name: Optional[str]) -> str:
+    """Author name shown in threads; authors whose account was deleted are anonymous."""
+    return full_name or username or "Anonymous"
+
+
+async def toggle_like(db: AsyncSession, like_model, owner_column, owner_model, owner_id: int,
+                      user_id: int, not_found: str) -> dict:
+    """
+    Like or unlike a discussion or reply in at most three statements.
+
+    The like row is deleted if present; otherwise the owner's counter is
+    bumped (which doubles as the existence check) and the like inserted.
+    Counters change with atomic UPDATE ... RETURNING, never read-modify-write.
+    """
+    deleted = await db.execute(
+        delete(like_model).where(owner_column == owner_id, like_model.user_id == user_id)
+    )
+    if deleted.rowcount:
+        likes = (await db.execute(
+            update(owner_model)
+            .where(owner_model.id == owner_id)
+            .values(like_count=case((owner_model.like_count > 0, owner_model.like_count - 1), else_=0))
+            .returning(owner_model.like_count)
+        )).scalar_one()
+        action = "unliked"
     else:
-        contrib.badge_name = "Beginner"
+        likes = (await db.execute(
+            update(owner_model)
+            .where(owner_model.id == owner_id)
+            .values(like_count=owner_model.like_count + 1)
+            .returning(owner_model.like_count)
+        )).scalar_one_or_none()
+        if likes is None:
+            raise HTTPException(status_code=404, detail=not_found)
+        db.add(like_model(**{owner_column.key: owner_id, "user_id": user_id}))
+        try:
+            await db.flush()
+        except IntegrityError:
+            # A concurrent request from the same user liked it first
+            await db.rollback()
+            raise HTTPException(status_code=409, detail="Already liked")
+        action = "liked"
     
-    db.commit()
-    db.refresh(contrib)
+    await db.commit()
     
-    return contrib
+    return {"status": "success", "action": action, "likes": likes}
 
 
 # Endpoints
+def get_leaderboard_publisher(request: Request) -> LeaderboardPublisher:
+    """The app's leaderboard snapshot publisher (set on ``app.state`` by the gateway)."""
+    return request.app.state.leaderboard
+
+
 @router.get("/leaderboard", response_model=List[LeaderboardEntry])
 async def get_leaderboard(
+    request: Request,
+    response: Response,
     limit: int = Query(default=50, le=100),
-    db: Session = Depends(get_db)
+    publisher: LeaderboardPublisher = Depends(get_leaderboard_publisher)
 ):
-    """Get leaderboard of top contributors."""
+    """Get leaderboard of top contributors, from the latest precomputed snapshot."""
     try:
-        # Get all contributions sorted by points
-        contribs = db.query(UserContribution, User).join(
-            User, UserContribution.user_id == User.id
-        ).order_by(desc(UserContribution.total_points)).limit(limit).all()
-        
-        leaderboard = []
-        for rank, (contrib, user) in enumerate(contribs, start=1):
-            # Update rank
-            contrib.current_rank = rank
-            
-            leaderboard.append(LeaderboardEntry(
-                rank=rank,
-                user_id=user.id,
-                name=user.full_name or user.username,
-                points=contrib.total_points,
-                badge=contrib.badge_name or "Beginner",
-                verified=contrib.verified_reports,
-                accuracy=contrib.accuracy_percentage,
-                avatar=get_user_avatar_initials(user.username, user.full_name)
-            ))
-        
-        db.commit()
-        return leaderboard
+        snapshot = await publisher.get()
     except Exception as e:
         # Database not configured or error - return empty list
         print(f"Leaderboard error: {e}")
         return []
+    
+    headers = {
+        "ETag": snapshot.etag,
+        "Cache-Control": f"public, max-age={int(publisher.interval_seconds)}",
+        "Last-Modified": format_datetime(snapshot.generated_at.replace(tzinfo=timezone.utc), usegmt=True),
+    }
+    if snapshot.etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    
+    return [
+        LeaderboardEntry(
+            rank=row.rank,
+            user_id=row.user_id,
+            name=row.full_name or row.username,
+            points=row.points,
+            badge=row.badge or "Beginner",
+            verified=row.verified,
+            accuracy=row.accuracy,
+            avatar=get_user_avatar_initials(row.username, row.full_name),
+            rank_change=row.rank_change
+        )
+        for row in snapshot.rows[:limit]
+    ]
 
 
 @router.get("/stats/me", response_model=UserStats)
 async def get_my_stats(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
 ):
     """Get current user's stats."""
-    # Update contribution stats
-    contrib = update_user_contribution(db, current_user.id)
-    
-    # Calculate rank change (simplified - would need historical data for real implementation)
-    rank_change = 0  # Placeholder
+    # Counters are maintained as detections and reports are written
+    contrib = (await db.execute(
+        select(UserContribution).where(UserContribution.user_id == user_id)
+    )).scalar_one_or_none()
+    if contrib is None:
+        # No activity yet
+        contrib = UserContribution(user_id=user_id, level=1, xp_current=0, xp_required=XP_PER_LEVEL,
+                                   total_reports=0, accuracy_percentage=0, streak_days=0)
+    
+    # Places gained since the previous ranking (ranks are computed by the leaderboard job)
+    if contrib.current_rank is not None and contrib.previous_rank is not None:
+        rank_change = contrib.previous_rank - contrib.current_rank
+    else:
+        rank_change = 0
     
     return UserStats(
-        user_id=current_user.id,
+        user_id=user_id,
         level=contrib.level,
         xp_current=contrib.xp_current,
         xp_required=contrib.xp_required,
@@ -264,105 +316,47 @@ async def get_my_stats(
 
 @router.get("/badges", response_model=List[BadgeInfo])
 async def get_badges(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all available badges and user's earned status."""
     # Get user's earned badges
-    user_badges = db.query(UserBadge).filter(
-        UserBadge.user_id == current_user.id
-    ).all()
-    
-    earned_badge_names = {badge.badge_name for badge in user_badges}
+    earned_at_by_name = dict((await db.execute(
+        select(UserBadge.badge_name, UserBadge.earned_at).where(UserBadge.user_id == user_id)
+    )).all())
     
-    # Define all available badges
-    all_badges = [
-        {
-            "name": "Guardian Elite",
-            "description": "Verified 500+ reports with 95%+ accuracy",
-            "rarity": "Legendary",
-            "color": "text-purple-600",
-            "bgColor": "bg-purple-50 dark:bg-purple-950"
-        },
-        {
-            "name": "Truth Seeker",
-            "description": "Active for 6+ months with consistent contributions",
-            "rarity": "Epic",
-            "color": "text-yellow-600",
-            "bgColor": "bg-yellow-50 dark:bg-yellow-950"
-        },
-        {
-            "name": "Fact Champion",
-            "description": "Top 100 contributors this month",
-            "rarity": "Rare",
-            "color": "text-blue-600",
-            "bgColor": "bg-blue-50 dark:bg-blue-950"
-        },
-        {
-            "name": "Top Reporter",
-            "description": "Submitted 250+ accurate reports",
-            "rarity": "Rare",
-            "color": "text-green-600",
-            "bgColor": "bg-green-50 dark:bg-green-950"
-        },
-        {
-            "name": "Vigilant Eye",
-            "description": "First to report 50+ viral misinformation",
-            "rarity": "Uncommon",
-            "color": "text-orange-600",
-            "bgColor": "bg-orange-50 dark:bg-orange-950"
-        },
-        {
-            "name": "Community Hero",
-            "description": "Helped educate 1000+ users",
-            "rarity": "Epic",
-            "color": "text-pink-600",
-            "bgColor": "bg-pink-50 dark:bg-pink-950"
-        }
-    ]
-    
-    result = []
-    for badge_def in all_badges:
-        earned = badge_def["name"] in earned_badge_names
-        earned_at = None
-        
-        if earned:
-            user_badge = next((b for b in user_badges if b.badge_name == badge_def["name"]), None)
-            if user_badge:
-                earned_at = user_badge.earned_at
-        
-        result.append(BadgeInfo(
+    return [
+        BadgeInfo(
             **badge_def,
-            earned=earned,
-            earned_at=earned_at
-        ))
-    
-    return result
+            earned=badge_def["name"] in earned_at_by_name,
+            earned_at=earned_at_by_name.get(badge_def["name"])
+        )
+        for badge_def in ALL_BADGES
+    ]
 
 
 @router.get("/discussions", response_model=List[DiscussionResponse])
 async def get_discussions(
     category: Optional[str] = None,
     limit: int = Query(default=20, le=50),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get recent discussions."""
-    query = db.query(Discussion, User).join(
+    query = select(Discussion, User.username, User.full_name).join(
         User, Discussion.user_id == User.id, isouter=True
     )
     
     if category:
-        query = query.filter(Discussion.category == category)
+        query = query.where(Discussion.category == category)
     
-    discussions = query.order_by(desc(Discussion.created_at)).limit(limit).all()
+    rows = (await db.execute(query.order_by(desc(Discussion.created_at)).limit(limit))).all()
     
-    result = []
-    for disc, user in discussions:
-        result.append(DiscussionResponse(
+    return [
+        DiscussionResponse(
             id=disc.id,
             title=disc.title,
-            author=user.full_name or user.username if user else "Anonymous",
-            author_id=user.id if user else 0,
+            author=display_name(username, full_name),
+            author_id=disc.user_id or 0,
             replies=disc.reply_count,
             likes=disc.like_count,
             views=disc.view_count,
@@ -370,20 +364,24 @@ async def get_discussions(
             category=disc.category,
             tags=disc.tags,
             created_at=disc.created_at
-        ))
-    
-    return result
+        )
+        for disc, username, full_name in rows
+    ]
 
 
 @router.post("/discussions", response_model=DiscussionResponse)
 async def create_discussion(
     discussion: DiscussionCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new discussion."""
+    author = (await db.execute(select(User.username, User.full_name).where(User.id == user_id))).one_or_none()
+    if author is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    
     new_discussion = Discussion(
-        user_id=current_user.id,
+        user_id=user_id,
         title=discussion.title,
         content=discussion.content,
         category=discussion.category,
@@ -391,14 +389,13 @@ async def create_discussion(
     )
     
     db.add(new_discussion)
-    db.commit()
-    db.refresh(new_discussion)
+    await db.commit()
     
     return DiscussionResponse(
         id=new_discussion.id,
         title=new_discussion.title,
-        author=current_user.full_name or current_user.username,
-        author_id=current_user.id,
+        author=display_name(author.username, author.full_name),
+        author_id=user_id,
         replies=0,
         likes=0,
         views=0,
@@ -412,62 +409,66 @@ async def create_discussion(
 @router.get("/discussions/{discussion_id}/replies", response_model=List[ReplyResponse])
 async def get_discussion_replies(
     discussion_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get replies for a discussion."""
-    replies = db.query(DiscussionReply, User).join(
-        User, DiscussionReply.user_id == User.id, isouter=True
-    ).filter(
-        DiscussionReply.discussion_id == discussion_id
-    ).order_by(DiscussionReply.created_at).all()
-    
-    result = []
-    for reply, user in replies:
-        result.append(ReplyResponse(
+    rows = (await db.execute(
+        select(DiscussionReply, User.username, User.full_name)
+        .join(User, DiscussionReply.user_id == User.id, isouter=True)
+        .where(DiscussionReply.discussion_id == discussion_id)
+        .order_by(DiscussionReply.created_at)
+    )).all()
+    
+    return [
+        ReplyResponse(
             id=reply.id,
             discussion_id=reply.discussion_id,
-            author=user.full_name or user.username if user else "Anonymous",
-            author_id=user.id if user else 0,
+            author=display_name(username, full_name),
+            author_id=reply.user_id or 0,
             content=reply.content,
             likes=reply.like_count,
             created_at=reply.created_at
-        ))
-    
-    return result
+        )
+        for reply, username, full_name in rows
+    ]
 
 
 @router.post("/discussions/{discussion_id}/replies", response_model=ReplyResponse)
 async def create_reply(
     discussion_id: int,
     reply: ReplyCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a reply to a discussion."""
-    # Check if discussion exists
-    discussion = db.query(Discussion).filter(Discussion.id == discussion_id).first()
-    if not discussion:
+    # Bump the reply count; no row updated means the discussion does not exist
+    updated = (await db.execute(
+        update(Discussion)
+        .where(Discussion.id == discussion_id)
+        .values(reply_count=Discussion.reply_count + 1)
+        .returning(Discussion.id)
+    )).scalar_one_or_none()
+    if updated is None:
         raise HTTPException(status_code=404, detail="Discussion not found")
     
+    author = (await db.execute(select(User.username, User.full_name).where(User.id == user_id))).one_or_none()
+    if author is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    
     new_reply = DiscussionReply(
         discussion_id=discussion_id,
-        user_id=current_user.id,
+        user_id=user_id,
         content=reply.content
     )
     
     db.add(new_reply)
-    
-    # Update discussion reply count
-    discussion.reply_count += 1
-    
-    db.commit()
-    db.refresh(new_reply)
+    await db.commit()
     
     return ReplyResponse(
         id=new_reply.id,
         discussion_id=new_reply.discussion_id,
-        author=current_user.full_name or current_user.username,
-        author_id=current_user.id,
+        author=display_name(author.username, author.full_name),
+        author_id=user_id,
         content=new_reply.content,
         likes=0,
         created_at=new_reply.created_at
@@ -477,72 +478,20 @@ async def create_reply(
 @router.post("/discussions/{discussion_id}/like")
 async def like_discussion(
     discussion_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
 ):
     """Like/unlike a discussion."""
-    # Check if already liked
-    existing_like = db.query(DiscussionLike).filter(
-        DiscussionLike.discussion_id == discussion_id,
-        DiscussionLike.user_id == current_user.id
-    ).first()
-    
-    discussion = db.query(Discussion).filter(Discussion.id == discussion_id).first()
-    if not discussion:
-        raise HTTPException(status_code=404, detail="Discussion not found")
-    
-    if existing_like:
-        # Unlike
-        db.delete(existing_like)
-        discussion.like_count = max(0, discussion.like_count - 1)
-        action = "unliked"
-    else:
-        # Like
-        new_like = DiscussionLike(
-            discussion_id=discussion_id,
-            user_id=current_user.id
-        )
-        db.add(new_like)
-        discussion.like_count += 1
-        action = "liked"
-    
-    db.commit()
-    
-    return {"status": "success", "action": action, "likes": discussion.like_count}
+    return await toggle_like(db, DiscussionLike, DiscussionLike.discussion_id, Discussion, discussion_id,
+                             user_id, "Discussion not found")
 
 
 @router.post("/replies/{reply_id}/like")
 async def like_reply(
     reply_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
 ):
     """Like/unlike a reply."""
-    # Check if already liked
-    existing_like = db.query(ReplyLike).filter(
-        ReplyLike.reply_id == reply_id,
-        ReplyLike.user_id == current_user.id
-    ).first()
-    
-    reply = db.query(DiscussionReply).filter(DiscussionReply.id == reply_id).first()
-    if not reply:
-        raise HTTPException(status_code=404, detail="Reply not found")
-    
-    if existing_like:
-        # Unlike
-        db.delete(existing_like)
-        reply.like_count = max(0, reply.like_count - 1)
-        action = "unliked"
-    else:
-        # Like
-        new_like = ReplyLike(
-            reply_id=reply_id,
-            user_id=current_user.id
-        )
-        db.add(new_like)
-        reply.like_count += 1
-        action = "liked"
-    
-    db.commit()
-    
-    return {"status": "success", "action": action, "likes": reply.like_count}
+    return await toggle_like(db, ReplyLike, ReplyLike.reply_id, DiscussionReply, reply_id,
+                             user_id, "Reply not found")
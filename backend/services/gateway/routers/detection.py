@@ -157,19 +157,12 @@ async def check_image(
             detail="Invalid file type. Supported: JPG, PNG, WebP"
         )
     
-    # Check file size
-    file_content = await file.read()
-    if len(file_content) > settings.max_image_size_bytes:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail=f"File too large. Maximum size: {settings.max_image_size_mb}MB"
-        )
-    
+    # Size is enforced by UploadSizeLimitMiddleware while the body streams in
     detection_service = DetectionService(db)
     
     # Perform detection
     result = await detection_service.check_image(
-        file_content=file_content,
+        file_content=file.file,
         filename=file.filename,
         user_id=user_id
     )
@@ -199,19 +192,12 @@ async def check_video(
             detail="Invalid file type. Supported: MP4, WebM, MOV"
         )
     
-    # Check file size
-    file_content = await file.read()
-    if len(file_content) > settings.max_video_size_bytes:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail=f"File too large. Maximum size: {settings.max_video_size_mb}MB"
-        )
-    
+    # Size is enforced by UploadSizeLimitMiddleware while the body streams in
     detection_service = DetectionService(db)
     
     # Create job and enqueue for processing
     job = await detection_service.create_video_job(
-        file_content=file_content,
+        file_content=file.file,
         filename=file.filename,
         user_id=user_id
     )
@@ -277,19 +263,12 @@ async def check_voice(
             detail="Invalid file type. Supported: MP3, WAV, M4A, OGG"
         )
     
-    # Check file size
-    file_content = await file.read()
-    if len(file_content) > settings.max_audio_size_bytes:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail=f"File too large. Maximum size: {settings.max_audio_size_mb}MB"
-        )
-    
+    # Size is enforced by UploadSizeLimitMiddleware while the body streams in
     detection_service = DetectionService(db)
     
     # Perform detection
     result = await detection_service.check_voice(
-        file_content=file_content,
+        file_content=file.file,
         filename=file.filename,
         user_id=user_id
     )
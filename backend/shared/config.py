@@ -3,7 +3,8 @@ Shared configuration module for VeriFy AI backend services.
 Loads environment variables and provides typed configuration objects.
 """
 from functools import lru_cache
-from typing import List
+from typing import List, Union
+from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -26,7 +27,9 @@ class Settings(BaseSettings):
     api_host: str = "0.0.0.0"
     api_port: int = 8000
     api_version: str = "v1"
-    cors_origins: List[str] = ["http://localhost:3000"]
+    # List settings take a JSON list or a comma-separated string (the str member
+    # lets the env source skip JSON decoding; split_comma_separated splits it)
+    cors_origins: Union[List[str], str] = ["http://localhost:3000"]
 
     # Security
     jwt_secret_key: str = "dev-secret-key-change-in-production-min-32-characters-long"
@@ -67,6 +70,9 @@ class Settings(BaseSettings):
     rate_limit_per_minute: int = 60
     rate_limit_per_hour: int = 1000
     rate_limit_per_day: int = 10000
+    rate_limit_enabled: bool = True
+    rate_limit_trust_forwarded_for: bool = False  # only behind a proxy that sets X-Forwarded-For
+    api_key_cache_ttl_seconds: int = 60
 
     # File Limits
     max_text_length: int = 50000
@@ -77,11 +83,14 @@ class Settings(BaseSettings):
     # Monitoring
     enable_metrics: bool = True
     enable_tracing: bool = True
+    tracing_exporter: str = "otlp"  # otlp, console, memory or none
+    tracing_sample_ratio: float = 0.05
+    otlp_traces_endpoint: str = "http://localhost:4318/v1/traces"
     log_level: str = "INFO"
 
     # Translation
     default_language: str = "en"
-    supported_languages: List[str] = [
+    supported_languages: Union[List[str], str] = [
         "en", "hi", "bn", "ta", "te", "mr", "gu", "kn", "ml", "pa", "or", "as"
     ]
 
@@ -90,10 +99,17 @@ class Settings(BaseSettings):
     trending_min_reports: int = 5
     trending_update_interval_minutes: int = 15
 
+    # Community
+    contribution_reconcile_interval_minutes: int = 60
+    leaderboard_refresh_interval_seconds: int = 60
+    leaderboard_size: int = 100
+
     # Worker
     video_worker_concurrency: int = 4
     video_worker_timeout_seconds: int = 600
     video_worker_retry_attempts: int = 3
+    video_worker_poll_seconds: float = 2.0
+    video_job_storage_dir: str = "./video_jobs"
 
     # Feature Flags
     enable_crowdsourced_reports: bool = True
@@ -101,6 +117,13 @@ class Settings(BaseSettings):
     enable_real_time_search: bool = True
     enable_explanation_generation: bool = True
 
+    @field_validator("cors_origins", "supported_languages", mode="before")
+    @classmethod
+    def split_comma_separated(cls, value):
+        if isinstance(value, str) and not value.lstrip().startswith("["):
+            return [item.strip() for item in value.split(",") if item.strip()]
+        return value
+
     @property
     def is_production(self) -> bool:
         return self.environment == "production"
@@ -24,6 +24,7 @@ class UserContribution(Base):
     # Points and ranking
     total_points = Column(Integer, default=0, nullable=False)
     current_rank = Column(Integer, nullable=True, index=True)
+    previous_rank = Column(Integer, nullable=True)  # Rank before the last change, for rank movement
     
     # Badges
     badge_name = Column(String(100), nullable=True)
@@ -44,7 +45,8 @@ class UserContribution(Base):
     __table_args__ = (
         Index("idx_user_contrib_rank", "current_rank"),
         Index("idx_user_contrib_points", "total_points"),
-        Index("idx_user_contrib_user", "user_id"),
+        # One row per user; contribution upserts conflict on it
+        Index("idx_user_contrib_user", "user_id", unique=True),
     )
 
 
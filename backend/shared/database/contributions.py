@@ -0,0 +1,254 @@
+"""
+Incrementally maintained community contribution counters.
+
+Every ``user_contributions`` row holds running totals (reports, verified
+reports, points) and the values derived from them (accuracy, level, XP,
+badge), so reading a user's stats is a single indexed row fetch.
+
+The totals are adjusted in the same transaction as the write that changes
+them: ORM inserts, deletes and updates of ``Detection`` and ``Report`` rows
+fire mapper events that upsert the owner's row with relative increments,
+so concurrent writers never overwrite each other's counts. Bulk and Core
+statements bypass mapper events; ``reconcile_contributions``, run
+periodically by ``shared.jobs.ContributionReconciler``, recounts from the
+source tables and repairs any drift.
+
+Ranks are not maintained per write: ``rank_contributions`` recomputes them
+in one statement for the leaderboard snapshot job
+(``shared.jobs.LeaderboardPublisher``).
+"""
+import logging
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import Integer, and_, bindparam, case, desc, event, func, insert, literal, select, union_all, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import attributes
+
+from .community_models import UserContribution
+from .models import Detection, Report
+
+logger = logging.getLogger(__name__)
+
+POINTS_PER_DETECTION = 10
+POINTS_PER_VERIFIED_REPORT = 50
+XP_PER_LEVEL = 1000
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE
+_UPSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+contributions = UserContribution.__table__
+
+
+def contribution_values(total_reports, verified_reports, total_points) -> Dict:
+    """
+    Counter columns and the columns derived from them, as SQL expressions.
+
+    The counters may be columns, expressions on columns or bound parameters,
+    so the same rules apply to upserts, bulk repairs and fresh rows.
+    """
+    accuracy = case((total_reports > 0, verified_reports * 100 // total_reports), else_=0)
+    return {
+        "total_reports": total_reports,
+        "verified_reports": verified_reports,
+        "total_points": total_points,
+        "accuracy_percentage": accuracy,
+        "level": 1 + total_points // XP_PER_LEVEL,
+        "xp_current": total_points % XP_PER_LEVEL,
+        "xp_required": XP_PER_LEVEL,
+        "badge_name": case(
+            (and_(verified_reports >= 500, accuracy >= 95), "Guardian Elite"),
+            (verified_reports >= 250, "Top Reporter"),
+            (total_reports >= 100, "Rising Star"),
+            else_="Beginner",
+        ),
+    }
+
+
+def apply_contribution(connection, user_id: Optional[int], detections: int = 0, reports: int = 0,
+                       verified: int = 0):
+    """
+    Add (or with negative deltas, remove) activity to a user's counters.
+
+    Args:
+        connection: Connection of the transaction making the change
+        user_id: Owner of the activity; anonymous activity is not counted
+        detections: Change in the user's detections
+        reports: Change in the user's reports
+        verified: Change in the user's verified reports
+    """
+    if user_id is None or not (detections or reports or verified):
+        return
+    points = detections * POINTS_PER_DETECTION + verified * POINTS_PER_VERIFIED_REPORT
+    now = datetime.utcnow()
+    c = contributions.c
+    incremented = {
+        **contribution_values(c.total_reports + reports, c.verified_reports + verified, c.total_points + points),
+        "last_activity": now,
+        "updated_at": now,
+    }
+
+    upsert = _UPSERTS.get(connection.dialect.name)
+    if upsert is None:
+        # Without ON CONFLICT the unique index on user_id still rejects a duplicate row
+        result = connection.execute(update(contributions).where(c.user_id == user_id).values(incremented))
+        if result.rowcount:
+            return
+        upsert = insert
+
+    stmt = upsert(contributions).values(
+        user_id=user_id,
+        streak_days=0,
+        last_activity=now,
+        created_at=now,
+        updated_at=now,
+        **contribution_values(literal(max(0, reports)), literal(max(0, verified)), literal(max(0, points))),
+    )
+    if upsert is not insert:
+        stmt = stmt.on_conflict_do_update(index_elements=[c.user_id], set_=incremented)
+    connection.execute(stmt)
+
+
+def _changed(target, key: str):
+    """(previous, current) value of an attribute changed in this flush."""
+    history = attributes.get_history(target, key)
+    current = getattr(target, key)
+    return (history.deleted[0] if history.deleted else current), current
+
+
+@event.listens_for(Detection, "after_insert")
+def _detection_inserted(mapper, connection, target):
+    apply_contribution(connection, target.user_id, detections=1)
+
+
+@event.listens_for(Detection, "after_delete")
+def _detection_deleted(mapper, connection, target):
+    apply_contribution(connection, target.user_id, detections=-1)
+
+
+@event.listens_for(Detection, "after_update")
+def _detection_updated(mapper, connection, target):
+    old_user, new_user = _changed(target, "user_id")
+    if old_user != new_user:
+        apply_contribution(connection, old_user, detections=-1)
+        apply_contribution(connection, new_user, detections=1)
+
+
+@event.listens_for(Report, "after_insert")
+def _report_inserted(mapper, connection, target):
+    apply_contribution(connection, target.user_id, reports=1, verified=int(bool(target.verified)))
+
+
+@event.listens_for(Report, "after_delete")
+def _report_deleted(mapper, connection, target):
+    apply_contribution(connection, target.user_id, reports=-1, verified=-int(bool(target.verified)))
+
+
+@event.listens_for(Report, "after_update")
+def _report_updated(mapper, connection, target):
+    old_user, new_user = _changed(target, "user_id")
+    was_verified, is_verified = (int(bool(value)) for value in _changed(target, "verified"))
+    if old_user == new_user:
+        apply_contribution(connection, new_user, verified=is_verified - was_verified)
+    else:
+        apply_contribution(connection, old_user, reports=-1, verified=-was_verified)
+        apply_contribution(connection, new_user, reports=1, verified=is_verified)
+
+
+async def reconcile_contributions(db: AsyncSession) -> int:
+    """
+    Recount every user's activity and repair counters that drifted.
+
+    One read of the counters, two grouped scans of the source tables, and
+    one batched write for rows that differ (or are missing). The caller
+    commits.
+
+    Safe against concurrent writers and other reconciling workers: the
+    counters are read before the scans, and a repair only applies while the
+    row still holds the values read (compare-and-set), so an increment
+    committed in between is never overwritten; a row created meanwhile
+    makes the insert of a missing row a no-op. Either way the next pass
+    repairs whatever is still off.
+
+    Returns:
+        Number of users whose counters were rewritten (attempted, with
+        drivers that cannot count the rows of a batched statement)
+    """
+    c = contributions.c
+    current = {
+        row.user_id: (row.total_reports, row.verified_reports, row.total_points)
+        for row in await db.execute(select(c.user_id, c.total_reports, c.verified_reports, c.total_points))
+    }
+    activity = union_all(
+        select(Detection.user_id.label("user_id"), literal(1).label("detections"),
+               literal(0).label("reports"), literal(0).label("verified"))
+        .where(Detection.user_id.isnot(None)),
+        select(Report.user_id, literal(0), literal(1), case((Report.verified, 1), else_=0))
+        .where(Report.user_id.isnot(None)),
+    ).subquery()
+    expected = {
+        row.user_id: (row.reports, row.verified,
+                      row.detections * POINTS_PER_DETECTION + row.verified * POINTS_PER_VERIFIED_REPORT)
+        for row in await db.execute(
+            select(activity.c.user_id, func.sum(activity.c.detections).label("detections"),
+                   func.sum(activity.c.reports).label("reports"), func.sum(activity.c.verified).label("verified"))
+            .group_by(activity.c.user_id)
+        )
+    }
+
+    repairs, missing = [], []
+    for user_id in expected.keys() | current.keys():
+        counts = expected.get(user_id, (0, 0, 0))
+        if current.get(user_id) != counts:
+            params = {"uid": user_id, "n_reports": counts[0], "n_verified": counts[1], "n_points": counts[2]}
+            if user_id in current:
+                old = current[user_id]
+                repairs.append({**params, "o_reports": old[0], "o_verified": old[1], "o_points": old[2]})
+            else:
+                missing.append(params)
+
+    dialect = db.get_bind().dialect
+    values = contribution_values(*(bindparam(name, type_=Integer) for name in ("n_reports", "n_verified", "n_points")))
+    repaired = created = 0
+    if repairs:
+        result = await db.execute(
+            update(contributions)
+            .where(c.user_id == bindparam("uid"), c.total_reports == bindparam("o_reports"),
+                   c.verified_reports == bindparam("o_verified"), c.total_points == bindparam("o_points"))
+            .values(values),
+            repairs,
+        )
+        repaired = result.rowcount if dialect.supports_sane_multi_rowcount else len(repairs)
+    if missing:
+        upsert = _UPSERTS.get(dialect.name, insert)
+        stmt = upsert(contributions).values(user_id=bindparam("uid"), streak_days=0, **values)
+        if upsert is not insert:
+            stmt = stmt.on_conflict_do_nothing(index_elements=[c.user_id])
+        result = await db.execute(stmt, missing)
+        created = result.rowcount if dialect.supports_sane_multi_rowcount else len(missing)
+    if repaired or created:
+        logger.warning(f"Reconciled contribution counters: {repaired} repaired, {created} created")
+    return repaired + created
+
+
+async def rank_contributions(db: AsyncSession) -> int:
+    """
+    Rank every user by points and record the rank each one moved from.
+
+    One UPDATE driven by a ``rank()`` window, touching only rows whose rank
+    changed, so it is idempotent: running it again (or from every gateway
+    worker) keeps ``previous_rank`` at the rank before the last movement.
+    The caller commits.
+
+    Returns:
+        Number of users whose rank changed
+    """
+    c = contributions.c
+    ranked = select(c.id, func.rank().over(order_by=desc(c.total_points)).label("rank")).subquery()
+    result = await db.execute(
+        update(contributions)
+        .where(c.id == ranked.c.id, c.current_rank.is_distinct_from(ranked.c.rank))
+        .values(previous_rank=c.current_rank, current_rank=ranked.c.rank)
+    )
+    return result.rowcount
@@ -67,7 +67,7 @@ class User(Base):
     
     # Relationships
     detections = relationship("Detection", back_populates="user", cascade="all, delete-orphan")
-    reports = relationship("Report", back_populates="user", cascade="all, delete-orphan")
+    reports = relationship("Report", foreign_keys="Report.user_id", back_populates="user", cascade="all, delete-orphan")
     
     __table_args__ = (
         Index("idx_user_email", "email"),
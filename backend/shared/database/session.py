@@ -6,18 +6,32 @@ from typing import AsyncGenerator
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.pool import NullPool
 from shared.config import settings
+from shared.database import contributions  # noqa: F401 - keeps contribution counters in step with writes
+from shared.monitoring.metrics import instrument_engine
 
 
+# Pool sizing only applies to server databases; SQLite engines reject it
+if settings.environment == "test":
+    engine_options = {"poolclass": NullPool}
+elif settings.database_url.startswith("sqlite"):
+    engine_options = {}
+else:
+    engine_options = {
+        "pool_size": settings.database_pool_size,
+        "max_overflow": settings.database_max_overflow,
+    }
+
 # Create async engine
 engine = create_async_engine(
     settings.database_url,
     echo=not settings.is_production,
-    pool_size=settings.database_pool_size,
-    max_overflow=settings.database_max_overflow,
     pool_pre_ping=True,
-    poolclass=NullPool if settings.environment == "test" else None,
+    **engine_options,
 )
 
+# Statement timings feed the "db" pipeline stage histogram
+instrument_engine(engine)
+
 # Create session factory
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -0,0 +1,9 @@
+"""
+Fact-checking lookup tables for VeriFy AI.
+"""
+from .claim_rules import ClaimRuleEngine
+from .domains import DomainReputationIndex
+from .patterns import MultiPatternMatcher, SourcePatterns
+from .reloadable import ReloadableResource
+
+__all__ = ["ClaimRuleEngine", "DomainReputationIndex", "MultiPatternMatcher", "SourcePatterns", "ReloadableResource"]
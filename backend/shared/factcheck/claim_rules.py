@@ -0,0 +1,61 @@
+"""
+Keyword-conjunction rules for answering well-known claims without web lookups.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from .patterns import MultiPatternMatcher
+
+
+class ClaimRuleEngine:
+    """
+    Matches a claim against known-claim rules via a keyword inverted index.
+
+    Each rule in the data file has ``all`` keywords that must all appear and
+    an optional ``any`` list of which at least one must appear. Keywords are
+    substring-matched against the lowercased claim, like the original
+    hard-coded checks. Rules are expanded into plain conjunctions and each
+    conjunction is indexed under a single anchor keyword (its longest one),
+    so a claim is only tested against rules whose anchor it contains. The
+    first matching rule in file order wins.
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        self.version = data.get("version")
+        self.rules: List[Dict[str, Any]] = []
+        # anchor keyword -> [(rule index, full keyword conjunction)]
+        self.index: Dict[str, List[Tuple[int, frozenset]]] = {}
+
+        for position, raw in enumerate(data.get("rules", [])):
+            verdict = raw["verdict"].upper()
+            if verdict not in ("FAKE", "REAL"):
+                raise ValueError(f"Rule {raw.get('id', position)}: verdict must be FAKE or REAL")
+            required = [k.lower() for k in raw.get("all", [])]
+            alternatives = [k.lower() for k in raw.get("any", [])]
+            if not required and not alternatives:
+                raise ValueError(f"Rule {raw.get('id', position)}: needs 'all' or 'any' keywords")
+
+            rule_idx = len(self.rules)
+            self.rules.append({
+                "id": raw.get("id", f"rule-{position}"),
+                "is_fake": verdict == "FAKE",
+                "confidence": float(raw.get("confidence", 0.95)),
+                "reasoning": raw.get("reasoning", ""),
+            })
+
+            for alternative in alternatives or [None]:
+                clause = frozenset(required + ([alternative] if alternative else []))
+                anchor = max(clause, key=lambda k: (len(k), k))
+                self.index.setdefault(anchor, []).append((rule_idx, clause))
+
+        keywords = {k for clauses in self.index.values() for _, clause in clauses for k in clause}
+        self.matcher = MultiPatternMatcher({"keywords": keywords})
+
+    def match(self, claim: str) -> Optional[Dict[str, Any]]:
+        """Return the first rule matching the claim, or None."""
+        present = self.matcher.find(claim.lower())
+        best: Optional[int] = None
+        for keyword in present:
+            for rule_idx, clause in self.index.get(keyword, ()):
+                if (best is None or rule_idx < best) and clause <= present:
+                    best = rule_idx
+        return self.rules[best] if best is not None else None
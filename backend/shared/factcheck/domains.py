@@ -0,0 +1,82 @@
+"""
+Registrable-domain reputation index for web source credibility.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+FACT_CHECKER = "fact_checker"
+AUTHORITY = "authority"
+
+
+class DomainReputationIndex:
+    """
+    Source reputation keyed by registrable domain (eTLD+1) and path prefix.
+
+    Lookups are a handful of dict probes per URL regardless of table size:
+    the host is split into labels, the longest known public suffix is found
+    by probing suffixes from longest to shortest, and the registrable domain
+    is looked up in a hash map. Per-domain path prefixes (e.g. a news site's
+    fact-check section) override the domain-wide category.
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        self.version = data.get("version")
+        self.public_suffixes = frozenset(s.lower() for s in data.get("public_suffixes", []))
+        self.max_suffix_labels = max((s.count(".") + 1 for s in self.public_suffixes), default=1)
+        self.suffix_categories: Dict[str, str] = {
+            suffix.lower(): category
+            for suffix, category in data.get("suffix_categories", {}).items()
+        }
+
+        self.domains: Dict[str, Optional[str]] = {}
+        self.path_rules: Dict[str, List[Tuple[str, str]]] = {}
+        for domain, entry in data.get("domains", {}).items():
+            domain = domain.lower()
+            self.domains[domain] = entry.get("category")
+            paths = entry.get("paths", {})
+            if paths:
+                # Longest prefix first so the most specific section wins
+                self.path_rules[domain] = sorted(
+                    ((prefix.rstrip("/").lower(), category) for prefix, category in paths.items()),
+                    key=lambda rule: len(rule[0]),
+                    reverse=True,
+                )
+
+    def split_host(self, host: str) -> Tuple[str, str]:
+        """Return ``(registrable_domain, public_suffix)`` for a hostname."""
+        labels = host.strip(".").split(".")
+        for n in range(min(self.max_suffix_labels, len(labels) - 1), 1, -1):
+            suffix = ".".join(labels[-n:])
+            if suffix in self.public_suffixes:
+                return ".".join(labels[-n - 1:]), suffix
+        suffix = labels[-1]
+        return ".".join(labels[-2:]), suffix
+
+    def lookup(self, url: str) -> Optional[str]:
+        """Return the reputation category of a URL, or None if unknown."""
+        parts = urlsplit(url if "//" in url else f"//{url}")
+        host = parts.hostname
+        if not host:
+            return None
+
+        domain, suffix = self.split_host(host)
+
+        rules = self.path_rules.get(domain)
+        if rules:
+            path = parts.path.lower()
+            for prefix, category in rules:
+                if path == prefix or path.startswith(prefix + "/"):
+                    return category
+
+        category = self.domains.get(domain)
+        if category:
+            return category
+        return self.suffix_categories.get(suffix)
+
+    def classify_url(self, url: str) -> Dict[str, bool]:
+        """Flag a URL as a fact-checker and/or authoritative source."""
+        category = self.lookup(url)
+        return {
+            "is_fact_checker": category == FACT_CHECKER,
+            "is_authoritative": category in (FACT_CHECKER, AUTHORITY),
+        }
@@ -0,0 +1,109 @@
+"""
+Single-pass multi-pattern matching for web source scoring.
+"""
+import re
+from typing import Any, Dict, FrozenSet, Iterable, List
+
+try:
+    import ahocorasick
+except ImportError:  # pragma: no cover - optional C extension
+    ahocorasick = None
+
+
+def _trie_regex(patterns: Iterable[str]) -> str:
+    """Build a regex alternation factored as a prefix trie."""
+    trie: Dict[str, dict] = {}
+    for pattern in patterns:
+        node = trie
+        for ch in pattern:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        terminal = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not terminal:
+            return branches[0]
+        body = "(?:" + "|".join(branches) + ")"
+        return body + "?" if terminal else body
+
+    return build(trie)
+
+
+class MultiPatternMatcher:
+    """
+    Counts which literal patterns of each group occur in a text, in one pass.
+
+    Semantics match ``sum(1 for p in group if p in text)``: every distinct
+    pattern counts once, and overlapping matches are all found. Uses an
+    Aho-Corasick automaton when ``pyahocorasick`` is installed, otherwise a
+    trie-compiled lookahead regex.
+    """
+
+    def __init__(self, groups: Dict[str, Iterable[str]]):
+        self.groups: Dict[str, FrozenSet[str]] = {
+            name: frozenset(p.lower() for p in patterns if p)
+            for name, patterns in groups.items()
+        }
+
+        # pattern -> indices of the groups it belongs to
+        self._pattern_groups: Dict[str, List[int]] = {}
+        self._group_names = list(self.groups)
+        for idx, name in enumerate(self._group_names):
+            for pattern in self.groups[name]:
+                self._pattern_groups.setdefault(pattern, []).append(idx)
+
+        patterns = sorted(self._pattern_groups, key=len, reverse=True)
+
+        if ahocorasick is not None and patterns:
+            self._automaton = ahocorasick.Automaton()
+            for pattern in patterns:
+                self._automaton.add_word(pattern, pattern)
+            self._automaton.make_automaton()
+            self._regex = None
+        else:
+            self._automaton = None
+            # A lookahead at every position finds overlapping matches; the trie
+            # alternation returns the longest pattern starting there, and any
+            # shorter pattern starting at the same position is one of its prefixes.
+            self._regex = re.compile("(?=(" + _trie_regex(patterns) + "))") if patterns else None
+            self._prefixes: Dict[str, List[str]] = {
+                p: [q for q in patterns if len(q) <= len(p) and p.startswith(q)]
+                for p in patterns
+            }
+
+    def find(self, text: str) -> FrozenSet[str]:
+        """Return the distinct patterns present in ``text`` (already lowercased)."""
+        if self._automaton is not None:
+            return frozenset(value for _, value in self._automaton.iter(text))
+        if self._regex is None:
+            return frozenset()
+        found = set()
+        for match in self._regex.finditer(text):
+            found.update(self._prefixes[match.group(1)])
+        return frozenset(found)
+
+    def count(self, text: str) -> Dict[str, int]:
+        """Return the number of distinct patterns from each group present in ``text``."""
+        counts = [0] * len(self._group_names)
+        for pattern in self.find(text):
+            for idx in self._pattern_groups[pattern]:
+                counts[idx] += 1
+        return dict(zip(self._group_names, counts))
+
+
+class SourcePatterns:
+    """Compiled debunk/support phrase sets used to score web sources."""
+
+    def __init__(self, data: Dict[str, Any]):
+        self.version = data.get("version")
+        self.text_matcher = MultiPatternMatcher({
+            "debunk": data.get("debunk_patterns", []),
+            "support": data.get("support_patterns", []),
+        })
+
+    def score_text(self, text: str) -> Dict[str, int]:
+        """Count debunk and support phrases in lowercased source text."""
+        return self.text_matcher.count(text)
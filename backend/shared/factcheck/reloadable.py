@@ -0,0 +1,82 @@
+"""
+Hot-reloadable data files for fact-checking lookup tables.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Generic, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ReloadableResource(Generic[T]):
+    """
+    Value compiled from a JSON data file and rebuilt when the file changes.
+
+    The file's mtime is checked at most once every ``check_interval`` seconds,
+    so ``get()`` is a cheap attribute read on the hot path. If a rebuild fails
+    (bad JSON, invalid rule), the previously compiled value is kept.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        builder: Callable[[Dict[str, Any]], T],
+        check_interval: float = 5.0,
+    ):
+        self.path = path
+        self.builder = builder
+        self.check_interval = check_interval
+        self._value: Optional[T] = None
+        self._mtime: Optional[float] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> T:
+        """Return the compiled value, reloading it if the file has changed."""
+        now = time.monotonic()
+        if self._value is None or now >= self._next_check:
+            with self._lock:
+                if self._value is None or now >= self._next_check:
+                    self._next_check = now + self.check_interval
+                    self._maybe_reload()
+        return self._value
+
+    def reload(self) -> T:
+        """Force a rebuild from disk regardless of mtime."""
+        with self._lock:
+            self._mtime = None
+            self._next_check = time.monotonic() + self.check_interval
+            self._maybe_reload()
+        return self._value
+
+    def _maybe_reload(self) -> None:
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError as e:
+            if self._value is None:
+                raise
+            logger.warning(f"Data file {self.path} unavailable, keeping loaded copy: {e}")
+            return
+
+        if mtime == self._mtime:
+            return
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            value = self.builder(data)
+        except Exception as e:
+            if self._value is None:
+                raise
+            logger.error(f"Failed to reload {self.path}, keeping previous version: {e}")
+            self._mtime = mtime
+            return
+
+        self._value = value
+        self._mtime = mtime
+        logger.info(f"Loaded {self.path} (version {data.get('version', 'unknown')})")
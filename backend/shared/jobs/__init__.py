@@ -0,0 +1,15 @@
+"""
+Background job processing for VeriFy AI.
+"""
+from .contributions import ContributionReconciler
+from .leaderboard import LeaderboardPublisher, LeaderboardRow, LeaderboardSnapshot
+from .video_queue import JobCancelled, VideoJobQueue
+
+__all__ = [
+    "ContributionReconciler",
+    "JobCancelled",
+    "LeaderboardPublisher",
+    "LeaderboardRow",
+    "LeaderboardSnapshot",
+    "VideoJobQueue",
+]
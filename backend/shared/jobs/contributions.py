@@ -0,0 +1,57 @@
+"""
+Periodic repair of the incrementally maintained contribution counters.
+"""
+import asyncio
+import logging
+from typing import Optional
+
+from shared.config import settings
+from shared.database.contributions import reconcile_contributions
+from shared.database.session import get_db_context
+
+logger = logging.getLogger(__name__)
+
+
+class ContributionReconciler:
+    """
+    Background task recounting contributions every ``interval_seconds``.
+
+    The first pass runs at start, which also backfills counters for
+    activity recorded before they were maintained.
+
+    Args:
+        interval_seconds: Time between passes
+
+    Usage:
+        reconciler = ContributionReconciler()
+        await reconciler.start()
+        ...
+        await reconciler.stop()
+    """
+
+    def __init__(self, interval_seconds: Optional[float] = None):
+        self.interval_seconds = interval_seconds or settings.contribution_reconcile_interval_minutes * 60
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run(), name="contribution-reconciler")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def run_once(self) -> int:
+        async with get_db_context() as db:
+            return await reconcile_contributions(db)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Contribution reconciliation failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
@@ -0,0 +1,138 @@
+"""
+Precomputed leaderboard snapshots.
+
+A background task re-ranks contributors every few seconds and loads the top
+of the ranking into an immutable, versioned snapshot held in memory. The
+leaderboard endpoint serves that snapshot, so a public GET never touches
+the database, let alone writes to it, and clients revalidate with the
+snapshot version as ETag.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import select
+
+from shared.config import settings
+from shared.database.community_models import UserContribution
+from shared.database.contributions import rank_contributions
+from shared.database.models import User
+from shared.database.session import get_db_context
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class LeaderboardRow:
+    rank: int
+    previous_rank: Optional[int]
+    user_id: int
+    username: str
+    full_name: Optional[str]
+    points: int
+    badge: Optional[str]
+    verified: int
+    accuracy: int
+
+    @property
+    def rank_change(self) -> int:
+        """Places gained since the previous ranking (negative when dropped)."""
+        return self.previous_rank - self.rank if self.previous_rank is not None else 0
+
+
+@dataclass(frozen=True)
+class LeaderboardSnapshot:
+    """
+    The ranked top contributors at ``generated_at``.
+
+    ``version`` is a hash of the rows, so every worker publishing the same
+    ranking publishes the same version, and it changes only when the
+    leaderboard does.
+    """
+    version: str
+    generated_at: datetime
+    rows: Tuple[LeaderboardRow, ...]
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.version}"'
+
+
+class LeaderboardPublisher:
+    """
+    Background task ranking contributors and publishing leaderboard snapshots.
+
+    Args:
+        interval_seconds: Time between re-rankings
+        size: Entries kept in the snapshot (the endpoint's maximum limit)
+
+    Usage:
+        publisher = LeaderboardPublisher()
+        await publisher.start()
+        snapshot = await publisher.get()
+        ...
+        await publisher.stop()
+    """
+
+    def __init__(self, interval_seconds: Optional[float] = None, size: Optional[int] = None):
+        self.interval_seconds = interval_seconds or settings.leaderboard_refresh_interval_seconds
+        self.size = size or settings.leaderboard_size
+        self.snapshot: Optional[LeaderboardSnapshot] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run(), name="leaderboard-publisher")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def get(self) -> LeaderboardSnapshot:
+        """The current snapshot, loading one (read-only) if none has been published yet."""
+        if self.snapshot is None:
+            await self.load()
+        return self.snapshot
+
+    async def run_once(self) -> LeaderboardSnapshot:
+        """Re-rank contributors, then publish the new top of the ranking."""
+        async with get_db_context() as db:
+            moved = await rank_contributions(db)
+        if moved:
+            logger.info(f"Leaderboard re-ranked: {moved} user(s) moved")
+        return await self.load()
+
+    async def load(self) -> LeaderboardSnapshot:
+        """Publish the stored ranking as a snapshot, without re-ranking."""
+        async with get_db_context() as db:
+            result = await db.execute(
+                select(UserContribution.current_rank, UserContribution.previous_rank, UserContribution.user_id,
+                       User.username, User.full_name, UserContribution.total_points, UserContribution.badge_name,
+                       UserContribution.verified_reports, UserContribution.accuracy_percentage)
+                .join(User, UserContribution.user_id == User.id)
+                .where(UserContribution.current_rank.isnot(None))
+                .order_by(UserContribution.current_rank, UserContribution.user_id)
+                .limit(self.size)
+            )
+            rows = tuple(LeaderboardRow(*row) for row in result)
+
+        digest = hashlib.sha256(json.dumps([list(vars(row).values()) for row in rows]).encode())
+        version = digest.hexdigest()[:16]
+        if self.snapshot is None or self.snapshot.version != version:
+            self.snapshot = LeaderboardSnapshot(version, datetime.utcnow(), rows)
+        return self.snapshot
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Leaderboard refresh failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
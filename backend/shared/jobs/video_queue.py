@@ -0,0 +1,295 @@
+"""
+Database-backed background queue for video analysis jobs.
+
+Uploads are spooled to disk and recorded as ``VideoJob`` rows; a pool of
+asyncio workers in the same process claims pending rows, runs the analysis
+in a thread and writes progress and results back. Because the queue *is*
+the ``video_jobs`` table, jobs survive restarts and no external broker is
+needed: on start, rows left in PROCESSING by a crashed process are put back
+to PENDING.
+"""
+import asyncio
+import logging
+import os
+import shutil
+import threading
+import uuid
+from datetime import datetime
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Union
+
+from sqlalchemy import select, update
+
+from shared.config import settings
+from shared.database.models import DetectionVerdict, JobStatus, VideoJob
+from shared.database.session import get_db_context
+from shared.media.uploads import as_file
+
+logger = logging.getLogger(__name__)
+
+# processor(file_path, progress) -> result dict with "is_fake", "confidence",
+# "analysis" and any extra keys; progress(fraction) may raise JobCancelled
+VideoProcessor = Callable[[str, Callable[[float], None]], Dict[str, Any]]
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job when it has been timed out."""
+
+
+class VideoJobQueue:
+    """
+    Persistent video job queue with a local worker pool.
+
+    Args:
+        processor: Blocking analysis function, run in a worker thread
+        storage_dir: Directory the uploaded videos are spooled to
+        concurrency: Number of jobs processed at once
+        timeout_seconds: Per-attempt time limit
+        max_attempts: Attempts before a job is marked FAILED
+        poll_interval: Seconds between checks for jobs enqueued elsewhere
+
+    Usage:
+        queue = VideoJobQueue(analyze_file)
+        await queue.start()
+        job = await queue.enqueue(video_bytes, "clip.mp4")
+        ...
+        await queue.stop()
+    """
+
+    # Progress is written back at most once per this fraction of the job
+    PROGRESS_STEP = 0.05
+
+    def __init__(
+        self,
+        processor: VideoProcessor,
+        storage_dir: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        timeout_seconds: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+    ):
+        self.processor = processor
+        self.storage_dir = storage_dir or settings.video_job_storage_dir
+        self.concurrency = concurrency or settings.video_worker_concurrency
+        self.timeout_seconds = timeout_seconds or settings.video_worker_timeout_seconds
+        self.max_attempts = max_attempts or settings.video_worker_retry_attempts
+        self.poll_interval = poll_interval or settings.video_worker_poll_seconds
+        self._workers: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self):
+        """Recover interrupted jobs and start the worker pool."""
+        os.makedirs(self.storage_dir, exist_ok=True)
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+
+        async with get_db_context() as db:
+            result = await db.execute(
+                update(VideoJob)
+                .where(VideoJob.status == JobStatus.PROCESSING)
+                .values(status=JobStatus.PENDING, started_at=None)
+            )
+        if result.rowcount:
+            logger.warning(f"Re-queued {result.rowcount} video job(s) interrupted by a restart")
+
+        self._workers = [
+            asyncio.create_task(self._worker(n), name=f"video-worker-{n}")
+            for n in range(self.concurrency)
+        ]
+        logger.info(f"Video job queue started with {self.concurrency} worker(s)")
+
+    async def stop(self):
+        """Stop the workers; jobs still running are re-queued on next start."""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def enqueue(self, data: Union[bytes, BinaryIO], filename: Optional[str] = None,
+                      user_id: Optional[int] = None) -> VideoJob:
+        """Spool an upload (bytes or a file object) to disk and record a PENDING job for it."""
+        job_id = uuid.uuid4().hex
+        suffix = os.path.splitext(filename or "")[1] or ".mp4"
+        path = os.path.abspath(os.path.join(self.storage_dir, f"{job_id}{suffix}"))
+        try:
+            size = await asyncio.to_thread(_write_file, path, data)
+            return await self._record(job_id, path, size, user_id)
+        except BaseException:
+            _remove_file(path)
+            raise
+
+    async def enqueue_path(self, source_path: str, user_id: Optional[int] = None) -> VideoJob:
+        """
+        Take ownership of a file already on disk (moved into storage) and queue it.
+
+        If queueing fails the file is removed, wherever it is by then.
+        """
+        job_id = uuid.uuid4().hex
+        suffix = os.path.splitext(source_path)[1] or ".mp4"
+        path = os.path.abspath(os.path.join(self.storage_dir, f"{job_id}{suffix}"))
+        try:
+            await asyncio.to_thread(shutil.move, source_path, path)
+            return await self._record(job_id, path, os.path.getsize(path), user_id)
+        except BaseException:
+            _remove_file(source_path)
+            _remove_file(path)
+            raise
+
+    async def _record(self, job_id: str, path: str, size: int, user_id: Optional[int]) -> VideoJob:
+        job = VideoJob(
+            job_id=job_id,
+            user_id=user_id,
+            status=JobStatus.PENDING,
+            progress=0.0,
+            file_url=f"file://{path}",
+            file_size_bytes=size,
+        )
+        async with get_db_context() as db:
+            db.add(job)
+
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    async def get(self, job_id: str) -> Optional[VideoJob]:
+        async with get_db_context() as db:
+            result = await db.execute(select(VideoJob).where(VideoJob.job_id == job_id))
+            return result.scalar_one_or_none()
+
+    async def _worker(self, n: int):
+        while True:
+            # Cleared before claiming so an enqueue during the claim is not missed
+            self._wakeup.clear()
+            try:
+                job = await self._claim_next()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"video-worker-{n}: failed to claim a job: {e}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run(job)
+
+    async def _claim_next(self) -> Optional[VideoJob]:
+        """Atomically move the oldest PENDING job to PROCESSING."""
+        async with get_db_context() as db:
+            candidates = await db.execute(
+                select(VideoJob.id)
+                .where(VideoJob.status == JobStatus.PENDING)
+                .order_by(VideoJob.created_at, VideoJob.id)
+                .limit(self.concurrency)
+            )
+            for job_pk in candidates.scalars():
+                # The status guard makes the claim safe against other workers/processes
+                claimed = await db.execute(
+                    update(VideoJob)
+                    .where(VideoJob.id == job_pk, VideoJob.status == JobStatus.PENDING)
+                    .values(status=JobStatus.PROCESSING, started_at=datetime.utcnow(), progress=0.0)
+                )
+                if claimed.rowcount == 1:
+                    await db.commit()
+                    job = await db.get(VideoJob, job_pk)
+                    await db.refresh(job)
+                    return job
+        return None
+
+    async def _run(self, job: VideoJob):
+        path = job.file_url[len("file://"):]
+        cancelled = threading.Event()
+        last_reported = [0.0]
+
+        def report_progress(fraction: float):
+            # Called from the worker thread
+            if cancelled.is_set():
+                raise JobCancelled(f"Job exceeded {self.timeout_seconds}s")
+            fraction = max(0.0, min(1.0, fraction))
+            if fraction - last_reported[0] >= self.PROGRESS_STEP or fraction >= 1.0:
+                last_reported[0] = fraction
+                asyncio.run_coroutine_threadsafe(self._set_progress(job.job_id, fraction), self._loop)
+
+        try:
+            result = await asyncio.wait_for(
+                asyncio.to_thread(self.processor, path, report_progress),
+                timeout=self.timeout_seconds,
+            )
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        except Exception as e:
+            # A timed-out thread cannot be killed; it stops at its next progress call
+            cancelled.set()
+            error = f"Timed out after {self.timeout_seconds}s" if isinstance(e, asyncio.TimeoutError) else str(e)
+            await self._fail(job, error)
+            return
+
+        await self._complete(job, result, path)
+
+    async def _set_progress(self, job_id: str, fraction: float):
+        async with get_db_context() as db:
+            await db.execute(
+                update(VideoJob)
+                .where(VideoJob.job_id == job_id, VideoJob.status == JobStatus.PROCESSING)
+                .values(progress=round(fraction, 3))
+            )
+
+    async def _complete(self, job: VideoJob, result: Dict[str, Any], path: str):
+        verdict = DetectionVerdict.FAKE if result.get("is_fake") else DetectionVerdict.REAL
+        async with get_db_context() as db:
+            await db.execute(
+                update(VideoJob)
+                .where(VideoJob.id == job.id)
+                .values(
+                    status=JobStatus.COMPLETED,
+                    progress=1.0,
+                    verdict=verdict,
+                    confidence=result.get("confidence"),
+                    explanation=result.get("analysis"),
+                    detailed_results=result,
+                    error_message=None,
+                    completed_at=datetime.utcnow(),
+                )
+            )
+        await asyncio.to_thread(_remove_file, path)
+        logger.info(f"Video job {job.job_id} completed: {verdict.value}")
+
+    async def _fail(self, job: VideoJob, error: str):
+        attempts = job.retry_count + 1
+        final = attempts >= self.max_attempts
+        async with get_db_context() as db:
+            await db.execute(
+                update(VideoJob)
+                .where(VideoJob.id == job.id)
+                .values(
+                    status=JobStatus.FAILED if final else JobStatus.PENDING,
+                    retry_count=attempts,
+                    error_message=error,
+                    started_at=job.started_at if final else None,
+                    completed_at=datetime.utcnow() if final else None,
+                )
+            )
+        if final:
+            await asyncio.to_thread(_remove_file, job.file_url[len("file://"):])
+            logger.error(f"Video job {job.job_id} failed after {attempts} attempt(s): {error}")
+        else:
+            logger.warning(f"Video job {job.job_id} attempt {attempts} failed, retrying: {error}")
+            self._wakeup.set()
+
+
+def _write_file(path: str, data: Union[bytes, BinaryIO]) -> int:
+    with open(path, "wb") as f:
+        shutil.copyfileobj(as_file(data), f)
+        return f.tell()
+
+
+def _remove_file(path: str):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
@@ -0,0 +1,65 @@
+"""
+Media decoding utilities for VeriFy AI.
+"""
+from .audio import (
+    AudioDecodeError,
+    SpeechActivity,
+    aggregate_window_scores,
+    decode_audio,
+    detect_speech,
+    frame_windows,
+    plan_windows,
+    resample,
+    select_speech_windows,
+)
+from .parallel import DecodedBatch, available_workers, decode_segments_parallel, plan_segments
+from .remote_files import LocalFileService, RemoteFileRegistry, content_digest
+from .resumable import (
+    ChecksumMismatch,
+    ResumableUploadStore,
+    UploadError,
+    UploadExpired,
+    UploadIncomplete,
+    UploadNotFound,
+    UploadOffsetMismatch,
+)
+from .sampling import NearDuplicateFilter, SequentialFrameTest, coarse_to_fine_order, frame_dhash, gap_midpoint
+from .uploads import UploadSizeLimitMiddleware, UploadTooLarge, as_file
+from .video import PacketIndex, VideoContext, VideoReader
+
+__all__ = [
+    "AudioDecodeError",
+    "ChecksumMismatch",
+    "DecodedBatch",
+    "LocalFileService",
+    "NearDuplicateFilter",
+    "PacketIndex",
+    "RemoteFileRegistry",
+    "ResumableUploadStore",
+    "SequentialFrameTest",
+    "SpeechActivity",
+    "UploadError",
+    "UploadExpired",
+    "UploadIncomplete",
+    "UploadNotFound",
+    "UploadOffsetMismatch",
+    "UploadSizeLimitMiddleware",
+    "UploadTooLarge",
+    "VideoContext",
+    "VideoReader",
+    "aggregate_window_scores",
+    "as_file",
+    "available_workers",
+    "coarse_to_fine_order",
+    "content_digest",
+    "decode_audio",
+    "decode_segments_parallel",
+    "detect_speech",
+    "frame_dhash",
+    "frame_windows",
+    "gap_midpoint",
+    "plan_segments",
+    "plan_windows",
+    "resample",
+    "select_speech_windows",
+]
@@ -0,0 +1,298 @@
+"""
+Audio ingestion and windowing for the voice detector.
+
+Uploads are decoded straight from memory: soundfile (libsndfile) for
+WAV/FLAC/OGG, and FFmpeg through PyAV for MP3/M4A and anything else, with
+the ``ffmpeg`` command line over pipes as a last resort. Channels are
+downmixed with a single matrix-vector product and the result is resampled
+to the model rate with soxr when it is installed, otherwise by a polyphase
+filter whose FIR taps are designed once per rate pair.
+
+The detector takes fixed 4-second inputs. Rather than judging a clip on its
+first 4 seconds, the whole waveform is cut into overlapping windows that
+are scored together in one batch and aggregated into a single clip score.
+A cheap voice activity detector runs first, so windows that are silence or
+background noise never reach the model.
+"""
+import functools
+import io
+import logging
+import math
+import subprocess
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from scipy.signal import firwin, get_window, resample_poly
+
+try:
+    import soundfile as sf
+except ImportError:  # pragma: no cover - optional dependency
+    sf = None
+
+try:
+    import av
+except ImportError:  # pragma: no cover - optional dependency
+    av = None
+
+try:
+    import soxr
+except ImportError:  # pragma: no cover - optional dependency
+    soxr = None
+
+logger = logging.getLogger(__name__)
+
+AudioInput = Union[bytes, bytearray, memoryview, BinaryIO]
+
+
+class AudioDecodeError(ValueError):
+    """None of the decoders could read the input as audio."""
+
+
+@functools.lru_cache(maxsize=32)
+def _polyphase_filter(up: int, down: int) -> np.ndarray:
+    """Low-pass FIR taps for ``up``/``down`` resampling (scipy's default design)."""
+    max_rate = max(up, down)
+    taps = firwin(2 * 10 * max_rate + 1, 1.0 / max_rate, window=("kaiser", 5.0))
+    taps = taps.astype(np.float32)
+    taps.flags.writeable = False
+    return taps
+
+
+def resample(waveform: np.ndarray, source_sr: int, target_sr: int) -> np.ndarray:
+    """Resample a mono float32 waveform: soxr if available, else cached-filter polyphase."""
+    if source_sr == target_sr:
+        return waveform
+    if soxr is not None:
+        return soxr.resample(waveform, source_sr, target_sr, quality="HQ").astype(np.float32, copy=False)
+    g = math.gcd(source_sr, target_sr)
+    up, down = target_sr // g, source_sr // g
+    # resample_poly copies the taps before scaling them, so the cached array stays intact
+    return resample_poly(waveform, up, down, window=_polyphase_filter(up, down)).astype(np.float32, copy=False)
+
+
+def _downmix(samples: np.ndarray, channel_axis: int) -> np.ndarray:
+    channels = samples.shape[channel_axis]
+    if channels == 1:
+        return samples.reshape(-1)
+    # A matrix-vector product is ~15x faster than mean() over a short channel axis
+    weights = np.full(channels, 1.0 / channels, dtype=np.float32)
+    return samples @ weights if channel_axis == 1 else weights @ samples
+
+
+def _read_soundfile(data: BinaryIO) -> Tuple[np.ndarray, int]:
+    samples, sr = sf.read(data, dtype="float32", always_2d=True)
+    return _downmix(samples, 1), sr
+
+
+def _read_pyav(data: BinaryIO) -> Tuple[np.ndarray, int]:
+    container = av.open(data, mode="r")
+    try:
+        if not container.streams.audio:
+            raise AudioDecodeError("No audio stream found")
+        stream = container.streams.audio[0]
+        # Planar float output: each frame is a (channels, samples) array
+        converter = av.AudioResampler(format="fltp")
+        chunks = []
+        sr = stream.rate
+        for frame in container.decode(stream):
+            for converted in converter.resample(frame):
+                chunks.append(converted.to_ndarray())
+                sr = converted.sample_rate
+        for converted in converter.resample(None):
+            chunks.append(converted.to_ndarray())
+    finally:
+        container.close()
+    if not chunks:
+        raise AudioDecodeError("Audio stream is empty")
+    return _downmix(np.concatenate(chunks, axis=1), 0), sr
+
+
+def _read_ffmpeg_pipe(data: bytes, target_sr: int) -> Tuple[np.ndarray, int]:
+    result = subprocess.run(
+        ["ffmpeg", "-nostdin", "-loglevel", "error", "-i", "pipe:0",
+         "-f", "f32le", "-ac", "1", "-ar", str(target_sr), "pipe:1"],
+        input=data, capture_output=True, check=True,
+    )
+    return np.frombuffer(result.stdout, dtype=np.float32), target_sr
+
+
+def decode_audio(source: AudioInput, target_sr: int = 16000) -> Tuple[np.ndarray, int]:
+    """
+    Decode an in-memory upload to a mono float32 waveform at ``target_sr``.
+
+    Args:
+        source: Encoded audio as bytes or a seekable file object
+        target_sr: Output sample rate
+
+    Returns:
+        (waveform, target_sr), the same shape as ``librosa.load(..., mono=True)``
+
+    Raises:
+        AudioDecodeError: if no decoder can read the input
+    """
+    fileobj = io.BytesIO(source) if isinstance(source, (bytes, bytearray, memoryview)) else source
+    errors = []
+
+    for name, reader, available in (("soundfile", _read_soundfile, sf is not None),
+                                    ("pyav", _read_pyav, av is not None)):
+        if not available:
+            continue
+        fileobj.seek(0)
+        try:
+            waveform, sr = reader(fileobj)
+        except Exception as e:
+            errors.append(f"{name}: {e}")
+            continue
+        if len(waveform) == 0:
+            errors.append(f"{name}: no samples decoded")
+            continue
+        return resample(waveform, sr, target_sr), target_sr
+
+    fileobj.seek(0)
+    try:
+        waveform, sr = _read_ffmpeg_pipe(fileobj.read(), target_sr)
+        if len(waveform):
+            return waveform, sr
+        errors.append("ffmpeg: no samples decoded")
+    except (OSError, subprocess.CalledProcessError) as e:
+        errors.append(f"ffmpeg: {e}")
+
+    logger.warning(f"Could not decode audio upload: {'; '.join(errors)}")
+    raise AudioDecodeError("Unsupported or corrupt audio file")
+
+
+def plan_windows(num_samples: int, window: int, hop: int, max_windows: int) -> List[int]:
+    """
+    Start offsets of the windows covering a clip of ``num_samples`` samples.
+
+    Windows advance by ``hop`` and the last one is aligned to the end of the
+    clip so the tail is always covered. When more than ``max_windows`` would
+    be needed, that many windows are spread evenly over the clip instead.
+    """
+    if num_samples <= window:
+        return [0]
+    last = num_samples - window
+    count = math.ceil(last / hop) + 1
+    if count <= max_windows:
+        return sorted({min(k * hop, last) for k in range(count)})
+    return sorted({int(round(s)) for s in np.linspace(0, last, max(1, max_windows))})
+
+
+def frame_windows(waveform: np.ndarray, window: int, hop: int, max_windows: int,
+                  starts: Optional[Sequence[int]] = None) -> Tuple[List[int], np.ndarray]:
+    """
+    Cut a mono waveform into overlapping windows.
+
+    Args:
+        waveform: 1-D float waveform
+        window: Window length in samples
+        hop: Distance between window starts in samples
+        max_windows: Upper bound on the number of windows
+        starts: Explicit start offsets (e.g. from ``select_speech_windows``)
+            instead of the regular plan
+
+    Returns:
+        (start offsets, ``(n, window)`` float32 array); clips shorter than
+        one window are zero-padded to a single window
+    """
+    waveform = np.asarray(waveform, dtype=np.float32)
+    if len(waveform) < window:
+        waveform = np.pad(waveform, (0, window - len(waveform)), mode="constant")
+    if starts is None:
+        starts = plan_windows(len(waveform), window, hop, max_windows)
+    starts = list(starts)
+    view = np.lib.stride_tricks.sliding_window_view(waveform, window)
+    return starts, np.ascontiguousarray(view[starts])
+
+
+@dataclass
+class SpeechActivity:
+    """Per-frame speech decisions for a waveform (see ``detect_speech``)."""
+    active: np.ndarray
+    frame_length: int
+    sample_rate: int
+
+    @property
+    def ratio(self) -> float:
+        return float(self.active.mean()) if len(self.active) else 0.0
+
+    @property
+    def seconds(self) -> float:
+        return float(self.active.sum()) * self.frame_length / self.sample_rate
+
+    def window_ratios(self, starts: Sequence[int], window: int) -> np.ndarray:
+        """Fraction of speech frames inside each window."""
+        counts = np.concatenate([[0], np.cumsum(self.active, dtype=np.int64)])
+        first = np.minimum(np.asarray(starts) // self.frame_length, len(self.active))
+        last = np.minimum((np.asarray(starts) + window) // self.frame_length, len(self.active))
+        frames = np.maximum(last - first, 1)
+        return (counts[last] - counts[first]) / frames
+
+
+def detect_speech(waveform: np.ndarray, sample_rate: int, frame_seconds: float = 0.03,
+                  floor_db: float = -50.0, dynamic_range_db: float = 40.0,
+                  max_flatness: float = 0.5, min_band_ratio: float = 0.2) -> SpeechActivity:
+    """
+    Energy + spectral voice activity detection on non-overlapping frames.
+
+    A frame counts as speech when it is loud enough (above ``floor_db`` dBFS
+    and within ``dynamic_range_db`` of the loudest frame), not noise-like
+    (spectral flatness below ``max_flatness``; white noise is ~0.56) and has
+    at least ``min_band_ratio`` of its energy in the 300-3400 Hz speech band
+    (which rejects hum and rumble). One FFT over all frames, no model.
+    """
+    frame_length = max(1, int(sample_rate * frame_seconds))
+    count = len(waveform) // frame_length
+    if count == 0:
+        return SpeechActivity(np.zeros(0, dtype=bool), frame_length, sample_rate)
+    frames = np.asarray(waveform[:count * frame_length], dtype=np.float32).reshape(count, frame_length)
+
+    energy_db = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+    loud = energy_db > max(floor_db, energy_db.max() - dynamic_range_db)
+
+    power = np.abs(np.fft.rfft(frames * get_window("hann", frame_length).astype(np.float32), axis=1)) ** 2 + 1e-12
+    flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+    freqs = np.fft.rfftfreq(frame_length, 1.0 / sample_rate)
+    band = (freqs >= 300) & (freqs <= 3400)
+    band_ratio = power[:, band].sum(axis=1) / power.sum(axis=1)
+
+    return SpeechActivity(loud & (flatness < max_flatness) & (band_ratio >= min_band_ratio),
+                          frame_length, sample_rate)
+
+
+def select_speech_windows(speech: SpeechActivity, num_samples: int, window: int, hop: int,
+                          max_windows: int, min_speech_ratio: float) -> Tuple[List[int], List[float], int]:
+    """
+    Plan windows over the clip and drop those with too little speech.
+
+    The ``max_windows`` cap is applied after filtering, spread evenly over
+    the windows that remain, so silent stretches do not use up the budget.
+
+    Returns:
+        (start offsets, their speech ratios, number of windows skipped as silent)
+    """
+    starts = plan_windows(max(num_samples, window), window, hop, max_windows=num_samples)
+    ratios = speech.window_ratios(starts, window)
+    kept = [k for k, ratio in enumerate(ratios) if ratio >= min_speech_ratio]
+    skipped = len(starts) - len(kept)
+    if len(kept) > max_windows:
+        kept = sorted({kept[int(round(i))] for i in np.linspace(0, len(kept) - 1, max_windows)})
+    return [starts[k] for k in kept], [float(ratios[k]) for k in kept], skipped
+
+
+def aggregate_window_scores(scores: Sequence[float], threshold: float = 0.5) -> Dict:
+    """
+    Combine per-window fake probabilities into a clip-level summary.
+
+    ``score`` (the mean) drives the verdict; ``max`` and ``fake_ratio``
+    show whether a fake-looking stretch is confined to part of the clip.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    return {
+        "score": float(scores.mean()),
+        "max": float(scores.max()),
+        "min": float(scores.min()),
+        "fake_ratio": float((scores > threshold).mean()),
+        "windows": int(len(scores)),
+    }
@@ -0,0 +1,200 @@
+"""
+Parallel segment decoding for long videos.
+
+The sampled frame indices are split into contiguous time segments, and each
+segment is decoded and preprocessed (resize + normalize to a CHW float32
+tensor) by a worker process. Workers write their tensors straight into one
+shared-memory block laid out as the final ``(N, 3, H, W)`` batch, so the
+parent can hand it to a single batched inference call without copying or
+pickling pixel data. Given the parent's reader, each worker also receives
+the slice of its packet index covering the segment, and seeks straight to
+it instead of demuxing the whole file.
+"""
+import logging
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import get_all_start_methods, get_context, shared_memory
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+if TYPE_CHECKING:
+    from .video import PacketIndex, VideoReader
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_workers = 0
+
+
+def available_workers() -> int:
+    """CPU cores this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # pragma: no cover - not available on macOS/Windows
+        return os.cpu_count() or 1
+
+
+def get_executor(max_workers: int) -> ProcessPoolExecutor:
+    """
+    Shared process pool.
+
+    Workers are never forked from the caller, whose threads (event loop,
+    thread pools, decoder and inference threads) may hold locks a forked
+    child would inherit locked. They fork from a "forkserver" process that
+    only imports this module, or are spawned where that is unavailable.
+    Both re-import the ``__main__`` module in each worker, so a server
+    loading models at import time must be started through an importer such
+    as uvicorn, not run as a script.
+    """
+    global _executor, _executor_workers
+    if _executor is None or _executor_workers < max_workers:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        if "forkserver" in get_all_start_methods():
+            context = get_context("forkserver")
+            context.set_forkserver_preload([__name__])
+        else:
+            context = get_context("spawn")
+        _executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+        _executor_workers = max_workers
+    return _executor
+
+
+def plan_segments(indices: Sequence[int], fps: float, max_workers: int,
+                  segment_seconds: float = 30.0) -> List[List[int]]:
+    """
+    Split sorted frame indices into contiguous segments.
+
+    One segment per ``segment_seconds`` of the sampled span, capped by the
+    worker count and the number of indices, with indices divided evenly.
+    """
+    indices = sorted(set(indices))
+    if not indices:
+        return []
+    span_seconds = (indices[-1] - indices[0] + 1) / (fps or 30.0)
+    count = max(1, min(max_workers, len(indices), math.ceil(span_seconds / segment_seconds)))
+    bounds = np.linspace(0, len(indices), count + 1).round().astype(int)
+    return [indices[bounds[k]:bounds[k + 1]] for k in range(count) if bounds[k + 1] > bounds[k]]
+
+
+def preprocess_frame(frame: np.ndarray, size: Tuple[int, int], mean: Sequence[float],
+                     std: Sequence[float]) -> np.ndarray:
+    """
+    RGB uint8 frame -> normalized CHW float32, matching torchvision's
+    ``Resize(size) -> ToTensor() -> Normalize(mean, std)`` on PIL images.
+    """
+    height, width = size
+    resized = Image.fromarray(frame).resize((width, height), Image.BILINEAR)
+    tensor = np.asarray(resized, dtype=np.float32) / 255.0
+    tensor = (tensor - np.asarray(mean, dtype=np.float32)) / np.asarray(std, dtype=np.float32)
+    return np.ascontiguousarray(tensor.transpose(2, 0, 1))
+
+
+def _decode_segment(path: str, targets: List[Tuple[int, int]], shm_name: str, shape: Tuple[int, ...],
+                    size: Tuple[int, int], mean: Sequence[float], std: Sequence[float],
+                    index: Optional["PacketIndex"] = None) -> Dict:
+    """Worker: decode one segment and write its tensors into the shared batch."""
+    from .sampling import frame_dhash
+    from .video import VideoReader
+
+    slots = dict(targets)
+    hashes = {}
+    with open(path, "rb") as f, VideoReader(f, index=index) as reader:
+        frames = reader.read_frames(slots)
+        decoded = reader.frames_decoded
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        batch = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+        for idx, frame in frames.items():
+            batch[slots[idx]] = preprocess_frame(frame, size, mean, std)
+            hashes[idx] = frame_dhash(frame)
+        del batch  # release the buffer export before closing
+    finally:
+        shm.close()
+    return {"hashes": hashes, "frames_decoded": decoded}
+
+
+@dataclass
+class DecodedBatch:
+    """
+    Preprocessed frames in shared memory.
+
+    ``tensors[k]`` is the frame at ``indices[k]``; ``present[k]`` is False
+    for frames the decoder could not read. Call ``close`` (or use as a
+    context manager) once inference is done to free the shared block.
+    """
+    indices: List[int]
+    tensors: np.ndarray
+    present: np.ndarray
+    hashes: Dict[int, int]
+    frames_decoded: int
+    segments: int
+    _shm: shared_memory.SharedMemory
+
+    def close(self):
+        self.tensors = None
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self) -> "DecodedBatch":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return None
+
+
+def decode_segments_parallel(path: str, indices: Sequence[int], fps: float, size: Tuple[int, int],
+                             mean: Sequence[float], std: Sequence[float], max_workers: Optional[int] = None,
+                             segment_seconds: float = 30.0, reader: Optional["VideoReader"] = None) -> DecodedBatch:
+    """
+    Decode and preprocess frames of the video at ``path`` across worker processes.
+
+    Args:
+        path: Video file on disk (workers open it independently)
+        indices: Frame indices to decode
+        fps: Frame rate, used to size segments by duration
+        size: Model input (height, width)
+        mean, std: Per-channel normalization
+        max_workers: Process cap (defaults to the available cores)
+        segment_seconds: Target duration of one segment
+        reader: Reader already open on the video, whose packet index the
+            workers reuse (without one, each worker indexes the whole file)
+
+    Returns:
+        DecodedBatch over a shared ``(N, 3, H, W)`` float32 block
+    """
+    indices = sorted(set(indices))
+    max_workers = max_workers or available_workers()
+    segments = plan_segments(indices, fps, max_workers, segment_seconds)
+    slot_of = {idx: slot for slot, idx in enumerate(indices)}
+
+    shape = (len(indices), 3, size[0], size[1])
+    shm = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * 4))
+    try:
+        executor = get_executor(max_workers)
+        futures = [
+            executor.submit(_decode_segment, path, [(idx, slot_of[idx]) for idx in segment],
+                            shm.name, shape, size, tuple(mean), tuple(std),
+                            reader.packet_index(segment) if reader is not None else None)
+            for segment in segments
+        ]
+        hashes = {}
+        frames_decoded = 0
+        for future in futures:
+            result = future.result()
+            hashes.update(result["hashes"])
+            frames_decoded += result["frames_decoded"]
+    except Exception:
+        shm.close()
+        shm.unlink()
+        raise
+
+    present = np.array([idx in hashes for idx in indices], dtype=bool)
+    tensors = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+    return DecodedBatch(indices, tensors, present, hashes, frames_decoded, len(segments), shm)
@@ -0,0 +1,225 @@
+"""
+Content-addressed registry of files uploaded to a provider's file API.
+
+Forwarded voice notes reach us many times with identical bytes. Instead of
+re-uploading each copy to Gemini, uploads are keyed by the SHA-256 of their
+content and the provider's file handle is reused until shortly before the
+provider expires it (Gemini keeps files for 48 hours). Concurrent requests
+for the same content share one upload.
+
+``LocalFileService`` mimics the ``google.generativeai`` file functions
+(``upload_file``/``get_file``/``delete_file``) in memory, so the registry
+can be exercised offline.
+"""
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, BinaryIO, Callable, Dict, Optional, Tuple, Union
+
+from .uploads import as_file
+
+logger = logging.getLogger(__name__)
+
+
+def content_digest(data: Union[bytes, BinaryIO]) -> str:
+    """SHA-256 hex digest of bytes or a seekable file object (read in blocks)."""
+    digest = hashlib.sha256()
+    fileobj = as_file(data)
+    for block in iter(lambda: fileobj.read(1024 * 1024), b""):
+        digest.update(block)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def _expiry_timestamp(handle: Any) -> Optional[float]:
+    expiration = getattr(handle, "expiration_time", None)
+    if isinstance(expiration, datetime):
+        if expiration.tzinfo is None:
+            expiration = expiration.replace(tzinfo=timezone.utc)
+        return expiration.timestamp()
+    return None
+
+
+def _failed(handle: Any) -> bool:
+    # Gemini reports an enum (File.State.FAILED); the local stand-in a string
+    state = getattr(handle, "state", None)
+    return getattr(state, "name", state) == "FAILED"
+
+
+class RemoteFileRegistry:
+    """
+    Upload-once cache of provider file handles keyed by content hash.
+
+    Args:
+        client: Object with ``upload_file(path, mime_type=None)`` returning a
+            handle (``google.generativeai`` itself, or ``LocalFileService``)
+        expiry_margin_seconds: Stop reusing a handle this long before the
+            provider expires it, so it cannot lapse mid-request
+        default_ttl_seconds: Lifetime assumed when a handle has no
+            ``expiration_time``
+        max_entries: Handles kept; least recently used are dropped first
+        clock: Time source (seconds since the epoch)
+
+    Usage:
+        registry = RemoteFileRegistry(genai)
+        handle, reused = registry.get_or_upload(upload.file, suffix=".mp3")
+        ...
+        registry.invalidate(handle)  # if the provider rejects the handle
+    """
+
+    def __init__(self, client: Any, expiry_margin_seconds: float = 600,
+                 default_ttl_seconds: float = 47 * 3600, max_entries: int = 1024,
+                 clock: Callable[[], float] = time.time):
+        self.client = client
+        self.expiry_margin_seconds = expiry_margin_seconds
+        self.default_ttl_seconds = default_ttl_seconds
+        self.max_entries = max_entries
+        self.clock = clock
+        self.uploads = 0
+        self.hits = 0
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+
+    def _lookup(self, digest: str) -> Optional[Any]:
+        entry = self._entries.get(digest)
+        if entry is None:
+            return None
+        handle, reusable_until = entry
+        if reusable_until <= self.clock():
+            del self._entries[digest]
+            return None
+        self._entries.move_to_end(digest)
+        return handle
+
+    def get_or_upload(self, data: Union[bytes, BinaryIO], suffix: str = ".bin",
+                      mime_type: Optional[str] = None) -> Tuple[Any, bool]:
+        """
+        Return a provider handle for this content, uploading only on a miss.
+
+        Returns:
+            (handle, reused) where ``reused`` is True when no upload was made
+        """
+        digest = content_digest(data)
+        with self._lock:
+            handle = self._lookup(digest)
+            if handle is not None:
+                self.hits += 1
+                return handle, True
+            key_lock = self._key_locks.setdefault(digest, threading.Lock())
+
+        # One upload per digest; callers for the same content wait for it
+        with key_lock:
+            with self._lock:
+                handle = self._lookup(digest)
+                if handle is not None:
+                    self.hits += 1
+                    return handle, True
+            try:
+                handle = self._upload(data, suffix, mime_type)
+                self._remember(digest, handle)
+            finally:
+                with self._lock:
+                    self._key_locks.pop(digest, None)
+        return handle, False
+
+    def _remember(self, digest: str, handle: Any):
+        expires_at = _expiry_timestamp(handle) or self.clock() + self.default_ttl_seconds
+        with self._lock:
+            self.uploads += 1
+            if not _failed(handle):
+                self._entries[digest] = (handle, expires_at - self.expiry_margin_seconds)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+    def _upload(self, data: Union[bytes, BinaryIO], suffix: str, mime_type: Optional[str]) -> Any:
+        # The provider SDK uploads from a path; the bytes only touch disk on a miss
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
+            shutil.copyfileobj(as_file(data), tmp_file)
+            path = tmp_file.name
+        try:
+            if mime_type:
+                return self.client.upload_file(path, mime_type=mime_type)
+            return self.client.upload_file(path)
+        finally:
+            os.unlink(path)
+
+    def invalidate(self, handle: Any):
+        """Forget a handle the provider no longer accepts."""
+        with self._lock:
+            for digest, (cached, _) in list(self._entries.items()):
+                if cached is handle:
+                    del self._entries[digest]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "uploads": self.uploads, "hits": self.hits}
+
+
+@dataclass
+class LocalFile:
+    """File handle with the attributes of ``google.generativeai.types.File`` that we use."""
+    name: str
+    uri: str
+    mime_type: Optional[str]
+    size_bytes: int
+    sha256_hash: str
+    create_time: datetime
+    expiration_time: datetime
+    state: str = "ACTIVE"
+
+
+class LocalFileService:
+    """
+    In-memory stand-in for the Gemini file API, for offline tests.
+
+    Files expire ``ttl_seconds`` after upload, like the real service; an
+    expired file is gone from ``get_file``. ``upload_count`` records how
+    many uploads actually reached the "provider".
+    """
+
+    def __init__(self, ttl_seconds: float = 48 * 3600, clock: Callable[[], float] = time.time):
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.upload_count = 0
+        self._files: Dict[str, Tuple[LocalFile, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def upload_file(self, path: str, mime_type: Optional[str] = None, display_name: Optional[str] = None) -> LocalFile:
+        with open(path, "rb") as f:
+            data = f.read()
+        now = self.clock()
+        name = f"files/{uuid.uuid4().hex[:12]}"
+        handle = LocalFile(
+            name=name,
+            uri=f"local://{name}",
+            mime_type=mime_type,
+            size_bytes=len(data),
+            sha256_hash=hashlib.sha256(data).hexdigest(),
+            create_time=datetime.fromtimestamp(now, tz=timezone.utc),
+            expiration_time=datetime.fromtimestamp(now + self.ttl_seconds, tz=timezone.utc),
+        )
+        with self._lock:
+            self._files[name] = (handle, data)
+            self.upload_count += 1
+        return handle
+
+    def get_file(self, name: str) -> LocalFile:
+        with self._lock:
+            entry = self._files.get(name)
+            if entry is None or entry[0].expiration_time.timestamp() <= self.clock():
+                self._files.pop(name, None)
+                raise KeyError(f"File {name} not found")
+            return entry[0]
+
+    def delete_file(self, name: str):
+        with self._lock:
+            self._files.pop(name, None)
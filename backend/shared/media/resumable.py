@@ -0,0 +1,244 @@
+"""
+Resumable chunked uploads stored on local disk.
+
+A client opens an upload session with the total size (and optionally the
+SHA-256 of the whole file), then sends the bytes in chunks, each with its
+byte offset and SHA-256. A dropped connection costs at most one chunk: the
+client asks for the session's ``received`` offset and continues from there.
+Session state lives next to the partial file as JSON, so uploads resume
+across server restarts; idle sessions expire and are swept from disk.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from .uploads import UploadTooLarge
+
+logger = logging.getLogger(__name__)
+
+
+class UploadError(Exception):
+    """Base class for resumable upload errors."""
+
+
+class UploadNotFound(UploadError):
+    """No session with this id (never created, finalized or swept)."""
+
+
+class UploadExpired(UploadError):
+    """The session outlived its TTL without activity."""
+
+
+class UploadOffsetMismatch(UploadError):
+    """The chunk does not start where the upload currently ends."""
+
+    def __init__(self, expected: int, got: int):
+        super().__init__(f"Expected offset {expected}, got {got}")
+        self.expected = expected
+
+
+class ChecksumMismatch(UploadError):
+    """A chunk or the assembled file does not match its declared SHA-256."""
+
+
+class UploadIncomplete(UploadError):
+    """Finalize was called before all bytes arrived."""
+
+
+@dataclass
+class UploadSession:
+    upload_id: str
+    filename: str
+    size: int
+    received: int
+    sha256: Optional[str]
+    created_at: float
+    expires_at: float
+
+    @property
+    def complete(self) -> bool:
+        return self.received == self.size
+
+
+class ResumableUploadStore:
+    """
+    Disk-backed upload sessions: ``<root>/<upload_id>/{session.json,data.part}``.
+
+    Args:
+        root: Directory holding one subdirectory per session
+        max_size: Largest upload accepted, in bytes
+        max_chunk_size: Largest single chunk accepted, in bytes
+        ttl_seconds: Idle time after which a session expires
+
+    Usage:
+        store = ResumableUploadStore("./uploads", max_size=100 * 1024 * 1024)
+        session = store.create("clip.mp4", size)
+        store.write_chunk(session.upload_id, 0, chunk, sha256_hex)
+        path = store.finalize(session.upload_id)
+    """
+
+    def __init__(self, root: str, max_size: int, max_chunk_size: int = 8 * 1024 * 1024,
+                 ttl_seconds: float = 24 * 3600):
+        self.root = os.path.abspath(root)
+        self.max_size = max_size
+        self.max_chunk_size = max_chunk_size
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _dir(self, upload_id: str) -> str:
+        # Ids are generated hex; anything else cannot name a session
+        if not upload_id.isalnum():
+            raise UploadNotFound(upload_id)
+        return os.path.join(self.root, upload_id)
+
+    def _save(self, session: UploadSession):
+        meta_path = os.path.join(self._dir(session.upload_id), "session.json")
+        tmp_path = meta_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(asdict(session), f)
+        os.replace(tmp_path, meta_path)
+
+    def _load(self, upload_id: str) -> UploadSession:
+        try:
+            with open(os.path.join(self._dir(upload_id), "session.json")) as f:
+                session = UploadSession(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            raise UploadNotFound(upload_id)
+        if session.expires_at < time.time():
+            self.discard(upload_id)
+            raise UploadExpired(upload_id)
+        return session
+
+    def create(self, filename: str, size: int, sha256: Optional[str] = None) -> UploadSession:
+        """Open a session for an upload of ``size`` bytes."""
+        if size <= 0:
+            raise UploadError("Upload size must be positive")
+        if size > self.max_size:
+            raise UploadTooLarge(self.max_size)
+        now = time.time()
+        session = UploadSession(
+            upload_id=uuid.uuid4().hex,
+            filename=os.path.basename(filename or "upload"),
+            size=size,
+            received=0,
+            sha256=sha256.lower() if sha256 else None,
+            created_at=now,
+            expires_at=now + self.ttl_seconds,
+        )
+        os.makedirs(self._dir(session.upload_id))
+        open(os.path.join(self._dir(session.upload_id), "data.part"), "wb").close()
+        self._save(session)
+        return session
+
+    def get(self, upload_id: str) -> UploadSession:
+        return self._load(upload_id)
+
+    def write_chunk(self, upload_id: str, offset: int, data: bytes, sha256: str) -> UploadSession:
+        """
+        Append one chunk at ``offset`` after verifying its SHA-256.
+
+        A chunk that was already stored (a retry after a lost response) is
+        accepted without rewriting, as long as its bytes end at or before the
+        current offset.
+        """
+        if len(data) > self.max_chunk_size:
+            raise UploadTooLarge(self.max_chunk_size)
+        if hashlib.sha256(data).hexdigest() != sha256.lower():
+            raise ChecksumMismatch("Chunk checksum does not match its data")
+
+        with self._lock:
+            session = self._load(upload_id)
+            if offset + len(data) <= session.received:
+                return session  # duplicate of a chunk already stored
+            if offset != session.received:
+                raise UploadOffsetMismatch(session.received, offset)
+            if offset + len(data) > session.size:
+                raise UploadError(f"Chunk ends past the declared size of {session.size} bytes")
+
+            with open(os.path.join(self._dir(upload_id), "data.part"), "r+b") as f:
+                f.seek(offset)
+                f.write(data)
+                f.truncate()
+            session.received = offset + len(data)
+            session.expires_at = time.time() + self.ttl_seconds
+            self._save(session)
+            return session
+
+    def finalize(self, upload_id: str, dest_dir: Optional[str] = None) -> str:
+        """
+        Verify a complete upload and hand its file over.
+
+        Returns the path of the assembled file (moved into ``dest_dir`` if
+        given); the session itself is removed.
+        """
+        # Claim the file under the lock, then hash it without holding up
+        # chunk writes to every other session
+        with self._lock:
+            session = self._load(upload_id)
+            if not session.complete:
+                raise UploadIncomplete(f"Received {session.received} of {session.size} bytes")
+
+            suffix = os.path.splitext(session.filename)[1] or ".bin"
+            final_path = os.path.join(dest_dir or self.root, f"{upload_id}{suffix}")
+            os.replace(os.path.join(self._dir(upload_id), "data.part"), final_path)
+            self.discard(upload_id)
+
+        if session.sha256:
+            digest = hashlib.sha256()
+            with open(final_path, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+            if digest.hexdigest() != session.sha256:
+                os.unlink(final_path)
+                raise ChecksumMismatch("Assembled file does not match the declared checksum")
+        return final_path
+
+    def discard(self, upload_id: str):
+        shutil.rmtree(self._dir(upload_id), ignore_errors=True)
+
+    def sweep_expired(self) -> List[str]:
+        """Delete sessions past their expiry; returns the removed ids."""
+        removed = []
+        now = time.time()
+        for upload_id in os.listdir(self.root):
+            meta_path = os.path.join(self.root, upload_id, "session.json")
+            try:
+                with open(meta_path) as f:
+                    expires_at = json.load(f)["expires_at"]
+            except (OSError, ValueError, KeyError):
+                # Not a session directory (or a finalized file); leave it alone
+                continue
+            if expires_at >= now:
+                continue
+            with self._lock:
+                # A chunk may have arrived since the read above; _load
+                # discards the session only if it is still expired
+                try:
+                    self._load(upload_id)
+                except UploadExpired:
+                    removed.append(upload_id)
+                except UploadNotFound:
+                    pass
+        if removed:
+            logger.info(f"Removed {len(removed)} expired upload session(s)")
+        return removed
+
+    def describe(self, session: UploadSession) -> Dict:
+        return {
+            "upload_id": session.upload_id,
+            "filename": session.filename,
+            "size": session.size,
+            "received": session.received,
+            "complete": session.complete,
+            "max_chunk_size": self.max_chunk_size,
+            "expires_at": datetime.utcfromtimestamp(session.expires_at).isoformat() + "Z",
+        }
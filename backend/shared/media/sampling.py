@@ -0,0 +1,131 @@
+"""
+Adaptive frame sampling: coarse-to-fine ordering, sequential stopping and
+near-duplicate detection.
+"""
+import bisect
+import math
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+import cv2
+import numpy as np
+
+
+def coarse_to_fine_order(n: int) -> List[int]:
+    """
+    Order positions ``0..n-1`` so every prefix covers the range evenly.
+
+    Starts with the midpoint, then the midpoints of each half, and so on
+    (breadth-first bisection). Stopping after any prefix gives a spread of
+    samples over the whole video, not just its opening seconds.
+    """
+    order = []
+    queue = deque([(0, n - 1)])
+    while queue:
+        lo, hi = queue.popleft()
+        if lo > hi:
+            continue
+        mid = (lo + hi) // 2
+        order.append(mid)
+        queue.append((lo, mid - 1))
+        queue.append((mid + 1, hi))
+    return order
+
+
+class SequentialFrameTest:
+    """
+    Wald sequential probability ratio test over per-frame fake log-odds.
+
+    Each frame's ``log(p / (1 - p))`` is added to a running log-likelihood
+    ratio (clipped so one overconfident frame cannot decide alone). Sampling
+    can stop once the ratio crosses ``log((1 - beta) / alpha)`` (FAKE) or
+    ``log(beta / (1 - alpha))`` (REAL), where ``alpha`` and ``beta`` are the
+    tolerated false-fake and false-real rates.
+    """
+
+    def __init__(self, alpha: float = 0.01, beta: float = 0.01, min_frames: int = 3, llr_clip: float = 4.0):
+        self.upper = math.log((1 - beta) / alpha)
+        self.lower = math.log(beta / (1 - alpha))
+        self.min_frames = min_frames
+        self.llr_clip = llr_clip
+        self.llr = 0.0
+        self.frames = 0
+
+    def update(self, prob_fake: float) -> Optional[bool]:
+        """Add one frame's P(fake); returns the decision so far."""
+        p = min(max(prob_fake, 1e-6), 1 - 1e-6)
+        log_odds = math.log(p / (1 - p))
+        self.llr += max(-self.llr_clip, min(self.llr_clip, log_odds))
+        self.frames += 1
+        return self.decision
+
+    @property
+    def decision(self) -> Optional[bool]:
+        """True (fake) / False (real) once decided, None while undecided."""
+        if self.frames < self.min_frames:
+            return None
+        if self.llr >= self.upper:
+            return True
+        if self.llr <= self.lower:
+            return False
+        return None
+
+
+def frame_dhash(frame: np.ndarray, size: int = 8) -> int:
+    """
+    Difference hash of an RGB frame: ``size * size`` bits, one per
+    horizontally adjacent pixel pair of a ``(size + 1) x size`` grayscale
+    thumbnail. Frames that look alike differ in only a few bits.
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+    thumb = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = (thumb[:, 1:] > thumb[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+class NearDuplicateFilter:
+    """
+    Tracks perceptual hashes of the frames scored so far.
+
+    ``check`` returns the index of an already-seen frame within
+    ``max_distance`` bits of the new one (the closest in time on ties), or
+    registers the new frame as unique and returns None. Matches are kept in
+    ``duplicates`` (frame index -> index of the frame it duplicates).
+    """
+
+    def __init__(self, max_distance: int = 3):
+        self.max_distance = max_distance
+        self.hashes: Dict[int, int] = {}
+        self.duplicates: Dict[int, int] = {}
+
+    def check(self, idx: int, frame: np.ndarray) -> Optional[int]:
+        return self.check_hash(idx, frame_dhash(frame))
+
+    def check_hash(self, idx: int, frame_hash: int) -> Optional[int]:
+        """Same as ``check`` for a hash computed elsewhere (e.g. in a decode worker)."""
+        best = None
+        for seen_idx, seen_hash in self.hashes.items():
+            distance = (frame_hash ^ seen_hash).bit_count()
+            if distance <= self.max_distance:
+                key = (distance, abs(seen_idx - idx))
+                if best is None or key < best[0]:
+                    best = (key, seen_idx)
+        if best is not None:
+            self.duplicates[idx] = best[1]
+            return best[1]
+        self.hashes[idx] = frame_hash
+        return None
+
+
+def gap_midpoint(idx: int, samples: Iterable[int], frame_count: int) -> Optional[int]:
+    """
+    Index halfway between ``idx`` and the next sample after it (or the end
+    of the video), or None if the gap has no unused frame.
+    """
+    samples = sorted(set(samples))
+    k = bisect.bisect_right(samples, idx)
+    next_idx = samples[k] if k < len(samples) else frame_count
+    mid = (idx + next_idx) // 2
+    if mid <= idx or mid in samples or mid >= frame_count:
+        return None
+    return mid
@@ -0,0 +1,119 @@
+"""
+Upload handling: request size limits enforced while the body streams in.
+
+Starlette already spools multipart file parts into a ``SpooledTemporaryFile``
+(kept in memory up to 1 MB, then spilled to disk), so memory per upload is
+bounded as long as handlers work on ``UploadFile.file`` instead of calling
+``await file.read()``. What it does not do is stop an oversized upload: the
+whole body is parsed before the endpoint can look at it. This middleware
+rejects a request as soon as its declared or received size passes the
+route's limit, so an oversized upload never reaches the disk or the analyzers.
+"""
+import io
+import json
+import logging
+from typing import BinaryIO, Dict, Union
+
+logger = logging.getLogger(__name__)
+
+# Room for multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadTooLarge(Exception):
+    """Raised from the wrapped ``receive`` once a body passes its limit."""
+
+    def __init__(self, limit: int):
+        super().__init__(f"Request body exceeds {limit} bytes")
+        self.limit = limit
+
+
+def as_file(data: Union[bytes, bytearray, memoryview, BinaryIO]) -> BinaryIO:
+    """Return a readable file object positioned at the start of the data."""
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return io.BytesIO(data)
+    data.seek(0)
+    return data
+
+
+class UploadSizeLimitMiddleware:
+    """
+    ASGI middleware enforcing per-path upload limits while streaming.
+
+    Args:
+        app: The ASGI application
+        limits: Request path -> maximum file size in bytes
+
+    Requests with a ``Content-Length`` over the limit are answered with 413
+    before any of the body is read; chunked or under-declared bodies are
+    counted as they arrive and cut off with 413 at the first chunk past it.
+
+    Usage:
+        app.add_middleware(UploadSizeLimitMiddleware, limits={
+            "/api/v1/check-video": 100 * 1024 * 1024,
+        })
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = {path.rstrip("/"): limit for path, limit in limits.items()}
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope.get("path", "").rstrip("/")) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        allowance = limit + MULTIPART_OVERHEAD
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > allowance:
+            await self._reject(send, limit)
+            return
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > allowance:
+                    exceeded = True
+                    raise UploadTooLarge(limit)
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            # Once over the limit, the app's own error response (typically a
+            # 400 for the aborted form parse) is replaced by the 413 below
+            if exceeded and not response_started:
+                return
+            response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not exceeded:
+                raise
+
+        if exceeded and not response_started:
+            logger.warning(f"Rejected upload to {scope['path']} after {received} bytes (limit {limit})")
+            await self._reject(send, limit)
+
+    @staticmethod
+    async def _reject(send, limit: int):
+        body = json.dumps({"detail": f"File too large. Maximum size: {limit // (1024 * 1024)}MB"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
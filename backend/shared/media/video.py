@@ -0,0 +1,463 @@
+"""
+Video decoding for uploaded media.
+
+Frames are decoded straight from the in-memory upload with PyAV (FFmpeg
+bindings). OpenCV can only open paths, so it is kept as a fallback that
+writes a temporary file when PyAV is unavailable or cannot parse the input.
+"""
+import bisect
+import io
+import logging
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, Iterable, List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+try:
+    import av
+except ImportError:  # pragma: no cover - optional dependency
+    av = None
+
+logger = logging.getLogger(__name__)
+
+VideoInput = Union[bytes, bytearray, memoryview, BinaryIO]
+
+
+def _packet_pts(packet) -> Optional[int]:
+    """Presentation timestamp of a demuxed packet, or None for flush/empty packets."""
+    if packet.size == 0:
+        return None
+    return packet.pts if packet.pts is not None else packet.dts
+
+
+@dataclass(frozen=True)
+class PacketIndex:
+    """
+    The part of a video's packet index needed to decode some of its frames.
+
+    Built by ``VideoReader.packet_index`` in one process and handed to a
+    ``VideoReader`` in another (it pickles), which then seeks straight to
+    those frames instead of demuxing the whole stream to index it again.
+    """
+    packets: List[Tuple[int, bool]]  # (pts, is_keyframe) in decode order, from a keyframe
+    seek_timestamps: Dict[int, int]  # position in ``packets`` -> timestamp to seek to
+    frame_pts: Dict[int, int]  # frame index -> pts, for the frames to decode
+    frame_count: int
+    fps: float
+
+
+class _PyAVBackend:
+    """
+    Decodes from a file-like object with PyAV; no disk I/O.
+
+    On open, the stream is demuxed once without decoding to build a packet
+    index (timestamps and keyframe flags), which gives an exact frame count.
+    The container stays open for the life of the backend, so ``read_frames``
+    never demuxes the stream again: it seeks to the keyframe that precedes
+    each group of targets, skips decoding frames nothing references unless
+    they are targets, and converts only the target frames to RGB.
+
+    Given a ``PacketIndex``, the stream is not demuxed on open and only the
+    frames the index covers can be read.
+    """
+
+    name = "pyav"
+
+    def __init__(self, fileobj: BinaryIO, index: Optional[PacketIndex] = None):
+        self.fileobj = fileobj
+        self.container = av.open(fileobj, mode="r")
+        if not self.container.streams.video:
+            self.container.close()
+            raise ValueError("No video stream found")
+        self.stream = stream = self.container.streams.video[0]
+        stream.thread_type = "AUTO"
+
+        if index is not None:
+            self.fps = index.fps
+            self.packets = index.packets
+            self.seek_timestamps = index.seek_timestamps
+            self.frame_pts = index.frame_pts
+            self.frame_count = index.frame_count
+        else:
+            self.fps = float(stream.average_rate or stream.guessed_rate or 30)
+            # Packet index in decode order: (pts, is_keyframe)
+            self.packets = []
+            # Decode position -> timestamp to seek to, for keyframes and the first packet.
+            # Demuxers seek by dts, which precedes the pts of a keyframe followed by B-frames.
+            self.seek_timestamps = {}
+            for packet in self.container.demux(stream):
+                pts = _packet_pts(packet)
+                if pts is not None:
+                    if packet.is_keyframe or not self.packets:
+                        self.seek_timestamps[len(self.packets)] = packet.dts if packet.dts is not None else pts
+                    self.packets.append((pts, packet.is_keyframe))
+            # Presentation order: frame index -> pts
+            self.frame_pts = dict(enumerate(sorted(pts for pts, _ in self.packets)))
+            self.frame_count = len(self.frame_pts)
+
+        self.positions = {pts: pos for pos, (pts, _) in enumerate(self.packets)}
+        self.keyframe_positions = [pos for pos, (_, key) in enumerate(self.packets) if key]
+        self.keyframe_pts = [self.packets[pos][0] for pos in self.keyframe_positions]
+        self.frames_decoded = 0
+
+    def _segment_start(self, pts: int) -> int:
+        """Decode-order position of the last keyframe at or before ``pts``."""
+        k = bisect.bisect_right(self.keyframe_pts, pts) - 1
+        return self.keyframe_positions[k] if k >= 0 else 0
+
+    def _packets_from(self, start: int):
+        """Seek to the keyframe at decode position ``start`` and demux (position, packet) from there."""
+        for seek_position in (start, 0):
+            self.container.seek(self.seek_timestamps[seek_position], stream=self.stream, backward=True)
+            landed = reached = False
+            for packet in self.container.demux(self.stream):
+                pts = _packet_pts(packet)
+                if pts is None:
+                    continue
+                pos = self.positions.get(pts, -1)
+                if not landed:
+                    if pos > start:
+                        break  # the demuxer overshot the keyframe: rewind to the first packet
+                    landed = True
+                if pos >= start:  # packets before the keyframe are demuxed but never decoded
+                    reached = True
+                    yield pos, packet
+                elif reached:
+                    return  # past the end of a partial index
+            if landed:
+                return
+
+    def packet_index(self, indices: Iterable[int]) -> Optional[PacketIndex]:
+        """The packets from the GOP of the first target to the end of the GOP of the last one."""
+        frame_pts = {idx: self.frame_pts[idx] for idx in indices if idx in self.frame_pts}
+        if not frame_pts:
+            return None
+        first = min(self._segment_start(pts) for pts in frame_pts.values())
+        last = max(self.positions[pts] for pts in frame_pts.values())
+        k = bisect.bisect_right(self.keyframe_positions, last)
+        end = self.keyframe_positions[k] if k < len(self.keyframe_positions) else len(self.packets)
+        return PacketIndex(
+            packets=self.packets[first:end],
+            seek_timestamps={pos - first: ts for pos, ts in self.seek_timestamps.items() if first <= pos < end},
+            frame_pts=frame_pts,
+            frame_count=self.frame_count,
+            fps=self.fps,
+        )
+
+    def snap_to_keyframes(self, indices: Iterable[int]) -> List[int]:
+        """Replace each index with the presentation index of the nearest keyframe."""
+        if not self.keyframe_pts:
+            return sorted(set(indices))
+        pts_to_index = {pts: idx for idx, pts in self.frame_pts.items()}
+        keyframe_indices = sorted(pts_to_index[pts] for pts in self.keyframe_pts)
+        snapped = set()
+        for idx in indices:
+            k = bisect.bisect_left(keyframe_indices, idx)
+            candidates = keyframe_indices[max(0, k - 1):k + 1]
+            snapped.add(min(candidates, key=lambda kf: abs(kf - idx)))
+        return sorted(snapped)
+
+    def read_frames(self, indices: Iterable[int], prefetch: Iterable[int] = ()) -> Dict[int, np.ndarray]:
+        wanted = {}
+        for idx in prefetch:
+            if idx in self.frame_pts:
+                wanted[self.frame_pts[idx]] = idx
+        remaining = set()
+        for idx in indices:
+            if idx in self.frame_pts:
+                wanted[self.frame_pts[idx]] = idx
+                remaining.add(self.frame_pts[idx])
+        if not remaining:
+            return {}
+
+        # Prefetched frames are kept when decoded on the way, but only ``remaining`` drives the decoding
+        target_positions = {self.positions[pts] for pts in wanted}
+        frames = {}
+        stream = self.stream
+        codec = stream.codec_context
+
+        def keep(frame):
+            self.frames_decoded += 1
+            if frame.pts in wanted and wanted[frame.pts] not in frames:
+                frames[wanted[frame.pts]] = frame.to_ndarray(format="rgb24")
+                remaining.discard(frame.pts)
+
+        try:
+            while remaining:
+                # Seeking flushes the decoder; decoding restarts at the GOP of the earliest pending target
+                start = min(self._segment_start(pts) for pts in remaining)
+                for pos, packet in self._packets_from(start):
+                    # Frames nothing references are only decoded when they are targets
+                    codec.skip_frame = "DEFAULT" if pos in target_positions else "NONREF"
+                    for frame in stream.decode(packet):
+                        keep(frame)
+                    if not remaining:
+                        break
+                    if min(self._segment_start(pts) for pts in remaining) > pos + 1:
+                        break  # every pending target is in a later GOP: seek there
+                else:
+                    # End of stream: drain frames still buffered in the decoder (B-frame reordering)
+                    for frame in stream.decode(None):
+                        keep(frame)
+                    break
+        finally:
+            codec.skip_frame = "DEFAULT"
+
+        return frames
+
+    def close(self):
+        self.container.close()
+
+
+class _OpenCVBackend:
+    """Decodes with OpenCV, which needs a path on disk. Reads forward without seeking."""
+
+    name = "opencv"
+
+    def __init__(self, data: VideoInput, suffix: str):
+        self.tmp_path = None
+        path = getattr(data, "name", None)
+        if not (isinstance(path, str) and os.path.isfile(path)):
+            if not isinstance(data, (bytes, bytearray, memoryview)):
+                data.seek(0)
+                data = data.read()
+            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
+                tmp_file.write(data)
+                self.tmp_path = path = tmp_file.name
+
+        self.path = path
+        cap = cv2.VideoCapture(path)
+        self.fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        self.frames_decoded = 0
+
+    def snap_to_keyframes(self, indices: Iterable[int]) -> List[int]:
+        # OpenCV does not expose keyframe flags
+        return sorted(set(indices))
+
+    def packet_index(self, indices: Iterable[int]) -> Optional[PacketIndex]:
+        return None
+
+    def read_frames(self, indices: Iterable[int], prefetch: Iterable[int] = ()) -> Dict[int, np.ndarray]:
+        indices = set(indices)
+        if not indices:
+            return {}
+        # Reading forward passes every prefetched frame before the last target anyway
+        last = max(indices)
+        indices.update(idx for idx in prefetch if idx < last)
+        frames = {}
+        cap = cv2.VideoCapture(self.path)
+        try:
+            pos = 0
+            for idx in sorted(indices):
+                # grab() advances without the BGR conversion/copy of read()
+                while pos < idx and cap.grab():
+                    pos += 1
+                    self.frames_decoded += 1
+                if pos != idx:
+                    break
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                pos += 1
+                self.frames_decoded += 1
+                frames[idx] = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        finally:
+            cap.release()
+        return frames
+
+    def close(self):
+        if self.tmp_path:
+            os.unlink(self.tmp_path)
+
+
+class VideoReader:
+    """
+    Frame reader over an uploaded video.
+
+    Accepts raw bytes or a seekable file-like object. Frames are returned as
+    RGB ``uint8`` arrays keyed by frame index. With a ``PacketIndex`` from
+    another reader on the same video, opening skips the indexing pass.
+
+    Usage:
+        with VideoReader(video_bytes) as reader:
+            frames = reader.read_frames([0, reader.frame_count // 2])
+    """
+
+    def __init__(self, data: VideoInput, suffix: str = ".mp4", index: Optional[PacketIndex] = None):
+        self._backend = None
+        if av is not None:
+            try:
+                fileobj = io.BytesIO(data) if isinstance(data, (bytes, bytearray, memoryview)) else data
+                if hasattr(fileobj, "seek"):
+                    fileobj.seek(0)
+                self._backend = _PyAVBackend(fileobj, index)
+            except Exception as e:
+                logger.warning(f"PyAV could not open video, falling back to OpenCV: {e}")
+        if self._backend is None:
+            self._backend = _OpenCVBackend(data, suffix)
+
+    @property
+    def backend(self) -> str:
+        return self._backend.name
+
+    @property
+    def frame_count(self) -> int:
+        return self._backend.frame_count
+
+    @property
+    def fps(self) -> float:
+        return self._backend.fps
+
+    @property
+    def frames_decoded(self) -> int:
+        """Total frames the decoder has produced so far, targets or not."""
+        return self._backend.frames_decoded
+
+    def read_frames(self, indices: Iterable[int], snap_to_keyframes: bool = False,
+                    prefetch: Iterable[int] = ()) -> Dict[int, np.ndarray]:
+        """
+        Decode the frames at the given indices in one forward pass.
+
+        Args:
+            indices: Frame indices in presentation order
+            snap_to_keyframes: Replace each index with the nearest keyframe so
+                only keyframes are decoded (PyAV only; ignored by OpenCV)
+            prefetch: Indices also returned if the decoder passes them while
+                reading ``indices``; nothing is decoded just for them
+
+        Returns:
+            Dict of frame index -> RGB array; unreadable frames are omitted
+        """
+        if snap_to_keyframes:
+            indices = self.snap_to_keyframes(indices)
+            prefetch = self.snap_to_keyframes(prefetch)
+        return self._backend.read_frames(indices, prefetch)
+
+    def snap_to_keyframes(self, indices: Iterable[int]) -> List[int]:
+        """Map indices to their nearest keyframes (unchanged with OpenCV)."""
+        return self._backend.snap_to_keyframes(indices)
+
+    def packet_index(self, indices: Iterable[int]) -> Optional[PacketIndex]:
+        """Index covering just these frames, for another reader (None with OpenCV)."""
+        return self._backend.packet_index(indices)
+
+    def close(self):
+        self._backend.close()
+
+    def __enter__(self) -> "VideoReader":
+        return self
+
+    def __exit__(self, *exc) -> Optional[bool]:
+        self.close()
+        return None
+
+
+class VideoContext:
+    """
+    Per-request video handle shared by every stage that looks at the frames.
+
+    The upload is opened once and decoded frames are cached by index, so the
+    local classifier and the Gemini verifier reuse the same decoded frames
+    and only indices some stage actually asks for are ever decoded.
+
+    Usage:
+        with VideoContext(video_bytes) as video:
+            indices = video.sample_indices(10)
+            frames = video.frames(indices)
+    """
+
+    def __init__(self, data: VideoInput, snap_to_keyframes: bool = False):
+        self.data = data
+        self.reader = VideoReader(data)
+        self.snap_to_keyframes = snap_to_keyframes
+        self._frames: Dict[int, np.ndarray] = {}
+        self._tmp_path: Optional[str] = None
+
+    @property
+    def frame_count(self) -> int:
+        return self.reader.frame_count
+
+    @property
+    def fps(self) -> float:
+        return self.reader.fps
+
+    @property
+    def backend(self) -> str:
+        return self.reader.backend
+
+    @property
+    def frames_decoded(self) -> int:
+        return self.reader.frames_decoded
+
+    def sample_indices(self, count: int) -> List[int]:
+        """Evenly spaced sample indices, snapped to keyframes if configured."""
+        if self.frame_count <= 0:
+            return []
+        indices = [int(i) for i in np.linspace(0, self.frame_count - 1, min(count, self.frame_count), dtype=int)]
+        if self.snap_to_keyframes:
+            indices = self.reader.snap_to_keyframes(indices)
+        return indices
+
+    def frames(self, indices: Iterable[int], prefetch: Iterable[int] = ()) -> Dict[int, np.ndarray]:
+        """
+        Return RGB frames for the indices, decoding only those not cached yet.
+
+        Indices in ``prefetch`` (frames likely to be asked for next) are
+        cached too when decoding the requested ones passes them.
+        """
+        indices = list(indices)
+        missing = sorted({idx for idx in indices if idx not in self._frames})
+        if missing:
+            ahead = [idx for idx in prefetch if idx not in self._frames]
+            self._frames.update(self.reader.read_frames(missing, prefetch=ahead))
+        return {idx: self._frames[idx] for idx in indices if idx in self._frames}
+
+    @property
+    def duration(self) -> float:
+        """Length in seconds."""
+        return self.frame_count / (self.fps or 30.0)
+
+    def source_path(self) -> str:
+        """
+        Path of the video on disk, for decoders in other processes.
+
+        Uploads that only live in memory are written to a temporary file
+        once, removed again on ``close``.
+        """
+        path = getattr(self.data, "name", None)
+        if isinstance(path, str) and os.path.isfile(path):
+            return path
+        if self._tmp_path is None:
+            data = self.data
+            with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as tmp_file:
+                if isinstance(data, (bytes, bytearray, memoryview)):
+                    tmp_file.write(data)
+                else:
+                    data.seek(0)
+                    shutil.copyfileobj(data, tmp_file)
+                self._tmp_path = tmp_file.name
+        return self._tmp_path
+
+    def cached_indices(self) -> List[int]:
+        """Indices of frames already decoded for this request."""
+        return sorted(self._frames)
+
+    def close(self):
+        self._frames.clear()
+        self.reader.close()
+        if self._tmp_path:
+            os.unlink(self._tmp_path)
+            self._tmp_path = None
+
+    def __enter__(self) -> "VideoContext":
+        return self
+
+    def __exit__(self, *exc) -> Optional[bool]:
+        self.close()
+        return None
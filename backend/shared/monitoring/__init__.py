@@ -2,5 +2,26 @@
 Monitoring package for VeriFy AI.
 """
 from .logging import logger, setup_logging
+from .metrics import (
+    STAGES,
+    RequestMetricsMiddleware,
+    instrument_engine,
+    metrics_response,
+    observe_stage,
+    stage_timer,
+)
+from .tracing import TracingMiddleware, get_tracer, setup_tracing
 
-__all__ = ["logger", "setup_logging"]
+__all__ = [
+    "RequestMetricsMiddleware",
+    "STAGES",
+    "TracingMiddleware",
+    "get_tracer",
+    "instrument_engine",
+    "logger",
+    "metrics_response",
+    "observe_stage",
+    "setup_logging",
+    "setup_tracing",
+    "stage_timer",
+]
@@ -0,0 +1,196 @@
+"""
+Prometheus metrics shared by the API gateway and the model server.
+
+Request metrics are labelled with the matched route *template*
+(``/api/v1/check-video/result/{job_id}``), never the raw URL path, so ids
+in URLs cannot create an unbounded number of time series. Pipeline stages
+record into one histogram labelled by stage, so a slow request can be
+broken down into decode, preprocessing, inference, external API and
+database time. Each timed stage is also an OpenTelemetry span (see
+``tracing``); without a configured tracer those spans are no-ops.
+"""
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from starlette.responses import Response
+
+from .tracing import SpanKind, get_tracer
+
+# Label used for requests that matched no route (404s, scanners)
+UNMATCHED_ROUTE = "unmatched"
+
+# The fixed set of stage labels; anything else is a programming error
+STAGES = ("decode", "preprocess", "inference", "tavily", "gemini", "db")
+
+REQUEST_COUNT = Counter(
+    "http_requests_total",
+    "Total HTTP requests",
+    ["method", "endpoint", "status"]
+)
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request duration in seconds",
+    ["method", "endpoint"]
+)
+STAGE_DURATION = Histogram(
+    "pipeline_stage_duration_seconds",
+    "Time spent in each verification pipeline stage",
+    ["stage", "outcome"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+
+# Admission control (shared.ratelimit.admission): load per modality and what was shed
+ADMISSION_IN_FLIGHT = Gauge(
+    "admission_in_flight",
+    "Requests holding an execution slot",
+    ["modality"]
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "admission_queue_depth",
+    "Requests waiting for an execution slot",
+    ["modality"]
+)
+ADMISSION_QUEUE_WAIT = Histogram(
+    "admission_queue_wait_seconds",
+    "Time admitted requests waited for an execution slot",
+    ["modality"],
+    buckets=(0, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+ADMISSION_SHED = Counter(
+    "admission_shed_total",
+    "Requests rejected by admission control",
+    ["modality", "priority", "reason"]
+)
+
+
+def route_template(scope) -> str:
+    """Path template of the route that handled the request (set on the scope by routing)."""
+    route = scope.get("route")
+    return getattr(route, "path_format", None) or getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware recording ``http_requests_total`` and
+    ``http_request_duration_seconds`` per route template.
+
+    Pure ASGI rather than ``@app.middleware("http")``, so streamed responses
+    (server-sent events) pass through untouched; their duration runs until
+    the last body chunk is sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            endpoint = route_template(scope)
+            REQUEST_COUNT.labels(method=scope["method"], endpoint=endpoint, status=status_code).inc()
+            REQUEST_DURATION.labels(method=scope["method"], endpoint=endpoint).observe(time.perf_counter() - start)
+
+
+def observe_stage(stage: str, seconds: float, outcome: str = "ok"):
+    if stage not in STAGES:
+        raise ValueError(f"Unknown pipeline stage: {stage}")
+    STAGE_DURATION.labels(stage=stage, outcome=outcome).observe(seconds)
+
+
+class _NullSpan:
+    """Stand-in span when OpenTelemetry is not installed."""
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+
+@contextmanager
+def stage_timer(stage: str, span_name: Optional[str] = None, **attributes) -> Iterator[Any]:
+    """
+    Time a block as one pipeline stage, inside a span of the same name.
+
+    Exceptions are recorded with ``outcome="error"`` (and on the span) and
+    re-raised. Keyword arguments become span attributes; more can be set on
+    the yielded span once known.
+
+    Usage:
+        with stage_timer("inference", model="efficientnet_v2_s", batch_size=len(batch)) as span:
+            logits = model(batch)
+    """
+    if stage not in STAGES:
+        raise ValueError(f"Unknown pipeline stage: {stage}")
+    tracer = get_tracer()
+    outcome = "ok"
+    start = time.perf_counter()
+    try:
+        if tracer is None:
+            yield _NullSpan()
+        else:
+            with tracer.start_as_current_span(span_name or stage, attributes={"stage": stage, **attributes}) as span:
+                yield span
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        STAGE_DURATION.labels(stage=stage, outcome=outcome).observe(time.perf_counter() - start)
+
+
+def instrument_engine(engine):
+    """
+    Record every statement run through a SQLAlchemy engine (sync or async)
+    as the "db" stage, with a client span carrying the statement.
+    """
+    from sqlalchemy import event
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        tracer = get_tracer()
+        span = None
+        if tracer is not None:
+            operation = statement.split(None, 1)[0].upper() if statement else "QUERY"
+            span = tracer.start_span(f"db {operation}", kind=SpanKind.CLIENT, attributes={
+                "stage": "db",
+                "db.system": conn.dialect.name,
+                "db.operation": operation,
+                "db.statement": statement[:1000],
+            })
+        conn.info.setdefault("stage_timer_start", []).append((time.perf_counter(), span))
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _finish(conn, cursor, statement, parameters, context, executemany):
+        start, span = conn.info["stage_timer_start"].pop()
+        observe_stage("db", time.perf_counter() - start)
+        if span is not None:
+            span.end()
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(context):
+        starts = context.connection.info.get("stage_timer_start") if context.connection is not None else None
+        if starts:
+            start, span = starts.pop()
+            observe_stage("db", time.perf_counter() - start, outcome="error")
+            if span is not None:
+                span.record_exception(context.original_exception)
+                span.end()
+
+
+def metrics_response() -> Response:
+    """Prometheus exposition of this process's metrics."""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,140 @@
+"""
+OpenTelemetry tracing for VeriFy AI.
+
+``setup_tracing`` installs a tracer provider once per process. Each request
+gets a server span (``TracingMiddleware``), and every pipeline stage timed
+with ``stage_timer`` opens a child span, so a slow request shows up as one
+trace broken down into decode, inference, Tavily, Gemini and database time.
+
+Production runs with parent-based ratio sampling and batched export, so
+unsampled requests only create non-recording spans. Tests use the in-memory
+exporter and sample everything:
+
+    exporter = setup_tracing("test", exporter="memory", sample_ratio=1.0)
+    ...
+    spans = exporter.get_finished_spans()
+"""
+import logging
+from typing import Optional
+
+try:
+    from opentelemetry import propagate, trace
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+except ImportError:  # pragma: no cover - optional dependency
+    trace = None
+    SpanKind = None
+
+logger = logging.getLogger(__name__)
+
+TRACER_NAME = "verifyai"
+
+_exporter = None
+
+
+def get_tracer():
+    """The shared tracer (a no-op tracer until ``setup_tracing`` runs), or None without OpenTelemetry."""
+    return trace.get_tracer(TRACER_NAME) if trace is not None else None
+
+
+def setup_tracing(service_name: str, exporter: str = "otlp", sample_ratio: float = 0.05,
+                  endpoint: Optional[str] = None, environment: Optional[str] = None):
+    """
+    Install the global tracer provider (first call wins).
+
+    Args:
+        service_name: ``service.name`` resource attribute
+        exporter: "otlp", "console", "memory" or "none"
+        sample_ratio: Fraction of new traces recorded; requests that arrive
+            with a sampled parent are always recorded
+        endpoint: OTLP/HTTP traces URL (defaults to the exporter's own
+            ``OTEL_EXPORTER_OTLP_TRACES_ENDPOINT`` handling)
+        environment: ``deployment.environment`` resource attribute
+
+    Returns:
+        The span exporter in use (for "memory", read spans from it), or None
+        when tracing is disabled or unavailable
+    """
+    global _exporter
+    if _exporter is not None:
+        return _exporter
+    if trace is None or exporter == "none":
+        return None
+
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SimpleSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    if exporter == "memory":
+        from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+        span_exporter = InMemorySpanExporter()
+    elif exporter == "console":
+        span_exporter = ConsoleSpanExporter()
+    elif exporter == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError:
+            logger.warning("Tracing disabled: opentelemetry-exporter-otlp-proto-http is not installed")
+            return None
+        span_exporter = OTLPSpanExporter(endpoint=endpoint)
+    else:
+        raise ValueError(f"Unknown tracing exporter: {exporter}")
+
+    resource = {"service.name": service_name}
+    if environment:
+        resource["deployment.environment"] = environment
+    provider = TracerProvider(
+        resource=Resource.create(resource),
+        sampler=ParentBased(TraceIdRatioBased(sample_ratio)),
+    )
+    # Tests read spans synchronously; everything else exports off the request path
+    processor = SimpleSpanProcessor(span_exporter) if exporter == "memory" else BatchSpanProcessor(span_exporter)
+    provider.add_span_processor(processor)
+    trace.set_tracer_provider(provider)
+
+    _exporter = span_exporter
+    logger.info(f"Tracing enabled for {service_name}: exporter={exporter}, sample_ratio={sample_ratio}")
+    return span_exporter
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware opening a server span per HTTP request.
+
+    Continues a trace from an incoming ``traceparent`` header. The span is
+    named after the route template once routing has run, like the request
+    metrics, so span names stay low-cardinality.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or trace is None:
+            await self.app(scope, receive, send)
+            return
+
+        from .metrics import route_template
+
+        carrier = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope.get("headers") or []}
+        parent = propagate.extract(carrier)
+        tracer = get_tracer()
+        with tracer.start_as_current_span(
+            scope["method"],
+            context=parent,
+            kind=SpanKind.SERVER,
+            attributes={"http.method": scope["method"], "http.target": scope.get("path", "")},
+        ) as span:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.set_status(Status(StatusCode.ERROR))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = route_template(scope)
+                span.set_attribute("http.route", route)
+                span.update_name(f"{scope['method']} {route}")
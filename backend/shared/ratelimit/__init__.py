@@ -0,0 +1,41 @@
+"""
+Rate limiting and admission control for VeriFy AI.
+"""
+from .admission import (
+    AdmissionController,
+    AdmissionMiddleware,
+    ModalityLimits,
+    Overloaded,
+    Priority,
+    request_deadline,
+    request_priority,
+)
+from .limiter import (
+    InMemoryRateLimitStore,
+    Limit,
+    RateLimitDecision,
+    RateLimiter,
+    RedisRateLimitStore,
+    default_limits,
+)
+from .middleware import APIKeyCache, APIKeyQuota, RateLimitMiddleware, load_api_key_quota
+
+__all__ = [
+    "APIKeyCache",
+    "APIKeyQuota",
+    "AdmissionController",
+    "AdmissionMiddleware",
+    "InMemoryRateLimitStore",
+    "Limit",
+    "ModalityLimits",
+    "Overloaded",
+    "Priority",
+    "RateLimitDecision",
+    "RateLimitMiddleware",
+    "RateLimiter",
+    "RedisRateLimitStore",
+    "default_limits",
+    "load_api_key_quota",
+    "request_deadline",
+    "request_priority",
+]
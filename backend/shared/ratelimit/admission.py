@@ -0,0 +1,399 @@
+"""
+Queue-depth-aware admission control for the model executors.
+
+Each modality (text, image, video, voice) has a fixed number of execution
+slots and a bounded wait queue. A request that arrives when every slot is
+busy is only queued if it is predicted to finish before the client's
+deadline; otherwise it is rejected straight away with 503 and a
+Retry-After, before its upload has been read or any model time spent.
+The slot itself is only taken once the upload has been received, so a slow
+upload neither blocks other requests nor counts as model time.
+
+The prediction uses the queue ahead of the request and a moving average of
+how long the modality's requests hold a slot. Priorities decide who is
+shed first: low-priority requests may only fill part of the queue, a full
+queue makes room for a higher-priority arrival by dropping the newest
+lower-priority waiter, and freed slots go to the highest priority first.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Callable, Dict, List, Optional, Tuple
+
+from shared.monitoring.metrics import (
+    ADMISSION_IN_FLIGHT,
+    ADMISSION_QUEUE_DEPTH,
+    ADMISSION_QUEUE_WAIT,
+    ADMISSION_SHED,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    LOW = 0
+    NORMAL = 1
+    HIGH = 2
+
+
+@dataclass(frozen=True)
+class ModalityLimits:
+    """
+    Capacity of one modality.
+
+    Args:
+        concurrency: Requests executing at once
+        max_queue: Requests waiting for a slot
+        expected_seconds: Initial estimate of a request's slot time, refined
+            as requests complete
+        deadline_seconds: Client deadline assumed when the request names none
+    """
+    concurrency: int
+    max_queue: int
+    expected_seconds: float
+    deadline_seconds: float
+
+
+class Overloaded(Exception):
+    """The request was shed; retry after ``retry_after`` seconds."""
+
+    def __init__(self, modality: str, reason: str, retry_after: float):
+        super().__init__(f"{modality} capacity exhausted ({reason})")
+        self.modality = modality
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def detail(self) -> str:
+        return f"Server busy: {self.modality} capacity exhausted. Please retry later."
+
+    @property
+    def retry_after_header(self) -> str:
+        """Whole seconds for the ``Retry-After`` header (at least 1)."""
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+def request_priority(scope) -> Priority:
+    """
+    Priority asked for in ``X-Request-Priority`` ("low", "normal", "high").
+
+    Anyone may lower their priority; "high" is only honoured for requests
+    the rate limiter authenticated with an API key.
+    """
+    headers = dict(scope.get("headers") or [])
+    requested = headers.get(b"x-request-priority", b"normal").decode("latin-1").strip().upper()
+    priority = Priority.__members__.get(requested, Priority.NORMAL)
+    if priority is Priority.HIGH and not scope.get("state", {}).get("api_key_id"):
+        return Priority.NORMAL
+    return priority
+
+
+def request_deadline(scope) -> Optional[float]:
+    """Seconds the client will wait, from ``X-Request-Timeout``; None if absent or invalid."""
+    headers = dict(scope.get("headers") or [])
+    try:
+        deadline = float(headers[b"x-request-timeout"])
+    except (KeyError, ValueError):
+        return None
+    return deadline if math.isfinite(deadline) and deadline > 0 else None
+
+
+@dataclass(eq=False)
+class _Waiter:
+    priority: Priority
+    seq: int
+    future: asyncio.Future
+    enqueued_at: float
+
+
+@dataclass
+class _Lane:
+    modality: str
+    limits: ModalityLimits
+    service_seconds: float
+    running: int = 0
+    waiters: List[_Waiter] = field(default_factory=list)
+
+    def update_gauges(self):
+        ADMISSION_IN_FLIGHT.labels(modality=self.modality).set(self.running)
+        ADMISSION_QUEUE_DEPTH.labels(modality=self.modality).set(len(self.waiters))
+
+
+@dataclass
+class Slot:
+    """A held execution slot; hand it back with ``AdmissionController.release``."""
+    modality: str
+    acquired_at: float
+
+
+class AdmissionController:
+    """
+    Per-modality execution slots with deadline-aware, priority-ordered queues.
+
+    Args:
+        limits: Modality name -> ``ModalityLimits``
+        low_priority_queue_share: Fraction of each queue low-priority
+            requests may occupy
+        smoothing: Weight of the newest slot time in the moving average
+        clock: Monotonic time source
+
+    Usage:
+        controller = AdmissionController({"image": ModalityLimits(2, 16, 1.5, 30)})
+        slot = await controller.acquire("image", Priority.NORMAL, deadline=10)
+        try:
+            ...
+        finally:
+            controller.release(slot)
+    """
+
+    def __init__(self, limits: Dict[str, ModalityLimits], low_priority_queue_share: float = 0.5,
+                 smoothing: float = 0.2, clock: Callable[[], float] = time.monotonic):
+        self.low_priority_queue_share = low_priority_queue_share
+        self.smoothing = smoothing
+        self.clock = clock
+        self._lanes = {name: _Lane(name, lim, lim.expected_seconds) for name, lim in limits.items()}
+        self._seq = itertools.count()
+        for lane in self._lanes.values():
+            lane.update_gauges()
+
+    def predicted_wait(self, modality: str, priority: Priority = Priority.NORMAL) -> float:
+        """Seconds a new request of this priority would wait for a slot."""
+        lane = self._lanes[modality]
+        ahead = sum(1 for waiter in lane.waiters if waiter.priority >= priority)
+        if ahead == 0 and lane.running < lane.limits.concurrency:
+            return 0.0
+        # Slots free up every service_seconds / concurrency on average
+        return (ahead + 1) * lane.service_seconds / lane.limits.concurrency
+
+    def _shed(self, lane: _Lane, priority: Priority, reason: str, retry_after: float) -> Overloaded:
+        ADMISSION_SHED.labels(modality=lane.modality, priority=priority.name.lower(), reason=reason).inc()
+        logger.warning(f"Shed {priority.name.lower()} {lane.modality} request: {reason}")
+        return Overloaded(lane.modality, reason, max(retry_after, lane.service_seconds / lane.limits.concurrency))
+
+    def _admit(self, lane: _Lane, priority: Priority, deadline: float) -> Tuple[float, Optional[_Waiter]]:
+        """Predicted wait and, if the queue is full, the waiter to displace; raises if the request is shed."""
+        wait = self.predicted_wait(lane.modality, priority)
+        if wait == 0.0:
+            return wait, None
+        # A request that cannot finish in time is rejected now, not after queueing
+        if wait + lane.service_seconds > deadline:
+            raise self._shed(lane, priority, "deadline", wait)
+
+        limits = lane.limits
+        cap = limits.max_queue if priority > Priority.LOW else int(limits.max_queue * self.low_priority_queue_share)
+        if len(lane.waiters) < cap:
+            return wait, None
+        victims = [w for w in lane.waiters if w.priority < priority]
+        if len(lane.waiters) < limits.max_queue or not victims:
+            raise self._shed(lane, priority, "queue_full", wait)
+        # Make room by dropping the newest of the lowest-priority waiters
+        return wait, min(victims, key=lambda w: (w.priority, -w.seq))
+
+    def check(self, modality: str, priority: Priority = Priority.NORMAL, deadline: Optional[float] = None):
+        """
+        Shed a request that would be rejected on arrival, without reserving anything.
+
+        Used before a request's upload is read; ``acquire`` decides again
+        once it has been.
+
+        Raises:
+            Overloaded: if the request cannot be served in time or the queue is full
+        """
+        lane = self._lanes[modality]
+        self._admit(lane, priority, lane.limits.deadline_seconds if deadline is None else deadline)
+
+    async def acquire(self, modality: str, priority: Priority = Priority.NORMAL,
+                      deadline: Optional[float] = None, elapsed: float = 0.0) -> Slot:
+        """
+        Wait for an execution slot.
+
+        Args:
+            modality: Lane to run in
+            priority: Shedding and dequeue order
+            deadline: Seconds the client will wait for the response
+                (defaults to the modality's ``deadline_seconds``)
+            elapsed: Seconds of the deadline already spent (receiving the upload)
+
+        Raises:
+            Overloaded: if the request cannot be served in time, the queue is
+                full, or it is displaced by higher-priority work while queued
+        """
+        lane = self._lanes[modality]
+        deadline = (lane.limits.deadline_seconds if deadline is None else deadline) - elapsed
+
+        wait, victim = self._admit(lane, priority, deadline)
+        if wait == 0.0:
+            return self._start(lane, self.clock())
+        if victim is not None:
+            lane.waiters.remove(victim)
+            victim.future.set_exception(self._shed(lane, victim.priority, "displaced", wait))
+
+        waiter = _Waiter(priority, next(self._seq), asyncio.get_running_loop().create_future(), self.clock())
+        lane.waiters.append(waiter)
+        lane.update_gauges()
+        try:
+            # asyncio.wait, unlike wait_for, never swallows a cancellation that
+            # races with the grant, so the handler below always runs
+            await asyncio.wait((waiter.future,), timeout=max(0.0, deadline - lane.service_seconds))
+        except asyncio.CancelledError:
+            # Client went away: leave the queue, or hand back a slot granted meanwhile
+            if waiter in lane.waiters:
+                lane.waiters.remove(waiter)
+                lane.update_gauges()
+            elif waiter.future.done() and not waiter.future.exception():
+                self.release(Slot(modality, self.clock()), record=False)
+            raise
+        if not waiter.future.done():
+            # Queued past the point where the work could still finish in time: give up
+            lane.waiters.remove(waiter)
+            lane.update_gauges()
+            raise self._shed(lane, priority, "queue_timeout", self.predicted_wait(modality, priority))
+        waiter.future.result()  # raises if displaced
+        return self._granted(lane, waiter)
+
+    @asynccontextmanager
+    async def slot(self, modality: str, priority: Priority = Priority.NORMAL, deadline: Optional[float] = None):
+        """Hold a slot for the body of an ``async with``, for work no middleware route covers."""
+        slot = await self.acquire(modality, priority, deadline)
+        try:
+            yield slot
+        finally:
+            self.release(slot)
+
+    def _start(self, lane: _Lane, now: float) -> Slot:
+        lane.running += 1
+        lane.update_gauges()
+        ADMISSION_QUEUE_WAIT.labels(modality=lane.modality).observe(0.0)
+        return Slot(lane.modality, now)
+
+    def _granted(self, lane: _Lane, waiter: _Waiter) -> Slot:
+        # The slot was counted as running when it was handed over in _dispatch
+        now = self.clock()
+        ADMISSION_QUEUE_WAIT.labels(modality=lane.modality).observe(now - waiter.enqueued_at)
+        return Slot(lane.modality, now)
+
+    def release(self, slot: Slot, record: bool = True):
+        """Return a slot, updating the slot-time estimate, and hand it to the next waiter."""
+        lane = self._lanes[slot.modality]
+        lane.running -= 1
+        if record:
+            elapsed = self.clock() - slot.acquired_at
+            lane.service_seconds += self.smoothing * (elapsed - lane.service_seconds)
+        self._dispatch(lane)
+
+    def _dispatch(self, lane: _Lane):
+        while lane.running < lane.limits.concurrency and lane.waiters:
+            waiter = max(lane.waiters, key=lambda w: (w.priority, -w.seq))
+            lane.waiters.remove(waiter)
+            lane.running += 1
+            waiter.future.set_result(None)
+        lane.update_gauges()
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Per-modality load, for health endpoints."""
+        return {
+            name: {
+                "running": lane.running,
+                "queued": len(lane.waiters),
+                "concurrency": lane.limits.concurrency,
+                "max_queue": lane.limits.max_queue,
+                "service_seconds": round(lane.service_seconds, 3),
+            }
+            for name, lane in self._lanes.items()
+        }
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware holding an execution slot while each model request runs.
+
+    Requests to the mapped paths that would be shed on arrival get 503 and
+    ``Retry-After`` before the app reads their body. The others take their
+    slot, queueing if needed, when the last chunk of the body has been
+    received, and release it once the response, including a streamed one,
+    has been sent. A request shed at that point is answered with the same
+    503 and the app's own response is discarded.
+
+    The client's deadline is read from ``X-Request-Timeout`` (seconds) and
+    its priority from ``X-Request-Priority`` (see ``request_priority``).
+
+    Args:
+        app: The ASGI application
+        controller: Shared ``AdmissionController``
+        routes: Request path -> modality
+        exempt: Predicate on the ASGI scope for requests that skip admission
+            (e.g. background job submissions, which have their own queue)
+    """
+
+    def __init__(self, app, controller: AdmissionController, routes: Dict[str, str],
+                 exempt: Optional[Callable[[dict], bool]] = None):
+        self.app = app
+        self.controller = controller
+        self.routes = {path.rstrip("/"): modality for path, modality in routes.items()}
+        self.exempt = exempt
+
+    async def __call__(self, scope, receive, send):
+        modality = self.routes.get(scope.get("path", "").rstrip("/")) if scope["type"] == "http" else None
+        if modality is None or scope["method"] == "OPTIONS" or (self.exempt and self.exempt(scope)):
+            await self.app(scope, receive, send)
+            return
+
+        priority, deadline = request_priority(scope), request_deadline(scope)
+        try:
+            self.controller.check(modality, priority, deadline)
+        except Overloaded as e:
+            await self._reject(send, e)
+            return
+
+        arrived = self.controller.clock()
+        slot: Optional[Slot] = None
+        rejected: Optional[Overloaded] = None
+
+        async def receive_then_acquire():
+            nonlocal slot, rejected
+            message = await receive()
+            if (slot is None and rejected is None and message["type"] == "http.request"
+                    and not message.get("more_body", False)):
+                try:
+                    slot = await self.controller.acquire(modality, priority, deadline,
+                                                         elapsed=self.controller.clock() - arrived)
+                except Overloaded as e:
+                    # Stop the app as if the client had gone; the 503 is sent below
+                    rejected = e
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def send_unless_rejected(message):
+            if rejected is None:
+                await send(message)
+
+        try:
+            await self.app(scope, receive_then_acquire, send_unless_rejected)
+        except Exception:
+            if rejected is None:
+                raise
+        finally:
+            if slot is not None:
+                self.controller.release(slot)
+        if rejected is not None:
+            await self._reject(send, rejected)
+
+    @staticmethod
+    async def _reject(send, error: Overloaded):
+        body = json.dumps({"detail": error.detail, "reason": error.reason}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", error.retry_after_header.encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
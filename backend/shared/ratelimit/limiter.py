@@ -0,0 +1,281 @@
+"""
+Sliding-window rate limiting for VeriFy AI.
+
+Every client (an API key, or the client IP for anonymous traffic) has one
+counter per window: minute, hour and day. A window's count is the sliding
+window estimate: the current fixed bucket plus the previous bucket weighted
+by how much of it still overlaps the window, so bursts straddling a bucket
+boundary cannot double the allowance. A request is admitted only when every
+window has room, and then counts against all of them.
+
+Counters live in Redis when it is reachable, read, checked and incremented
+by a single Lua script so gateway workers share limits atomically, and in
+process memory otherwise (or while Redis is failing).
+"""
+import logging
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import redis.asyncio as aioredis
+    from redis.exceptions import RedisError
+except ImportError:  # pragma: no cover - optional dependency
+    aioredis = None
+    RedisError = OSError
+
+logger = logging.getLogger(__name__)
+
+# Per window: (count in the current bucket, count in the previous bucket)
+WindowCounts = List[Tuple[int, int]]
+
+
+@dataclass(frozen=True)
+class Limit:
+    """At most ``limit`` requests per ``window_seconds``."""
+    limit: int
+    window_seconds: int
+
+
+def default_limits(per_minute: Optional[int], per_hour: Optional[int],
+                   per_day: Optional[int]) -> Tuple[Limit, ...]:
+    """Minute/hour/day limits, skipping windows that are unset or zero."""
+    return tuple(
+        Limit(limit, window)
+        for limit, window in ((per_minute, 60), (per_hour, 3600), (per_day, 86400))
+        if limit
+    )
+
+
+@dataclass
+class RateLimitDecision:
+    """
+    Outcome of one rate-limit check, reported for the most constrained window.
+
+    ``retry_after`` is 0 for admitted requests; for rejected ones it is the
+    number of seconds until a request would fit in every window.
+    """
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_seconds: float
+    retry_after: float = 0.0
+
+    def headers(self) -> List[Tuple[bytes, bytes]]:
+        headers = [
+            (b"x-ratelimit-limit", str(self.limit).encode()),
+            (b"x-ratelimit-remaining", str(self.remaining).encode()),
+            (b"x-ratelimit-reset", str(math.ceil(self.reset_seconds)).encode()),
+        ]
+        if not self.allowed:
+            headers.append((b"retry-after", str(max(1, math.ceil(self.retry_after))).encode()))
+        return headers
+
+
+def _previous_weight(now: float, window: int) -> float:
+    """Share of the previous bucket still inside the sliding window."""
+    return (window - now % window) / window
+
+
+def _retry_after(current: int, previous: int, elapsed: float, limit: Limit) -> float:
+    """Seconds until one more request fits in this window."""
+    window = limit.window_seconds
+    if limit.limit < 1:
+        return window - elapsed
+    if current + 1 > limit.limit:
+        # Wait for the next bucket, then for this bucket's count to slide out
+        return (window - elapsed) + window * (1 - (limit.limit - 1) / current)
+    # Only the previous bucket is in the way; it slides out linearly
+    return max(0.0, window * (1 - (limit.limit - 1 - current) / previous) - elapsed)
+
+
+def decide(limits: Sequence[Limit], counts: WindowCounts, allowed: bool, now: float) -> RateLimitDecision:
+    """
+    Build the decision from the counters as they were before this request.
+
+    Args:
+        limits: Limits checked
+        counts: (current, previous) bucket counts per limit, before this request
+        allowed: Whether the store admitted (and counted) the request
+        now: Time of the check (seconds since the epoch)
+    """
+    reported = None
+    for limit, (current, previous) in zip(limits, counts):
+        elapsed = now % limit.window_seconds
+        used = previous * _previous_weight(now, limit.window_seconds) + current
+        retry_after = 0.0
+        if allowed:
+            used += 1
+        elif used + 1 > limit.limit:
+            retry_after = _retry_after(current, previous, elapsed, limit)
+        # Report the window with the fewest requests left; on rejection, the one blocking longest
+        rank = (-retry_after, max(0, math.floor(limit.limit - used)))
+        if reported is None or rank < reported[0]:
+            reported = (rank, RateLimitDecision(allowed, limit.limit, rank[1], limit.window_seconds - elapsed,
+                                                retry_after))
+    return reported[1]
+
+
+class InMemoryRateLimitStore:
+    """
+    Per-process counters.
+
+    Check and increment run without awaiting, so they are atomic on the
+    event loop. The least recently seen clients are dropped past
+    ``max_clients``.
+    """
+
+    def __init__(self, max_clients: int = 100_000):
+        self.max_clients = max_clients
+        # client -> window -> [bucket index, current count, previous count]
+        self._clients: "OrderedDict[str, Dict[int, List[int]]]" = OrderedDict()
+
+    async def hit(self, client: str, limits: Sequence[Limit], now: float) -> Tuple[bool, WindowCounts]:
+        windows = self._clients.get(client)
+        if windows is None:
+            windows = self._clients[client] = {}
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+        else:
+            self._clients.move_to_end(client)
+
+        counters = []
+        for limit in limits:
+            bucket = int(now // limit.window_seconds)
+            counter = windows.get(limit.window_seconds)
+            if counter is None or counter[0] < bucket - 1:
+                counter = windows[limit.window_seconds] = [bucket, 0, 0]
+            elif counter[0] == bucket - 1:
+                counter[:] = [bucket, 0, counter[1]]
+            counters.append(counter)
+
+        counts = [(counter[1], counter[2]) for counter in counters]
+        allowed = all(
+            previous * _previous_weight(now, limit.window_seconds) + current + 1 <= limit.limit
+            for limit, (current, previous) in zip(limits, counts)
+        )
+        if allowed:
+            for counter in counters:
+                counter[1] += 1
+        return allowed, counts
+
+
+# KEYS: current and previous bucket key per window
+# ARGV: limit, previous-bucket weight and expiry (seconds) per window
+_SLIDING_WINDOW_SCRIPT = """
+local windows = #KEYS / 2
+local values = redis.call('MGET', unpack(KEYS))
+local allowed = 1
+local reply = {}
+for i = 1, windows do
+    local current = tonumber(values[2 * i - 1] or '0')
+    local previous = tonumber(values[2 * i] or '0')
+    reply[2 * i] = current
+    reply[2 * i + 1] = previous
+    if previous * tonumber(ARGV[3 * i - 1]) + current + 1 > tonumber(ARGV[3 * i - 2]) then
+        allowed = 0
+    end
+end
+if allowed == 1 then
+    for i = 1, windows do
+        redis.call('INCR', KEYS[2 * i - 1])
+        redis.call('EXPIRE', KEYS[2 * i - 1], ARGV[3 * i])
+    end
+end
+reply[1] = allowed
+return reply
+"""
+
+
+class RedisRateLimitStore:
+    """Counters shared by every process through Redis, one script call per check."""
+
+    def __init__(self, client, prefix: str = "ratelimit"):
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(_SLIDING_WINDOW_SCRIPT)
+
+    @classmethod
+    async def connect(cls, url: str, timeout: float = 0.5, **kwargs) -> Optional["RedisRateLimitStore"]:
+        """A store on ``url``, or None when the redis client is missing or the server does not answer."""
+        if aioredis is None:
+            return None
+        client = aioredis.from_url(url, socket_connect_timeout=timeout, socket_timeout=timeout, **kwargs)
+        try:
+            await client.ping()
+        except (RedisError, OSError) as e:
+            logger.warning(f"Redis unavailable for rate limiting ({e}); using in-process counters")
+            await client.aclose()
+            return None
+        return cls(client)
+
+    async def hit(self, client: str, limits: Sequence[Limit], now: float) -> Tuple[bool, WindowCounts]:
+        keys = []
+        args = []
+        for limit in limits:
+            bucket = int(now // limit.window_seconds)
+            base = f"{self.prefix}:{client}:{limit.window_seconds}"
+            keys += [f"{base}:{bucket}", f"{base}:{bucket - 1}"]
+            args += [limit.limit, repr(_previous_weight(now, limit.window_seconds)), 2 * limit.window_seconds]
+        reply = await self._script(keys=keys, args=args)
+        counts = [(int(reply[k]), int(reply[k + 1])) for k in range(1, len(reply), 2)]
+        return bool(reply[0]), counts
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class RateLimiter:
+    """
+    Sliding-window limiter over Redis or in-process counters.
+
+    Args:
+        limits: Limits applied when a check does not name its own
+        max_local_clients: Client cap of the in-process store
+        redis_retry_seconds: After a Redis error, how long to use the
+            in-process counters before trying Redis again
+        clock: Time source (seconds since the epoch)
+
+    Usage:
+        limiter = RateLimiter(default_limits(60, 1000, 10000))
+        await limiter.connect(settings.redis_url)
+        decision = await limiter.hit(f"ip:{client_ip}")
+    """
+
+    def __init__(self, limits: Sequence[Limit], max_local_clients: int = 100_000,
+                 redis_retry_seconds: float = 30.0, clock: Callable[[], float] = time.time):
+        self.limits = tuple(limits)
+        self.redis: Optional[RedisRateLimitStore] = None
+        self.local = InMemoryRateLimitStore(max_local_clients)
+        self.redis_retry_seconds = redis_retry_seconds
+        self.clock = clock
+        self._redis_down_until = 0.0
+
+    async def connect(self, redis_url: str, **kwargs) -> bool:
+        """Share counters through Redis if it is reachable; returns whether it is."""
+        self.redis = await RedisRateLimitStore.connect(redis_url, **kwargs)
+        if self.redis is not None:
+            logger.info("Rate limiting counters stored in Redis")
+        return self.redis is not None
+
+    async def hit(self, client: str, limits: Optional[Sequence[Limit]] = None) -> RateLimitDecision:
+        """Check and count one request from ``client``."""
+        limits = tuple(limits) if limits else self.limits
+        now = self.clock()
+        if self.redis is not None and now >= self._redis_down_until:
+            try:
+                allowed, counts = await self.redis.hit(client, limits, now)
+                return decide(limits, counts, allowed, now)
+            except (RedisError, OSError) as e:
+                logger.warning(f"Rate limit check against Redis failed ({e}); "
+                               f"using in-process counters for {self.redis_retry_seconds:.0f}s")
+                self._redis_down_until = now + self.redis_retry_seconds
+        allowed, counts = await self.local.hit(client, limits, now)
+        return decide(limits, counts, allowed, now)
+
+    async def close(self):
+        if self.redis is not None:
+            await self.redis.close()
+            self.redis = None
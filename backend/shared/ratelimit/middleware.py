@@ -0,0 +1,212 @@
+"""
+Rate-limiting middleware and the API key quota cache it consults.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+from .limiter import Limit, RateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class APIKeyQuota:
+    """An active API key's identity and its own limits (None = the default)."""
+    key_id: int
+    per_minute: Optional[int] = None
+    per_hour: Optional[int] = None
+    expires_at: Optional[datetime] = None
+
+    def limits(self, defaults: Sequence[Limit]) -> Tuple[Limit, ...]:
+        overrides = {60: self.per_minute, 3600: self.per_hour}
+        return tuple(Limit(overrides.get(limit.window_seconds) or limit.limit, limit.window_seconds)
+                     for limit in defaults)
+
+
+async def load_api_key_quota(key: str) -> Optional[APIKeyQuota]:
+    """Quota of an active API key from the database, or None for unknown and disabled keys."""
+    from sqlalchemy import select
+
+    from shared.database.models import APIKey
+    from shared.database.session import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as session:
+        row = (await session.execute(
+            select(APIKey.id, APIKey.rate_limit_per_minute, APIKey.rate_limit_per_hour, APIKey.expires_at)
+            .where(APIKey.key == key, APIKey.is_active.is_(True))
+        )).one_or_none()
+    if row is None:
+        return None
+    return APIKeyQuota(row.id, row.rate_limit_per_minute, row.rate_limit_per_hour, row.expires_at)
+
+
+class APIKeyCache:
+    """
+    TTL cache in front of an API key lookup.
+
+    Unknown keys are cached too, so a client cycling through made-up keys
+    costs one lookup per key rather than one per request. Concurrent misses
+    for the same key share a single lookup.
+
+    Args:
+        loader: Async key -> ``APIKeyQuota`` (or None) lookup
+        ttl_seconds: How long a result is reused; also how long a disabled
+            key keeps its quota
+        max_entries: Keys kept; least recently used are dropped first
+        clock: Monotonic time source
+    """
+
+    def __init__(self, loader: Callable[[str], Awaitable[Optional[APIKeyQuota]]], ttl_seconds: float = 60.0,
+                 max_entries: int = 10_000, clock: Callable[[], float] = time.monotonic):
+        self.loader = loader
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[str, Tuple[Optional[APIKeyQuota], float]]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    async def __call__(self, key: str) -> Optional[APIKeyQuota]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] > self.clock():
+            self._entries.move_to_end(key)
+            quota = entry[0]
+        else:
+            quota = await self._load(key)
+        if quota is not None and quota.expires_at is not None and quota.expires_at <= datetime.utcnow():
+            return None
+        return quota
+
+    async def _load(self, key: str) -> Optional[APIKeyQuota]:
+        pending = self._pending.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            quota = await self.loader(key)
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved; with no waiters it would be logged as unhandled
+            raise
+        finally:
+            self._pending.pop(key, None)
+        future.set_result(quota)
+        self._entries[key] = (quota, self.clock() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return quota
+
+    def invalidate(self, key: str):
+        self._entries.pop(key, None)
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware applying a ``RateLimiter`` to every HTTP request.
+
+    Requests with a known ``X-API-Key`` are counted against that key, with
+    its own limits; all other requests against the client IP. Rejected
+    requests get 429 with ``Retry-After`` before the app sees them; every
+    limited response carries ``X-RateLimit-Limit/Remaining/Reset`` for the
+    most constrained window.
+
+    Args:
+        app: The ASGI application
+        limiter: Shared limiter (its ``limits`` apply to IPs and as key defaults)
+        key_lookup: Async API key -> ``APIKeyQuota`` lookup (e.g. an
+            ``APIKeyCache``); without one, API keys are ignored
+        exempt_paths: Paths never limited (health checks, metrics)
+        exempt_prefixes: Path prefixes never limited (cheap status polling)
+        exempt: Predicate on the ASGI scope for other requests never limited
+            (e.g. the chunks of an upload that was counted when it started)
+        trust_forwarded_for: Take the client IP from the first
+            ``X-Forwarded-For`` entry; only behind a proxy that sets it
+
+    Usage:
+        app.add_middleware(RateLimitMiddleware, limiter=limiter,
+                           key_lookup=APIKeyCache(load_api_key_quota),
+                           exempt_paths=["/metrics"])
+    """
+
+    def __init__(self, app, limiter: RateLimiter,
+                 key_lookup: Optional[Callable[[str], Awaitable[Optional[APIKeyQuota]]]] = None,
+                 exempt_paths: Iterable[str] = (), exempt_prefixes: Iterable[str] = (),
+                 exempt: Optional[Callable[[dict], bool]] = None, trust_forwarded_for: bool = False):
+        self.app = app
+        self.limiter = limiter
+        self.key_lookup = key_lookup
+        self.exempt_paths = {path.rstrip("/") or "/" for path in exempt_paths}
+        self.exempt_prefixes = tuple(exempt_prefixes)
+        self.exempt = exempt
+        self.trust_forwarded_for = trust_forwarded_for
+
+    def _exempt(self, scope) -> bool:
+        # CORS preflights carry no work and must not eat into the quota
+        path = scope.get("path", "").rstrip("/") or "/"
+        return (scope["method"] == "OPTIONS" or path in self.exempt_paths
+                or path.startswith(self.exempt_prefixes) or (self.exempt is not None and self.exempt(scope)))
+
+    def _client_ip(self, scope, headers: Dict[bytes, bytes]) -> str:
+        forwarded = headers.get(b"x-forwarded-for") if self.trust_forwarded_for else None
+        if forwarded:
+            return forwarded.split(b",")[0].strip().decode("latin-1")
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self._exempt(scope):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        identity = limits = None
+        api_key = headers.get(b"x-api-key")
+        if api_key and self.key_lookup is not None:
+            try:
+                quota = await self.key_lookup(api_key.decode("latin-1"))
+            except Exception as e:
+                # Key store down: limit by IP rather than failing the request
+                logger.warning(f"API key lookup failed: {e}")
+                quota = None
+            if quota is not None:
+                # Counters are keyed by id so raw keys never reach Redis
+                identity = f"key:{quota.key_id}"
+                limits = quota.limits(self.limiter.limits)
+                # Lets inner middleware (admission priority) trust the key
+                scope.setdefault("state", {})["api_key_id"] = quota.key_id
+        if identity is None:
+            identity = f"ip:{self._client_ip(scope, headers)}"
+
+        decision = await self.limiter.hit(identity, limits)
+        if not decision.allowed:
+            logger.warning(f"Rate limit exceeded for {identity} on {scope['path']}")
+            await self._reject(send, decision)
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), *decision.headers()]}
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+    @staticmethod
+    async def _reject(send, decision):
+        body = json.dumps({"detail": "Rate limit exceeded. Please retry later."}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                *decision.headers(),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
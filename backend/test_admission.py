@@ -0,0 +1,211 @@
+"""
+Offline test for the per-modality admission controller.
+Drives AdmissionController with an injected clock: lower-priority waiters
+are displaced from a full queue, waiters give up once they can no longer
+finish in time, a slot granted to a request that is cancelled at that
+moment goes to the next waiter, freed slots go to the highest priority
+first, and requests that cannot meet their deadline are shed on arrival.
+
+Run: python test_admission.py (or pytest test_admission.py)
+"""
+import asyncio
+
+from shared.ratelimit import AdmissionController, ModalityLimits, Overloaded, Priority
+
+
+class Clock:
+    """Manually advanced monotonic time source for the controller."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+def make_controller(clock: Clock, concurrency: int = 1, max_queue: int = 2,
+                    expected_seconds: float = 2.0, deadline_seconds: float = 60.0):
+    limits = ModalityLimits(concurrency, max_queue, expected_seconds, deadline_seconds)
+    return AdmissionController({"video": limits}, clock=clock)
+
+
+async def enqueue(controller: AdmissionController, priority: Priority, deadline: float = None) -> asyncio.Task:
+    """Start an acquire that has to wait, and let it join the queue."""
+    task = asyncio.create_task(controller.acquire("video", priority, deadline))
+    await asyncio.sleep(0)
+    assert not task.done()
+    return task
+
+
+async def shed_reason(task: asyncio.Task) -> str:
+    try:
+        await task
+    except Overloaded as e:
+        return e.reason
+    raise AssertionError("request was not shed")
+
+
+def test_displacement():
+    """A full queue drops its newest lowest-priority waiter for a higher-priority arrival."""
+    async def run():
+        clock = Clock()
+        controller = make_controller(clock)
+        held = await controller.acquire("video")
+        low = await enqueue(controller, Priority.LOW)
+        normal = await enqueue(controller, Priority.NORMAL)
+
+        # Queue is full: another low-priority request has nobody to displace
+        try:
+            controller.check("video", Priority.LOW)
+        except Overloaded as e:
+            assert e.reason == "queue_full"
+        else:
+            raise AssertionError("full queue admitted a request")
+
+        high = await enqueue(controller, Priority.HIGH)
+        assert await shed_reason(low) == "displaced"
+        assert controller.snapshot()["video"]["queued"] == 2
+
+        controller.release(held)
+        controller.release(await high)
+        controller.release(await normal)
+        assert controller.snapshot()["video"]["running"] == 0
+    asyncio.run(run())
+    print("✅ displacement            low-priority waiter dropped for a high one")
+
+
+def test_queue_timeout():
+    """A waiter leaves the queue once its deadline no longer leaves time to run."""
+    async def run():
+        clock = Clock()
+        controller = make_controller(clock, expected_seconds=0.05)
+        held = await controller.acquire("video")
+        # Predicted wait 0.05s + 0.05s run fits in 0.2s; it gives up after 0.15s
+        waiter = await enqueue(controller, Priority.NORMAL, deadline=0.2)
+        assert await shed_reason(waiter) == "queue_timeout"
+        assert controller.snapshot()["video"] == {
+            "running": 1, "queued": 0, "concurrency": 1, "max_queue": 2, "service_seconds": 0.05,
+        }
+        controller.release(held)
+        assert controller.snapshot()["video"]["running"] == 0
+    asyncio.run(run())
+    print("✅ queue timeout           waiter shed once it cannot finish in time")
+
+
+def test_grant_while_cancelled():
+    """A slot handed to a waiter that is cancelled before resuming goes to the next one."""
+    async def run():
+        clock = Clock()
+        controller = make_controller(clock)
+        held = await controller.acquire("video")
+        first = await enqueue(controller, Priority.NORMAL)
+        second = await enqueue(controller, Priority.NORMAL)
+
+        clock.advance(2.0)
+        controller.release(held)  # grants the slot to first...
+        first.cancel()            # ...whose client disconnects before it runs
+        try:
+            await first
+        except asyncio.CancelledError:
+            pass
+        else:
+            raise AssertionError("cancelled waiter kept its slot")
+
+        slot = await asyncio.wait_for(second, 1)
+        assert controller.snapshot()["video"] == {
+            "running": 1, "queued": 0, "concurrency": 1, "max_queue": 2, "service_seconds": 2.0,
+        }
+        controller.release(slot)
+        assert controller.snapshot()["video"]["running"] == 0
+    asyncio.run(run())
+    print("✅ grant while cancelled   slot passed on, none leaked")
+
+
+def test_priority_order():
+    """Freed slots go to the highest priority, then first come first served."""
+    async def run():
+        clock = Clock()
+        controller = make_controller(clock, max_queue=8)
+        held = await controller.acquire("video")
+        order = []
+
+        async def request(name: str, priority: Priority):
+            slot = await controller.acquire("video", priority)
+            order.append(name)
+            clock.advance(2.0)
+            controller.release(slot)
+
+        tasks = []
+        for name, priority in [("low", Priority.LOW), ("normal-1", Priority.NORMAL),
+                               ("high", Priority.HIGH), ("normal-2", Priority.NORMAL)]:
+            tasks.append(asyncio.create_task(request(name, priority)))
+            await asyncio.sleep(0)
+        assert controller.snapshot()["video"]["queued"] == 4
+
+        controller.release(held)
+        await asyncio.gather(*tasks)
+        assert order == ["high", "normal-1", "normal-2", "low"], order
+    asyncio.run(run())
+    print("✅ priority order          high, then normal in arrival order, then low")
+
+
+def test_deadline_shedding():
+    """Requests that cannot finish before their deadline are rejected on arrival."""
+    async def run():
+        clock = Clock()
+        controller = make_controller(clock, concurrency=2, max_queue=8, expected_seconds=4.0)
+        slots = [await controller.acquire("video"), await controller.acquire("video")]
+        assert controller.predicted_wait("video") == 2.0
+
+        # 2s wait + 4s run does not fit in 5s
+        try:
+            controller.check("video", Priority.NORMAL, deadline=5)
+        except Overloaded as e:
+            assert e.reason == "deadline" and e.retry_after == 2.0 and e.retry_after_header == "2"
+        else:
+            raise AssertionError("request past its deadline admitted")
+
+        # Time already spent receiving the upload counts against the deadline
+        try:
+            await controller.acquire("video", deadline=10, elapsed=5)
+        except Overloaded as e:
+            assert e.reason == "deadline"
+        else:
+            raise AssertionError("elapsed time ignored")
+        waiter = await enqueue(controller, Priority.NORMAL, deadline=10)
+
+        # Slow requests raise the slot-time estimate, so the same deadline no longer fits
+        clock.advance(14.0)
+        controller.release(slots[0])  # 4 + 0.2 * (14 - 4) = 6s
+        slot = await waiter
+        assert controller.snapshot()["video"]["service_seconds"] == 6.0
+        try:
+            controller.check("video", Priority.NORMAL, deadline=8)
+        except Overloaded as e:
+            assert e.reason == "deadline" and e.retry_after_header == "3"
+        else:
+            raise AssertionError("estimate not updated from completed requests")
+        controller.release(slot, record=False)
+        controller.release(slots[1], record=False)
+        assert controller.predicted_wait("video") == 0.0
+    asyncio.run(run())
+    print("✅ deadline shedding       rejected on arrival from the slot-time estimate")
+
+
+def main():
+    print("\n" + "="*70)
+    print("ADMISSION CONTROLLER")
+    print("="*70)
+    test_displacement()
+    test_queue_timeout()
+    test_grant_while_cancelled()
+    test_priority_order()
+    test_deadline_shedding()
+    print("\nAdmission controller checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Query budget test for the community router.
+Runs every endpoint against a throwaway SQLite database and asserts how many
+SQL statements each one issues, so N+1 patterns cannot creep back in. Also
+checks the contribution counters kept up to date by report writes and their
+reconciliation, and that the leaderboard is served from its snapshot.
+
+Run: python test_community_queries.py (or pytest test_community_queries.py)
+"""
+import asyncio
+import os
+import tempfile
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "community.db")
+os.environ.setdefault("ENVIRONMENT", "test")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{DB_PATH}"
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import event, select, update
+
+from shared.auth.jwt import get_current_user_id
+from shared.database.community_models import UserContribution
+from shared.database.contributions import apply_contribution, reconcile_contributions
+from shared.jobs.leaderboard import LeaderboardPublisher
+from shared.database.models import Base, Detection, DetectionType, DetectionVerdict, User, Report
+from shared.database.session import AsyncSessionLocal, engine
+from services.gateway.routers import community
+
+# Statements each request may issue (BEGIN/COMMIT are not counted)
+BUDGETS = {
+    "leaderboard": 0,
+    "stats": 1,
+    "badges": 1,
+    "list_discussions": 1,
+    "create_discussion": 2,
+    "list_replies": 1,
+    "create_reply": 3,
+    "like": 3,
+    "unlike": 2,
+}
+
+statements = []
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def count_statement(conn, cursor, statement, parameters, context, executemany):
+    statements.append(statement)
+
+
+CURRENT_USER = {"id": 1}
+
+app = FastAPI()
+app.include_router(community.router, prefix="/api/v1")
+app.dependency_overrides[get_current_user_id] = lambda: CURRENT_USER["id"]
+app.state.leaderboard = LeaderboardPublisher(interval_seconds=60, size=100)
+
+
+async def seed():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as db:
+        for i in range(1, 31):
+            db.add(User(id=i, email=f"user{i}@example.com", username=f"user{i}", hashed_password="x",
+                        full_name=f"User {i}" if i % 2 else None))
+        for i in range(1, 31):
+            for j in range(i % 4):
+                db.add(Report(user_id=i, report_reason="misleading", verified=bool(j % 2)))
+        await db.commit()
+
+
+async def check_counters():
+    """Counters follow ORM writes; reconciliation repairs what bypasses them."""
+    async with AsyncSessionLocal() as db:
+        report = Report(user_id=5, report_reason="misleading")
+        db.add_all([report, Detection(user_id=5, detection_type=DetectionType.TEXT,
+                                      verdict=DetectionVerdict.FAKE, confidence=0.9, model_used="test")])
+        await db.commit()
+        report.verified = True
+        await db.commit()
+        contrib = (await db.execute(select(UserContribution).where(UserContribution.user_id == 5))).scalar_one()
+        # Seeded: 1 unverified report; added: 1 report (verified) and 1 detection
+        assert (contrib.total_reports, contrib.verified_reports, contrib.total_points) == (2, 1, 60), contrib
+        assert contrib.accuracy_percentage == 50 and contrib.badge_name == "Beginner"
+
+        await db.delete(report)
+        await db.commit()
+        assert await reconcile_contributions(db) == 0
+
+        # Core statements skip the mapper events: the counters drift until reconciled
+        await db.execute(update(Report).where(Report.user_id == 5).values(verified=True))
+        await db.execute(update(UserContribution).where(UserContribution.user_id == 6).values(total_points=999))
+        await db.execute(UserContribution.__table__.delete().where(UserContribution.user_id == 7))
+        assert await reconcile_contributions(db) == 3
+        await db.commit()
+        assert await reconcile_contributions(db) == 0
+        await db.refresh(contrib)
+        assert (contrib.total_reports, contrib.verified_reports, contrib.total_points) == (1, 1, 60), contrib
+        assert contrib.accuracy_percentage == 100
+
+        # Writes landing after reconciliation read the counters are not overwritten
+        await db.execute(update(UserContribution).where(UserContribution.user_id == 6).values(total_points=999))
+        await db.execute(UserContribution.__table__.delete().where(UserContribution.user_id == 7))
+        execute = db.execute
+
+        async def interleaved(statement, *args, **kwargs):
+            result = await execute(statement, *args, **kwargs)
+            db.execute = execute
+            await db.run_sync(lambda session: [apply_contribution(session.connection(), user_id, detections=1)
+                                               for user_id in (6, 7)])
+            return result
+
+        db.execute = interleaved
+        assert await reconcile_contributions(db) == 0
+        points = dict((await db.execute(select(UserContribution.user_id, UserContribution.total_points)
+                                        .where(UserContribution.user_id.in_([6, 7])))).all())
+        assert points == {6: 999 + 10, 7: 10}, points
+        # Both still drift from their sources (no detection rows): the next pass repairs them
+        assert await reconcile_contributions(db) == 2
+        await db.commit()
+    print("✅ contribution counters   maintained on write, drift reconciled")
+
+
+async def check_leaderboard(client):
+    """Snapshots are versioned by content and revalidate with If-None-Match."""
+    publisher = app.state.leaderboard
+    first = await client.get("/leaderboard")
+    etag = first.headers["etag"]
+    statements.clear()
+    cached = await client.get("/leaderboard", headers={"If-None-Match": etag})
+    assert cached.status_code == 304 and cached.headers["etag"] == etag and not statements
+
+    # Re-ranking an unchanged ranking writes nothing and keeps the version
+    await publisher.run_once()
+    assert (await client.get("/leaderboard", headers={"If-None-Match": etag})).status_code == 304
+
+    # User 1 (1 report) overtakes everyone
+    async with AsyncSessionLocal() as db:
+        db.add_all([Report(user_id=1, report_reason="misleading", verified=True) for _ in range(3)])
+        await db.commit()
+    await publisher.run_once()
+    fresh = await client.get("/leaderboard", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200 and fresh.headers["etag"] != etag
+    top = fresh.json()[0]
+    assert top["user_id"] == 1 and top["rank"] == 1 and top["rank_change"] > 0, top
+
+    CURRENT_USER["id"] = 1
+    stats = await call(client, "stats", "GET", "/stats/me")
+    assert stats["current_rank"] == 1 and stats["rank_change"] == top["rank_change"], stats
+    print("✅ leaderboard snapshot    ETag revalidation, rank movement")
+
+
+async def call(client, name, method, path, **kwargs):
+    statements.clear()
+    response = await client.request(method, path, **kwargs)
+    count = len(statements)
+    budget = BUDGETS[name]
+    status = "✅" if count <= budget and response.status_code < 400 else "❌"
+    print(f"{status} {name:20} {response.status_code}  {count} statement(s), budget {budget}")
+    assert response.status_code < 400, response.text
+    assert count <= budget, "\n".join(statements)
+    return response.json()
+
+
+async def main():
+    print("\n" + "="*70)
+    print("COMMUNITY ROUTER QUERY BUDGETS")
+    print("="*70)
+    await seed()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test/api/v1/community") as client:
+        # Reports maintained the counters of every user who filed one
+        for user_id in range(1, 31):
+            CURRENT_USER["id"] = user_id
+            await call(client, "stats", "GET", "/stats/me")
+        CURRENT_USER["id"] = 2
+        stats = await call(client, "stats", "GET", "/stats/me")
+        assert stats["total_reports"] == 2 and stats["accuracy"] == 50
+        CURRENT_USER["id"] = 1
+
+        await app.state.leaderboard.run_once()
+        board = await call(client, "leaderboard", "GET", "/leaderboard", params={"limit": 50})
+        # Users 4, 8, ... filed no reports
+        assert len(board) == 23
+        # Ties share a rank, as with SQL rank()
+        points = [entry["points"] for entry in board]
+        assert [entry["rank"] for entry in board] == [1 + sum(p > own for p in points) for own in points]
+
+        await call(client, "badges", "GET", "/badges")
+
+        for i in range(10):
+            CURRENT_USER["id"] = i + 1
+            disc = await call(client, "create_discussion", "POST", "/discussions",
+                              json={"title": f"Thread {i}", "content": "Is this real?", "category": "general"})
+        for i in range(10):
+            CURRENT_USER["id"] = i + 1
+            reply = await call(client, "create_reply", "POST", f"/discussions/{disc['id']}/replies",
+                               json={"content": f"Reply {i}"})
+
+        listed = await call(client, "list_discussions", "GET", "/discussions")
+        assert len(listed) == 10
+        replies = await call(client, "list_replies", "GET", f"/discussions/{disc['id']}/replies")
+        assert len(replies) == 10 and replies[0]["author"] == "User 1"
+
+        liked = await call(client, "like", "POST", f"/discussions/{disc['id']}/like")
+        assert liked == {"status": "success", "action": "liked", "likes": 1}
+        unliked = await call(client, "unlike", "POST", f"/discussions/{disc['id']}/like")
+        assert unliked == {"status": "success", "action": "unliked", "likes": 0}
+        await call(client, "like", "POST", f"/replies/{reply['id']}/like")
+        await call(client, "unlike", "POST", f"/replies/{reply['id']}/like")
+
+        missing = await client.post("/discussions/9999/like")
+        assert missing.status_code == 404
+        missing = await client.post("/discussions/9999/replies", json={"content": "?"})
+        assert missing.status_code == 404
+
+        await check_leaderboard(client)
+
+    await check_counters()
+    await engine.dispose()
+    print("\nAll community endpoints within their query budgets")
+
+
+def test_community_query_budgets():
+    asyncio.run(main())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
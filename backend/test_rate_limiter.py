@@ -0,0 +1,154 @@
+"""
+Offline test for the sliding-window rate limiter.
+Drives RateLimiter with an injected clock: requests are counted across the
+current and the weighted previous bucket, rejected requests get the number
+of seconds until one more would fit, and a failing or unreachable Redis
+falls back to in-process counters and is retried after a pause.
+
+Run: python test_rate_limiter.py (or pytest test_rate_limiter.py)
+"""
+import asyncio
+
+from shared.ratelimit import InMemoryRateLimitStore, Limit, RateLimiter
+from shared.ratelimit.limiter import RedisError
+
+DAY = 86400
+
+
+class Clock:
+    """Manually advanced wall-clock time source, starting on a day boundary."""
+
+    def __init__(self, now: float = 19675 * DAY):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+class FlakyStore(InMemoryRateLimitStore):
+    """Stands in for the Redis store; fails while ``failing`` is set."""
+
+    def __init__(self):
+        super().__init__()
+        self.failing = False
+        self.calls = 0
+
+    async def hit(self, client, limits, now):
+        self.calls += 1
+        if self.failing:
+            raise RedisError("connection reset")
+        return await super().hit(client, limits, now)
+
+    async def close(self):
+        pass
+
+
+def header(decision, name: bytes) -> str:
+    return dict(decision.headers())[name].decode()
+
+
+def test_sliding_window():
+    """The previous bucket counts in proportion to its overlap with the window."""
+    async def run():
+        clock = Clock()
+        limiter = RateLimiter([Limit(10, 60)], clock=clock)
+        for remaining in range(9, -1, -1):
+            decision = await limiter.hit("ip:1")
+            assert decision.allowed and decision.remaining == remaining
+        assert not (await limiter.hit("ip:1")).allowed
+        assert (await limiter.hit("ip:2")).allowed  # clients are counted separately
+
+        # 15s into the next minute, 3/4 of the previous 10 still count: room for 2
+        clock.advance(75)
+        first = await limiter.hit("ip:1")
+        assert first.allowed and first.remaining == 1 and first.reset_seconds == 45
+        assert (await limiter.hit("ip:1")).allowed
+        assert not (await limiter.hit("ip:1")).allowed
+
+        # A minute with no traffic clears both buckets
+        clock.advance(120)
+        assert (await limiter.hit("ip:1")).remaining == 9
+    asyncio.run(run())
+    print("✅ sliding window          previous bucket weighted by overlap")
+
+
+def test_retry_after():
+    """Rejections report when one more request would fit in every window."""
+    async def run():
+        clock = Clock()
+        limiter = RateLimiter([Limit(8, 60)], clock=clock)
+        for _ in range(8):
+            await limiter.hit("key:1")
+
+        # Full current bucket: wait for the next one and for 1/8 of this one to slide out
+        denied = await limiter.hit("key:1")
+        assert not denied.allowed and denied.retry_after == 67.5
+        assert header(denied, b"retry-after") == "68" and header(denied, b"x-ratelimit-remaining") == "0"
+        clock.advance(30)
+        assert (await limiter.hit("key:1")).retry_after == 37.5
+
+        # Only the previous bucket in the way: 8 * (60 - t) / 60 + 2 + 1 <= 8 from t = 22.5s
+        clock.advance(45)
+        await limiter.hit("key:1")
+        await limiter.hit("key:1")
+        denied = await limiter.hit("key:1")
+        assert not denied.allowed and denied.retry_after == 7.5
+        assert header(denied, b"retry-after") == "8"
+        clock.advance(7.5)
+        assert (await limiter.hit("key:1")).allowed
+
+        # The window blocking longest is reported
+        limiter = RateLimiter([Limit(100, 60), Limit(3, 3600)], clock=clock)
+        for _ in range(3):
+            assert (await limiter.hit("key:2")).allowed
+        denied = await limiter.hit("key:2")
+        assert not denied.allowed and denied.limit == 3
+        assert denied.retry_after > 3600 - clock.now % 3600
+    asyncio.run(run())
+    print("✅ retry after             seconds until one more request fits")
+
+
+def test_redis_fallback():
+    """A failing Redis is bypassed for redis_retry_seconds, then tried again."""
+    async def run():
+        clock = Clock()
+        limiter = RateLimiter([Limit(5, 60)], redis_retry_seconds=30, clock=clock)
+        assert not await limiter.connect("redis://127.0.0.1:1/0", timeout=0.2)
+        assert limiter.redis is None and (await limiter.hit("ip:1")).allowed
+
+        store = limiter.redis = FlakyStore()
+        await limiter.hit("ip:1")
+        assert store.calls == 1 and (await limiter.hit("ip:1")).remaining == 3
+
+        store.failing = True
+        decision = await limiter.hit("ip:1")  # counted in process after the error
+        assert decision.allowed and decision.remaining == 3 and store.calls == 3
+        clock.advance(29)
+        await limiter.hit("ip:1")
+        assert store.calls == 3  # Redis left alone until the retry pause ends
+
+        clock.advance(1)
+        store.failing = False
+        decision = await limiter.hit("ip:1")
+        assert store.calls == 4 and decision.allowed
+        await limiter.close()
+        assert limiter.redis is None
+    asyncio.run(run())
+    print("✅ redis fallback          in-process counters while Redis fails")
+
+
+def main():
+    print("\n" + "="*70)
+    print("RATE LIMITER")
+    print("="*70)
+    test_sliding_window()
+    test_retry_after()
+    test_redis_fallback()
+    print("\nRate limiter checks passed")
+
+
+if __name__ == "__main__":
+    main()
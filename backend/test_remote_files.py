@@ -0,0 +1,117 @@
+"""
+Offline test for the content-addressed remote file registry.
+Drives RemoteFileRegistry against LocalFileService with an injected clock:
+identical content is uploaded once and reused, handles are dropped before
+the provider expires them, and concurrent requests share one upload.
+
+Run: python test_remote_files.py (or pytest test_remote_files.py)
+"""
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from shared.media import LocalFileService, RemoteFileRegistry
+
+HOUR = 3600
+
+
+class Clock:
+    """Manually advanced time source shared by the registry and the service."""
+
+    def __init__(self, now: float = 1_700_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+def make_registry(clock: Clock, **kwargs):
+    service = LocalFileService(ttl_seconds=48 * HOUR, clock=clock)
+    return service, RemoteFileRegistry(service, expiry_margin_seconds=600, clock=clock, **kwargs)
+
+
+def test_reuse():
+    """Same bytes upload once, whether passed as bytes or a file object."""
+    clock = Clock()
+    service, registry = make_registry(clock)
+    first, reused = registry.get_or_upload(b"voice note", suffix=".ogg", mime_type="audio/ogg")
+    assert not reused and first.mime_type == "audio/ogg"
+    again, reused = registry.get_or_upload(io.BytesIO(b"voice note"), suffix=".ogg")
+    assert reused and again is first
+    other, reused = registry.get_or_upload(b"another note", suffix=".ogg")
+    assert not reused and other is not first
+    assert service.upload_count == 2
+    assert registry.stats() == {"entries": 2, "uploads": 2, "hits": 1}
+    assert service.get_file(first.name) is first
+
+    # A handle the provider rejected is uploaded again
+    registry.invalidate(first)
+    replaced, reused = registry.get_or_upload(b"voice note", suffix=".ogg")
+    assert not reused and replaced is not first and service.upload_count == 3
+    print("✅ reuse                   one upload per content")
+
+
+def test_expiry():
+    """Handles stop being reused expiry_margin_seconds before the provider drops them."""
+    clock = Clock()
+    service, registry = make_registry(clock)
+    handle, _ = registry.get_or_upload(b"forwarded clip")
+
+    clock.advance(48 * HOUR - 601)
+    assert registry.get_or_upload(b"forwarded clip") == (handle, True)
+
+    clock.advance(2)  # inside the margin: still valid at the provider, no longer handed out
+    assert service.get_file(handle.name) is handle
+    fresh, reused = registry.get_or_upload(b"forwarded clip")
+    assert not reused and fresh is not handle and service.upload_count == 2
+
+    clock.advance(600)
+    try:
+        service.get_file(handle.name)
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("expired file still served")
+    assert registry.get_or_upload(b"forwarded clip") == (fresh, True)
+    print("✅ expiry                  re-upload before the provider expires a file")
+
+
+def test_single_flight():
+    """Concurrent requests for the same content wait for one upload."""
+    clock = Clock()
+    service, registry = make_registry(clock)
+    upload_file = service.upload_file
+    started = threading.Event()
+
+    def slow_upload(path, mime_type=None):
+        started.set()
+        time.sleep(0.2)
+        return upload_file(path, mime_type=mime_type)
+
+    service.upload_file = slow_upload
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: registry.get_or_upload(b"viral voice note"), range(8)))
+
+    assert started.is_set() and service.upload_count == 1
+    handles = {id(handle) for handle, _ in results}
+    assert len(handles) == 1
+    assert sorted(reused for _, reused in results) == [False] + [True] * 7
+    print("✅ single flight           8 concurrent requests, 1 upload")
+
+
+def main():
+    print("\n" + "="*70)
+    print("REMOTE FILE REGISTRY")
+    print("="*70)
+    test_reuse()
+    test_expiry()
+    test_single_flight()
+    print("\nRemote file registry checks passed")
+
+
+if __name__ == "__main__":
+    main()